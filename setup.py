@@ -47,12 +47,19 @@ setup(
         "scripts/sugar-mkmod",
         "scripts/sugar-valmod",
         "scripts/sugar-gendoc",
+        "scripts/sugar-profmod",
+        "scripts/sugar-loadmod",
+        "scripts/sugar-sdk",
+        "scripts/sugar-cacheserver",
     ],
     install_requires=[
         "Jinja2",
         "pylint",
         "astroid"
     ],
+    extras_require={
+        "ssl": ["cryptography"],
+    },
     include_package_data=True,
     classifiers=[
         'Intended Audience :: Developers',
@@ -0,0 +1,137 @@
+# coding: utf-8
+"""
+Programmatic SDK API.
+
+Validation, documentation and scaffolding, callable in-process
+with structured results. Output goes to the given reporter
+(silent by default), so embedding tools do not need to run
+the scripts and scrape their output.
+
+Example:
+
+    from sugarsdk import api
+
+    results = api.validate(["system.test"], kind="runner")
+    if results.failed:
+        print("\\n".join(results.get_messages("errors")))
+"""
+import os
+import argparse
+import platform
+
+import sugar.lib.exceptions
+
+from sugarsdk.gitchanges import ChangeSet
+from sugarsdk.modval import ModuleValidator
+from sugarsdk.modgen import ModuleGenerator
+from sugarsdk.gendoc import ModuleDocumentationGenerator
+from sugarsdk.reporters import Reporter
+from sugarsdk.results import ValidationResults, DocumentationResults, ScaffoldResults
+
+MODULE_KINDS = ["runner", "state"]
+
+
+def _check_kind(kind, required=False) -> None:
+    """
+    Check module kind.
+
+    :param kind: runner, state or None
+    :param required: kind cannot be None
+    :raises SugarException: if kind is unknown or missing
+    :return: None
+    """
+    if kind not in MODULE_KINDS and (required or kind is not None):
+        raise sugar.lib.exceptions.SugarException("Type expected either to be 'runner' or 'state'.")
+
+
+def validate(uris: list = None, kind: str = None, shard: tuple = None, costs: str = None, cache: bool = True,
+             cache_url: str = None, changes: ChangeSet = None, reporter: Reporter = None) -> ValidationResults:
+    """
+    Validate modules.
+
+    :param uris: URIs of the modules or None for all modules
+    :param kind: runner, state or None for both (only with all modules)
+    :param shard: tuple of (index, total) to validate only a shard of the modules
+    :param costs: path to the cost book for the shard balancing
+    :param cache: use cached results of unchanged modules
+    :param cache_url: URL of the shared remote cache
+    :param changes: ChangeSet object to validate only the affected modules (only with all modules)
+    :param reporter: Reporter object. Default: silent.
+    :raises SugarException: if nothing to validate
+    :return: ValidationResults object
+    """
+    _check_kind(kind, required=uris is not None)
+    args = argparse.Namespace(type=kind, name=None, names=uris, all=uris is None, shard=shard, costs=costs,
+                              no_cache=not cache, cache_url=cache_url, changes=changes)
+    validator = ModuleValidator(args, reporter=reporter or Reporter())
+    if not validator.validate():
+        raise sugar.lib.exceptions.SugarException("Don't know what/how to validate for you...")
+
+    return validator.get_results()
+
+
+def generate_docs(out: str, models: list = None, shard: tuple = None, costs: str = None, changes: ChangeSet = None,
+                  reporter: Reporter = None) -> DocumentationResults:
+    """
+    Generate module documentation.
+
+    :param out: output directory
+    :param models: ModuleModel objects to document (e.g. ValidationResults.clean_models). Default: all modules.
+    :param shard: tuple of (index, total) to generate only a shard of the modules
+    :param costs: path to the cost book for the shard balancing
+    :param changes: ChangeSet object to render only the affected modules (the index lists all of them)
+    :param reporter: Reporter object. Default: silent.
+    :return: DocumentationResults object
+    """
+    args = argparse.Namespace(out=out, force=True, shard=shard, costs=costs, changes=changes)
+    generator = ModuleDocumentationGenerator(args, reporter=reporter or Reporter())
+    generator.generate(models=models)
+
+    return DocumentationResults(out, files=generator.files, mod_toc=generator.mod_toc)
+
+
+def scaffold(name: str, kind: str, impl: str = None, cython: bool = False,
+             reporter: Reporter = None) -> ScaffoldResults:
+    """
+    Generate a new module from the templates.
+    SugarException of the generator is raised, if the module
+    cannot be generated.
+
+    :param name: URI of the module. Example: 'foo.bar.mymodule'.
+    :param kind: runner or state
+    :param impl: implementation name of the runner module. Default: current platform.
+    :param cython: generate Cython (.pyx) implementation of the runner module with its build script
+    :param reporter: Reporter object. Default: silent.
+    :return: ScaffoldResults object
+    """
+    _check_kind(kind, required=True)
+    if impl is None:
+        impl = platform.system().lower()
+    generator = ModuleGenerator(argparse.Namespace(name=name, type=kind, impl=impl, cython=cython),
+                                reporter=reporter or Reporter())
+    path = generator.generate()
+
+    return ScaffoldResults(name, kind, path, files=generator.files)
+
+
+def scaffold_manifest(manifest: str, impl: str = None, cython: bool = False, reporter: Reporter = None) -> list:
+    """
+    Generate many modules from the YAML manifest in one run.
+    See ModuleGenerator.load_manifest for the manifest format.
+    SugarException of the generator is raised, if any of the
+    modules cannot be generated.
+
+    :param manifest: path to the manifest file
+    :param impl: default implementation name of the runner modules. Default: current platform.
+    :param cython: generate Cython implementations, unless the manifest says otherwise
+    :param reporter: Reporter object. Default: silent.
+    :return: list of ScaffoldResults objects
+    """
+    generator = ModuleGenerator(argparse.Namespace(name=None, type=None, impl=impl or platform.system().lower(),
+                                                   cython=cython), reporter=reporter or Reporter())
+    results = []
+    for name, kind, path in generator.generate_manifest(manifest):
+        prefix = os.path.join(path, "")
+        results.append(ScaffoldResults(name, kind, path, files=[f_name for f_name in generator.files
+                                                                if f_name.startswith(prefix)]))
+    return results
@@ -0,0 +1,170 @@
+# coding: utf-8
+"""
+Runner module micro-benchmarks.
+
+Every generated runner module has a "_bench.py" harness
+with one timed case per interface task, seeded from the
+examples of the module. Harnesses are run directly or
+discovered and run by "sugar-valmod --bench".
+"""
+import os
+import sys
+import time
+import importlib.util
+
+import terminaltables
+
+import sugar.modules.runners
+
+from sugar.lib.loader.virtual import VirtualModuleLoader
+from sugarsdk.profmod import percentile
+from sugarsdk.reporters import ConsoleReporter
+from sugarsdk.session import get_session
+from sugarsdk.tasks import RunnerTasks
+
+HARNESS_NAME = "_bench.py"
+
+
+class BenchCase:
+    """
+    Timed call of a task.
+    """
+    def __init__(self, task, args=None, kwargs=None):
+        self.task = task
+        self.args = args or []
+        self.kwargs = kwargs or {}
+
+
+def time_case(func, case, repeat):
+    """
+    Time calls of the task.
+
+    :param func: task callable
+    :param case: BenchCase object
+    :param repeat: number of timed calls
+    :return: result dictionary
+    """
+    func(*case.args, **case.kwargs)  # Warm up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*case.args, **case.kwargs)
+        timings.append(time.perf_counter() - start)
+    return {"task": case.task, "calls": len(timings), "min": min(timings),
+            "p50": percentile(timings, 50), "p95": percentile(timings, 95)}
+
+
+def run_cases(uri, cases, repeat=100):
+    """
+    Run benchmark cases of the module.
+
+    :param uri: URI of the runner module
+    :param cases: list of BenchCase objects
+    :param repeat: number of timed calls per case
+    :return: list of result dictionaries
+    """
+    tasks = RunnerTasks(uri)
+    results = []
+    for case in cases:
+        res = time_case(tasks.get_task(case.task), case, repeat)
+        res["uri"] = uri
+        results.append(res)
+    return results
+
+
+def load_harness(path):
+    """
+    Load benchmark harness of the module.
+
+    :param path: path to the harness file
+    :return: loaded Python module
+    """
+    spec = importlib.util.spec_from_file_location("sugar_bench_{}".format(abs(hash(path))), path)
+    harness = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(harness)
+    return harness
+
+
+def format_results(results):
+    """
+    Format benchmark results as a table.
+
+    :param results: list of result dictionaries
+    :return: table text
+    """
+    table_data = [["Module", "Task", "Calls", "min, ms", "p50, ms", "p95, ms", "ops/s"]]
+    for res in results:
+        table_data.append([res["uri"], res["task"], res["calls"], "{:.3f}".format(res["min"] * 1000),
+                           "{:.3f}".format(res["p50"] * 1000), "{:.3f}".format(res["p95"] * 1000),
+                           "{:.0f}".format(1.0 / res["p50"]) if res["p50"] else "-"])
+    return terminaltables.AsciiTable(table_data=table_data).table
+
+
+def main(uri, cases):
+    """
+    Run the harness directly: "python _bench.py [repeat]".
+
+    :param uri: URI of the runner module
+    :param cases: list of BenchCase objects
+    :return: exit code
+    """
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    sys.stdout.write(format_results(run_cases(uri, cases, repeat=repeat)) + os.linesep)
+    return 0
+
+
+class BenchRunner:
+    """
+    Discovers and runs benchmark harnesses of the runner modules.
+    """
+    def __init__(self, args, reporter=None):
+        self._cli_args = args
+        self._tasks_root = VirtualModuleLoader(sugar.modules.runners).root_path
+        self._registry = get_session().registry
+        self._reporter = reporter or ConsoleReporter()
+        self.results = []
+        self.errors = []
+
+    def get_harnesses(self):
+        """
+        Find harnesses of the selected modules.
+
+        :return: list of (uri, harness path) tuples
+        """
+        self._registry.refresh("runner", self._tasks_root)
+        uris = self._registry.get_uris("runner", self._tasks_root) if self._cli_args.all else [self._cli_args.name]
+        harnesses = []
+        for uri in uris:
+            path = os.path.join(self._tasks_root, *uri.split("."), HARNESS_NAME)
+            if os.path.exists(path):
+                harnesses.append((uri, path))
+            elif not self._cli_args.all:
+                self.errors.append("Runner module '{}' has no benchmark harness ({})".format(uri, HARNESS_NAME))
+        return harnesses
+
+    def run(self):
+        """
+        Run all harnesses.
+
+        :return: None
+        """
+        for uri, path in self.get_harnesses():
+            self._reporter.info("Benchmarking '{}'", uri)
+            try:
+                harness = load_harness(path)
+                self.results.extend(run_cases(getattr(harness, "URI", uri), harness.CASES,
+                                              repeat=self._cli_args.bench_repeat))
+            except Exception as exc:
+                self.errors.append("Benchmark of '{}' failed: {}".format(uri, exc))
+
+    def report(self):
+        """
+        Print benchmark results.
+
+        :return: exit code
+        """
+        if self.results:
+            self._reporter.write(format_results(self.results) + os.linesep)
+        for error in self.errors:
+            self._reporter.error(error)
+        return int(bool(self.errors))
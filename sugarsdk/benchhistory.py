@@ -0,0 +1,405 @@
+# coding: utf-8
+"""
+Benchmark history and performance regression gate.
+
+"sugar-sdk bench record" times the validator, the documentation
+generator, the lint checkers and the benchmark harnesses of the
+runner modules and stores the samples in an SQLite history, keyed
+by the commit, the machine fingerprint and the Python version.
+
+"sugar-sdk bench compare" compares medians of two commits, measured
+on the same machine with the same Python. The relative change of
+the median is bootstrapped to a confidence interval; a metric has
+regressed only if the whole interval is above the threshold, so
+the noise of the runs does not fail the build.
+"""
+import os
+import json
+import time
+import random
+import fnmatch
+import sqlite3
+import argparse
+import platform
+import statistics
+import tempfile
+import contextlib
+import collections
+
+import terminaltables
+
+import sugarsdk.utils
+
+from sugarsdk.gitchanges import get_commit, resolve_commit
+from sugarsdk.reporters import ConsoleReporter
+
+
+def get_machine():
+    """
+    Get fingerprint of the machine: OS, architecture, CPU model,
+    number of CPUs and memory size.
+
+    :return: tuple of (fingerprint, description)
+    """
+    cpu = platform.processor()
+    memory = 0
+    with contextlib.suppress(OSError):
+        with open("/proc/cpuinfo") as info_h:
+            cpu = next((line.split(":", 1)[1].strip() for line in info_h if line.startswith("model name")), cpu)
+    with contextlib.suppress(OSError, ValueError, IndexError):
+        with open("/proc/meminfo") as info_h:
+            memory = int(round(int(info_h.readline().split()[1]) / 1024.0 / 1024.0))
+    description = "{} {}, {} x {}, {} GiB".format(platform.system(), platform.machine(), os.cpu_count(),
+                                                  cpu or "unknown CPU", memory)
+    return sugarsdk.utils.get_digest(description)[:16], description
+
+
+def get_python():
+    """
+    Get Python implementation and version.
+
+    :return: version string
+    """
+    return "{} {}".format(platform.python_implementation(), platform.python_version())
+
+
+def bootstrap_change(base, head, confidence=0.95, resamples=2000, seed=0):
+    """
+    Get relative change of the median with the bootstrap confidence interval.
+
+    :param base: samples of the base
+    :param head: samples of the head
+    :param confidence: confidence level of the interval
+    :param resamples: number of bootstrap resamples
+    :param seed: seed of the resampling, so the results are reproducible
+    :return: tuple of (change, low, high) as fractions, e.g. 0.05 is 5% slower
+    """
+    rng = random.Random(seed)
+    base_median = statistics.median(base)
+    change = statistics.median(head) / base_median - 1 if base_median else 0.0
+    changes = []
+    for _ in range(resamples):
+        b_median = statistics.median([rng.choice(base) for _ in base])
+        h_median = statistics.median([rng.choice(head) for _ in head])
+        changes.append(h_median / b_median - 1 if b_median else 0.0)
+    changes.sort()
+    tail = (1 - confidence) / 2
+    return (change, changes[int(tail * (resamples - 1))], changes[int(round((1 - tail) * (resamples - 1)))])
+
+
+class HistoryStore:
+    """
+    SQLite-backed history of the benchmark runs.
+    """
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created REAL NOT NULL,
+        commit_id TEXT NOT NULL,
+        dirty INTEGER NOT NULL,
+        machine TEXT NOT NULL,
+        python TEXT NOT NULL,
+        label TEXT
+    );
+    CREATE INDEX IF NOT EXISTS runs_key ON runs (machine, python, commit_id);
+    CREATE TABLE IF NOT EXISTS samples (
+        run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+        metric TEXT NOT NULL,
+        value REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS samples_run ON samples (run_id, metric);
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("SUGAR_SDK_BENCH_HISTORY") or os.path.join(
+            sugarsdk.utils.get_cache_dir(), "bench.sqlite")
+        self._conn = sqlite3.connect(self.path, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(self.SCHEMA)
+
+    def add_run(self, commit_id, dirty, machine, python, samples, label=None):
+        """
+        Store the run.
+
+        :param commit_id: commit ID
+        :param dirty: work tree had uncommitted changes
+        :param machine: machine fingerprint
+        :param python: Python version
+        :param samples: dict of metric to list of values (seconds)
+        :param label: free text label of the run
+        :return: run ID
+        """
+        with self._conn:
+            run_id = self._conn.execute("INSERT INTO runs (created, commit_id, dirty, machine, python, label) "
+                                        "VALUES (?, ?, ?, ?, ?, ?)",
+                                        (time.time(), commit_id, int(dirty), machine, python, label)).lastrowid
+            self._conn.executemany("INSERT INTO samples (run_id, metric, value) VALUES (?, ?, ?)",
+                                   [(run_id, metric, value) for metric, values in samples.items() for value in values])
+        return run_id
+
+    def get_runs(self, machine, python, commit_id=None, clean_only=False):
+        """
+        Get runs on the machine with the Python version, latest first.
+
+        :param machine: machine fingerprint
+        :param python: Python version
+        :param commit_id: only runs of this commit
+        :param clean_only: skip runs of the work trees with uncommitted changes
+        :return: list of run rows
+        """
+        query = "SELECT * FROM runs WHERE machine = ? AND python = ?"
+        params = [machine, python]
+        if commit_id is not None:
+            query += " AND commit_id = ?"
+            params.append(commit_id)
+        if clean_only:
+            query += " AND dirty = 0"
+        return list(self._conn.execute(query + " ORDER BY created DESC, id DESC", params))
+
+    def get_samples(self, run_ids):
+        """
+        Get samples of the runs, pooled per metric.
+
+        :param run_ids: list of run IDs
+        :return: dict of metric to list of values
+        """
+        samples = collections.OrderedDict()
+        for row in self._conn.execute("SELECT metric, value FROM samples WHERE run_id IN ({}) ORDER BY metric, rowid"
+                                      .format(", ".join("?" * len(run_ids))), list(run_ids)):
+            samples.setdefault(row["metric"], []).append(row["value"])
+        return samples
+
+
+class BenchRecorder:
+    """
+    Runs the benchmark suites and records the samples.
+    """
+    def __init__(self, args, reporter=None):
+        self._cli_args = args
+        self._reporter = reporter or ConsoleReporter()
+        self.samples = collections.OrderedDict()
+        self.failures = []
+
+    def _add(self, metric, value):
+        """
+        Add a sample.
+
+        :param metric: metric name
+        :param value: value in seconds
+        :return: None
+        """
+        self.samples.setdefault(metric, []).append(value)
+
+    @staticmethod
+    def _run_quietly(argv):
+        """
+        Run SDK command in this process without its output.
+        Memoised files and the session of the previous run are
+        dropped, so every run reads and parses the modules again.
+
+        :param argv: command line of "sugar-sdk"
+        :return: tuple of (exit code, elapsed seconds)
+        """
+        import sugarsdk.cli
+        import sugarsdk.session
+
+        sugarsdk.utils.clear_files()
+        sugarsdk.session.reset_session()
+        with open(os.devnull, "w") as null_h, contextlib.redirect_stdout(null_h), contextlib.redirect_stderr(null_h):
+            start = time.perf_counter()
+            code = sugarsdk.cli.main(argv)
+            return code, time.perf_counter() - start
+
+    def _run_command(self, suite, argv, timed):
+        """
+        Run the command of the suite and record its wall time.
+
+        :param suite: suite name (metric)
+        :param argv: command line of "sugar-sdk"
+        :param timed: record the time (False for the warm-up)
+        :return: None
+        """
+        code, elapsed = self._run_quietly(argv)
+        if code and suite != "lint":  # Lint messages are not failures of the run
+            self.failures.append("{} exited with code {}".format(suite, code))
+        if timed:
+            self._add(suite, elapsed)
+
+    def _run_lint(self, work_dir, timed):
+        """
+        Run lint with the checker profiler and record the time of each Sugar checker.
+
+        :param work_dir: directory for the profile
+        :param timed: record the times (False for the warm-up)
+        :return: None
+        """
+        profile = os.path.join(work_dir, "lint-profile.json")
+        self._run_command("lint", ["lint"] + (self._cli_args.path or ["sugar/"])
+                          + ["--no-cache", "--profile", "--profile-json", profile], timed)
+        if timed and os.path.exists(profile):
+            checkers = collections.OrderedDict()
+            with open(profile) as p_h:
+                for method, (_, elapsed) in sorted(json.load(p_h).get("methods", {}).items()):
+                    name = "lint:{}".format(method.split(".", 1)[0])
+                    checkers[name] = checkers.get(name, 0.0) + elapsed
+            for name, elapsed in checkers.items():
+                self._add(name, elapsed)
+            os.unlink(profile)
+
+    def _run_runners(self, timed):
+        """
+        Run benchmark harnesses of all runner modules and record median time of each task.
+
+        :param timed: record the times (False for the warm-up)
+        :return: None
+        """
+        from sugarsdk.bench import BenchRunner
+        from sugarsdk.reporters import Reporter
+
+        bench = BenchRunner(argparse.Namespace(all=True, name=None, bench_repeat=self._cli_args.bench_repeat),
+                            reporter=Reporter())
+        bench.run()
+        self.failures.extend(bench.errors)
+        for res in bench.results if timed else []:
+            self._add("runner:{}.{}".format(res["uri"], res["task"]), res["p50"])
+
+    def record(self):
+        """
+        Run the suites and store the samples.
+
+        :return: exit code
+        """
+        machine, description = get_machine()
+        commit_id, dirty = get_commit()
+        with tempfile.TemporaryDirectory(prefix="sugar-bench-") as work_dir:
+            for suite in self._cli_args.suite:
+                self._reporter.info("Benchmarking {} ({} warm-up, {} timed run(s))", suite, self._cli_args.warmup,
+                                    self._cli_args.repeat)
+                for idx in range(self._cli_args.warmup + self._cli_args.repeat):
+                    timed = idx >= self._cli_args.warmup
+                    if suite == "valmod":
+                        self._run_command(suite, ["valmod", "--all", "--no-cache"], timed)
+                    elif suite == "gendoc":
+                        self._run_command(suite, ["gendoc", "--out", os.path.join(work_dir, "doc"), "--force"], timed)
+                    elif suite == "lint":
+                        self._run_lint(work_dir, timed)
+                    else:
+                        self._run_runners(timed)
+
+        for failure in sorted(set(self.failures)):
+            self._reporter.error(failure)
+        ret = int(bool(self.failures or not self.samples))
+        if ret:
+            self._reporter.error("Benchmark run is not recorded{}", "" if self.failures else ": no samples")
+        else:
+            history = HistoryStore(self._cli_args.history)
+            run_id = history.add_run(commit_id, dirty, machine, get_python(), self.samples, label=self._cli_args.label)
+            self._reporter.info("Recorded run #{}: {} metric(s), commit {}{}, {}, {}", run_id, len(self.samples),
+                                commit_id[:12], " (dirty)" if dirty else "", get_python(), description)
+        if not ret and dirty:
+            self._reporter.warning("Work tree has uncommitted changes: the run is compared only with --include-dirty")
+        return ret
+
+
+class BenchComparer:
+    """
+    Compares benchmark runs of two commits.
+    """
+    def __init__(self, args, reporter=None):
+        self._cli_args = args
+        self._reporter = reporter or ConsoleReporter()
+        self._store = HistoryStore(args.history)
+        self._machine = get_machine()[0]
+        self._python = get_python()
+        self._clean_only = not args.include_dirty
+
+    def _get_commit_runs(self, ref, exclude=None):
+        """
+        Get runs of the commit. Runs of the work trees with uncommitted
+        changes are skipped, unless they are included explicitly.
+        Failures of git are raised as ValueError.
+
+        :param ref: git reference or None for the latest recorded commit
+        :param exclude: commit ID to skip, when looking for the latest recorded commit
+        :return: list of run rows
+        """
+        if ref is not None:
+            commit_id = resolve_commit(ref)
+        else:
+            recorded = [run["commit_id"] for run in self._store.get_runs(self._machine, self._python,
+                                                                         clean_only=self._clean_only)
+                        if run["commit_id"] != exclude]
+            commit_id = recorded[0] if recorded else None
+        return self._store.get_runs(self._machine, self._python, commit_id=commit_id,
+                                    clean_only=self._clean_only) if commit_id is not None else []
+
+    def _is_selected(self, metric):
+        """
+        Check if the metric is tracked.
+
+        :param metric: metric name
+        :return: bool
+        """
+        return not self._cli_args.metric or any(fnmatch.fnmatch(metric, pattern) for pattern in self._cli_args.metric)
+
+    def compare(self):
+        """
+        Compare the head runs to the base runs.
+        Failures of git are raised as ValueError.
+
+        :return: exit code: 1 if any tracked metric has regressed, there are no runs
+                 of the head, or there are no runs of the base and they are required
+        """
+        ret = 0
+        head = self._get_commit_runs(self._cli_args.head)
+        base = self._get_commit_runs(self._cli_args.base, exclude=head[0]["commit_id"]) if head else []
+        if not head:
+            self._reporter.error("No recorded runs of the head on this machine with {}", self._python)
+            ret = 1
+        elif not base and self._cli_args.require_base:
+            self._reporter.error("No recorded runs of the base on this machine with {}", self._python)
+            ret = 1
+        elif not base:
+            self._reporter.warning("No recorded runs of the base on this machine with {}, nothing to compare",
+                                   self._python)
+        else:
+            ret = self._compare_runs(base, head)
+        return ret
+
+    def _compare_runs(self, base, head):
+        """
+        Compare samples of the head runs to the base runs and report the changes.
+
+        :param base: base run rows
+        :param head: head run rows
+        :return: exit code: 1 if any tracked metric has regressed
+        """
+        threshold = self._cli_args.threshold / 100.0
+        base_samples = self._store.get_samples([run["id"] for run in base])
+        head_samples = self._store.get_samples([run["id"] for run in head])
+        table_data = [["Metric", "Base, ms", "Head, ms", "Change", "{:.0%} CI".format(self._cli_args.confidence),
+                       "Status"]]
+        regressed = []
+        for metric, values in head_samples.items():
+            if not self._is_selected(metric) or metric not in base_samples:
+                continue
+            change, low, high = bootstrap_change(base_samples[metric], values, confidence=self._cli_args.confidence,
+                                                 resamples=self._cli_args.resamples)
+            if low > threshold:
+                status = "regressed"
+                regressed.append(metric)
+            elif high < -threshold:
+                status = "improved"
+            else:
+                status = "ok"
+            table_data.append([metric, "{:.3f}".format(statistics.median(base_samples[metric]) * 1000),
+                               "{:.3f}".format(statistics.median(values) * 1000), "{:+.1%}".format(change),
+                               "{:+.1%} .. {:+.1%}".format(low, high), status])
+
+        self._reporter.info("Base: commit {} ({} run(s)), head: commit {} ({} run(s)), threshold {:.1f}%",
+                            base[0]["commit_id"][:12], len(base), head[0]["commit_id"][:12], len(head),
+                            self._cli_args.threshold)
+        self._reporter.write(terminaltables.AsciiTable(table_data=table_data).table + os.linesep)
+        for metric in regressed:
+            self._reporter.error("'{}' has regressed beyond {:.1f}%", metric, self._cli_args.threshold)
+        return int(bool(regressed))
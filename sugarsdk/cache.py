@@ -0,0 +1,134 @@
+# coding: utf-8
+"""
+Persistent result cache.
+
+Results are JSON-serialisable objects, stored on the disk
+by the key, which is a hash of all the inputs that produced them.
+
+Optionally the cache is backed by a remote content-addressed
+store, shared by developer machines and CI runners. The protocol
+is plain HTTP: "GET <url>/<namespace>/<key>" returns the entry
+(or 404) and "PUT <url>/<namespace>/<key>" stores it, authorized
+by "Bearer <token>" from SUGAR_SDK_CACHE_TOKEN, if set. See
+sugarsdk.cacheserver for the reference implementation.
+"""
+import os
+import json
+import tempfile
+import urllib.error
+import urllib.request
+
+import sugarsdk.utils
+
+
+class ResultCache:
+    """
+    Content-addressed cache of the results.
+    """
+    REMOTE_TIMEOUT = 2
+
+    def __init__(self, namespace, root=None, url=None):
+        self._namespace = namespace
+        self._root = root or sugarsdk.utils.get_cache_dir(namespace)
+        os.makedirs(self._root, exist_ok=True)
+        self._url = (url or os.environ.get("SUGAR_SDK_CACHE_URL") or "").rstrip("/") or None
+
+    def _remote(self, key, data=None):
+        """
+        Get or put the entry at the remote cache.
+        Remote cache is turned off for the rest of the session
+        after the first connection failure, so an unreachable
+        server costs one timeout at most.
+
+        :param key: hex digest key
+        :param data: JSON-serialisable object to put or None to get
+        :return: remote object or None if not cached
+        """
+        obj = None
+        if self._url is not None:
+            url = "{}/{}/{}".format(self._url, self._namespace, key)
+            if data is None:
+                request = urllib.request.Request(url)
+            else:
+                headers = {"Content-Type": "application/json"}
+                if os.environ.get("SUGAR_SDK_CACHE_TOKEN"):
+                    headers["Authorization"] = "Bearer {}".format(os.environ["SUGAR_SDK_CACHE_TOKEN"])
+                request = urllib.request.Request(url, data=json.dumps(data).encode("utf-8"), method="PUT",
+                                                 headers=headers)
+            try:
+                with urllib.request.urlopen(request, timeout=self.REMOTE_TIMEOUT) as r_h:
+                    if data is None:
+                        obj = json.loads(r_h.read().decode("utf-8"))
+            except urllib.error.HTTPError:
+                obj = None
+            except (urllib.error.URLError, IOError, OSError, ValueError):
+                self._url = None
+        return obj
+
+    def _get_path(self, key):
+        """
+        Get path to the cache entry.
+
+        :param key: hex digest key
+        :return: path to the entry file
+        """
+        return os.path.join(self._root, key[:2], "{}.json".format(key))
+
+    def get(self, key):
+        """
+        Get cached result. Local entries are looked up first,
+        remote hits are stored locally.
+
+        :param key: hex digest key
+        :return: cached object or None if not cached
+        """
+        try:
+            with open(self._get_path(key)) as c_h:
+                data = json.load(c_h)
+        except (IOError, OSError, ValueError):
+            data = self._remote(key)
+            if data is not None:
+                self._store(key, data)
+        return data
+
+    def put(self, key, data):
+        """
+        Store a result locally and at the remote cache, if any.
+
+        :param key: hex digest key
+        :param data: JSON-serialisable object
+        :return: None
+        """
+        self._store(key, data)
+        self._remote(key, data)
+
+    def _store(self, key, data):
+        """
+        Store a result locally. Entry is written atomically,
+        so concurrent writers never leave a broken entry.
+
+        :param key: hex digest key
+        :param data: JSON-serialisable object
+        :return: None
+        """
+        path = self._get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as c_h:
+                json.dump(data, c_h)
+            os.replace(tmp_path, path)
+        except (IOError, OSError):
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def clear(self):
+        """
+        Remove all locally cached entries.
+
+        :return: None
+        """
+        for root, _, files in os.walk(self._root):
+            for fname in files:
+                if fname.endswith(".json"):
+                    os.unlink(os.path.join(root, fname))
@@ -0,0 +1,134 @@
+# coding: utf-8
+"""
+Local remote-cache server.
+
+Reference implementation of the remote result cache protocol
+(see sugarsdk.cache), which can be run on a shared host or
+locally as a stand-in for a real content-addressed store.
+
+Every client trusts the cached results, so writes must be
+restricted: run the server with a token (SUGAR_SDK_CACHE_TOKEN
+on the server and on the clients, which may write, e.g. CI),
+and on trusted networks only. Reads are not authenticated.
+"""
+import os
+import re
+import hmac
+import sys
+import json
+import tempfile
+import socketserver
+import http.server
+
+
+class CacheRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Handler of GET/PUT requests of the cache entries at "/<namespace>/<key>".
+    """
+    ENTRY_PATH = re.compile(r"^/(?P<namespace>[A-Za-z0-9_-]+)/(?P<key>[0-9a-f]{16,128})$")
+    MAX_ENTRY_SIZE = 64 * 0x100000
+
+    def _get_entry_path(self):
+        """
+        Get path to the entry file, the same layout as the local cache has.
+
+        :return: path or None, if request path is invalid
+        """
+        path = None
+        match = self.ENTRY_PATH.match(self.path)
+        if match is not None:
+            key = match.group("key")
+            path = os.path.join(self.server.root, match.group("namespace"), key[:2], "{}.json".format(key))
+        return path
+
+    def _respond(self, code, body=b""):
+        """
+        Send response.
+
+        :param code: HTTP status code
+        :param body: response body
+        :return: None
+        """
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _is_authorized(self):
+        """
+        Check the token of the write request, if the server has one.
+
+        :return: bool
+        """
+        token = self.headers.get("Authorization", "")
+        return self.server.token is None or hmac.compare_digest(token.encode("utf-8"),
+                                                                "Bearer {}".format(self.server.token).encode("utf-8"))
+
+    def do_GET(self):  # pylint: disable=C0103
+        """
+        Get cache entry.
+
+        :return: None
+        """
+        path = self._get_entry_path()
+        if path is None:
+            self._respond(400)
+        elif not os.path.exists(path):
+            self._respond(404)
+        else:
+            with open(path, "rb") as e_h:
+                self._respond(200, e_h.read())
+
+    def do_PUT(self):  # pylint: disable=C0103
+        """
+        Store cache entry.
+
+        :return: None
+        """
+        path = self._get_entry_path()
+        size = int(self.headers.get("Content-Length") or 0)
+        if not self._is_authorized():
+            self._respond(401)
+        elif path is None or not 0 < size <= self.MAX_ENTRY_SIZE:
+            self._respond(400)
+        else:
+            data = self.rfile.read(size)
+            try:
+                json.loads(data.decode("utf-8"))
+            except ValueError:
+                data = None
+            if data is None:
+                self._respond(400)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+                with os.fdopen(fd, "wb") as e_h:
+                    e_h.write(data)
+                os.replace(tmp_path, path)
+                self._respond(201)
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        """
+        Log requests only in verbose mode.
+
+        :param format: message format
+        :param args: message arguments
+        :return: None
+        """
+        if self.server.verbose:
+            sys.stderr.write("{} - {}\n".format(self.address_string(), format % args))
+
+
+class CacheServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """
+    Threaded cache server.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, root, verbose=False, token=None):
+        http.server.HTTPServer.__init__(self, address, CacheRequestHandler)
+        self.root = root
+        self.verbose = verbose
+        self.token = token or None
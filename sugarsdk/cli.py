@@ -0,0 +1,822 @@
+# coding: utf-8
+"""
+Command line of the SDK tools.
+
+All tools are subcommands of "sugar-sdk"; the "sugar-*" scripts
+are aliases of them. "sugar-sdk pipeline" runs several stages
+in one process, so they share the module discovery, file
+contents and parsed trees:
+
+    sugar-sdk pipeline flake lint valmod gendoc -o doc/
+
+Tool modules are imported only when their command runs.
+"""
+import os
+import sys
+import time
+import platform
+import argparse
+import collections
+
+import sugarsdk.utils
+from sugarsdk.sharding import parse_shard
+from sugarsdk.options import FLAKE_IGNORED, FLAKE_EXCLUDE, WORKER_MODES, parse_levels
+
+__version__ = "0.0.1 Alpha"
+
+PIPELINE_STAGES = ["flake", "lint", "valmod", "gendoc"]
+BENCH_SUITES = ["valmod", "gendoc", "lint", "runners"]
+
+
+def _print_error(parser, exc, help_=False):
+    """
+    Print usage (or help) and the error.
+
+    :param parser: parser of the command
+    :param exc: exception
+    :param help_: print full help instead of the usage
+    :return: exit code
+    """
+    if help_:
+        parser.print_help()
+    else:
+        parser.print_usage()
+    print("\n{}\n".format(exc))
+    return 1
+
+
+def _add_changes_arguments(parser, action):
+    """
+    Add arguments of the git-aware changed-only mode.
+
+    :param parser: argument parser
+    :param action: what is done to the affected modules or files
+    :return: None
+    """
+    parser.add_argument("--changed-since", help="{} only what is affected by the changes since this git "
+                                                "reference (e.g. 'origin/master').".format(action),
+                        metavar="REF")
+    parser.add_argument("--staged", help="{} only what is affected by the staged changes (pre-commit).".format(
+        action), action="store_true")
+
+
+def _get_changes(args):
+    """
+    Get the change set of the changed-only mode.
+
+    :param args: parsed arguments
+    :return: ChangeSet object or None if all is processed
+    """
+    changes = None
+    if args.changed_since or args.staged:
+        from sugarsdk.gitchanges import ChangeSet
+        changes = ChangeSet(since=args.changed_since, staged=args.staged)
+    return changes
+
+
+def _add_flake_arguments(parser):
+    """
+    Add arguments of the flake command.
+
+    :param parser: argument parser
+    :return: None
+    """
+    parser.add_argument("paths", help="Paths to check. Default: sugar/", nargs="*", default=["sugar/"])
+    parser.add_argument("-i", "--ignore", help="Comma-separated error codes to ignore. Default: {}".format(
+        ",".join(FLAKE_IGNORED)))
+    parser.add_argument("-e", "--exclude", help="Comma-separated patterns to exclude. Default: {}".format(
+        ",".join(FLAKE_EXCLUDE)))
+    parser.add_argument("-j", "--jobs", help="Number of flake8 subprocesses.", type=int)
+    parser.add_argument("-c", "--cache", help="Check only changed files, replay results for the rest.",
+                        action="store_true")
+
+
+def _run_flake(parser, args, extra_args):
+    """
+    Run flake8.
+
+    :param parser: parser of the command
+    :param args: parsed arguments
+    :param extra_args: unknown arguments
+    :return: exit code
+    """
+    from sugarsdk.flake import FlakeRunner
+
+    return FlakeRunner(args).run()
+
+
+def _add_lint_arguments(parser):
+    """
+    Add arguments of the lint command.
+
+    :param parser: argument parser
+    :return: None
+    """
+    parser.add_argument("--no-cache", help="Do not use cached results, lint everything.", action="store_true")
+    parser.add_argument("--clear-cache", help="Remove all cached results before linting.", action="store_true")
+    parser.add_argument("--cache-url", help="URL of the shared remote cache. Default: SUGAR_SDK_CACHE_URL.")
+    parser.add_argument("-j", "--jobs", help="Number of parallel workers. Default: 1 (number of CPUs in fast mode).",
+                        type=int)
+    parser.add_argument("--fast", help="Run only Sugar checkers without pylint (pre-commit mode).",
+                        action="store_true")
+    parser.add_argument("--profile", help="Measure Sugar checkers (disables cache).", action="store_true")
+    parser.add_argument("--profile-top", help="Number of rows in profile tables. Default: 20.", type=int, default=20)
+    parser.add_argument("--profile-json", help="Dump profile statistics to the JSON file instead of printing.")
+    parser.add_argument("--shard", help="Lint only this shard of the files, as I/N. Example: '2/4'.",
+                        type=parse_shard)
+    parser.add_argument("--costs", help="Cost book file for the shard balancing, only read. All shards must "
+                                        "use the same book (e.g. committed), recorded by 'sugar-sdk merge'. "
+                                        "Default: costs.json in the SDK cache directory.")
+    parser.add_argument("--output-json", help="Also dump messages to the JSON file for 'sugar-sdk merge'.")
+    _add_changes_arguments(parser, "Lint")
+
+
+def _run_lint(parser, args, extra_args):
+    """
+    Run pylint with the Sugar checkers. Unknown arguments are passed to pylint.
+
+    :param parser: parser of the command
+    :param args: parsed arguments
+    :param extra_args: unknown arguments
+    :return: exit code
+    """
+    from sugarsdk.lint import SugarLinter
+
+    args.changes = _get_changes(args)
+    try:
+        ret = SugarLinter(args, extra_args).lint()
+    except ValueError as exc:
+        ret = _print_error(parser, exc)
+    return ret
+
+
+def _add_valmod_arguments(parser):
+    """
+    Add arguments of the valmod command.
+
+    :param parser: argument parser
+    :return: None
+    """
+    parser.add_argument("-t", "--type", help="Type of the module.", choices=["runner", "state"])
+    parser.add_argument("-n", "--name", help="Name of the module with the namespace. Example: 'foo.bar.mymodule'.")
+    parser.add_argument("-a", "--all", help="Validate all modules (runners and state).", action="store_true")
+    parser.add_argument("-d", "--gendoc", help="Also generate documentation to this directory "
+                                               "for the modules that are validated without issues.")
+    parser.add_argument("--no-cache", help="Do not use cached results, validate everything.", action="store_true")
+    parser.add_argument("--cache-url", help="URL of the shared remote cache. Default: SUGAR_SDK_CACHE_URL.")
+    parser.add_argument("--audit-import", help="Measure import time and memory of every module in a subprocess.",
+                        action="store_true")
+    parser.add_argument("--budget-time", help="Import time budget per module in ms. Default: 100.",
+                        type=float, default=100)
+    parser.add_argument("--budget-memory", help="Import memory budget per module in KiB. Default: 4096.",
+                        type=float, default=4096)
+    parser.add_argument("--heavy-top", help="Number of heavy imports to show per module. Default: 5.",
+                        type=int, default=5)
+    parser.add_argument("--bench", help="Run benchmark harnesses (_bench.py) of the runner modules "
+                                        "and report per-task timings.", action="store_true")
+    parser.add_argument("--bench-repeat", help="Timed calls per benchmark case. Default: 100.",
+                        type=int, default=100)
+    parser.add_argument("--shard", help="Validate only this shard of the modules, as I/N. Example: '2/4'.",
+                        type=parse_shard)
+    parser.add_argument("--costs", help="Cost book file for the shard balancing, only read. All shards must "
+                                        "use the same book (e.g. committed), recorded by 'sugar-sdk merge'. "
+                                        "Default: costs.json in the SDK cache directory.")
+    parser.add_argument("--report-json", help="Also dump the results to the JSON file for 'sugar-sdk merge'.")
+    _add_changes_arguments(parser, "With --all, validate")
+
+
+def _validate_modules(parser, args):
+    """
+    Validate all modules or the module of the name.
+
+    :param parser: parser of the command
+    :param args: parsed arguments
+    :return: exit code
+    """
+    import sugar.lib.exceptions
+    import sugarsdk.api
+    from sugarsdk.reporters import ConsoleReporter
+
+    uris = None if args.all else [args.name]
+    reporter = ConsoleReporter()
+    try:
+        results = sugarsdk.api.validate(uris=uris, kind=args.type, shard=args.shard, costs=args.costs,
+                                        cache=not args.no_cache, cache_url=args.cache_url,
+                                        changes=_get_changes(args) if uris is None else None, reporter=reporter)
+        if args.gendoc:
+            sugarsdk.api.generate_docs(args.gendoc, models=results.clean_models, reporter=reporter)
+        if args.report_json:
+            results.dump(args.report_json)
+        ret = results.report(reporter)
+    except (sugar.lib.exceptions.SugarException, ValueError) as exc:
+        ret = _print_error(parser, exc)
+    return ret
+
+
+def _run_valmod(parser, args, extra_args):
+    """
+    Validate modules.
+
+    :param parser: parser of the command
+    :param args: parsed arguments
+    :param extra_args: unknown arguments
+    :return: exit code
+    """
+    ret = 0
+    if args.audit_import:
+        from sugarsdk.importaudit import ImportAuditor
+        auditor = ImportAuditor(args)
+        auditor.audit()
+        ret = auditor.report()
+    elif args.bench and (args.all or args.name):
+        from sugarsdk.bench import BenchRunner
+        from sugarsdk.reporters import ConsoleReporter
+        bench = BenchRunner(args, reporter=ConsoleReporter())
+        bench.run()
+        ret = bench.report()
+    elif not args.bench and (args.all or args.name and args.type):
+        ret = _validate_modules(parser, args)
+    else:
+        parser.print_help()
+    return ret
+
+
+def _add_gendoc_arguments(parser):
+    """
+    Add arguments of the gendoc command.
+
+    :param parser: argument parser
+    :return: None
+    """
+    parser.add_argument("-o", "--out", help="Output directory.")
+    parser.add_argument("-f", "--force", help="Overwrite existing documentation files, if any.", action="store_true")
+    parser.add_argument("--shard", help="Generate only this shard of the modules, as I/N. Example: '2/4'.",
+                        type=parse_shard)
+    parser.add_argument("--costs", help="Cost book file for the shard balancing, only read. All shards must "
+                                        "use the same book (e.g. committed), recorded by 'sugar-sdk merge'. "
+                                        "Default: costs.json in the SDK cache directory.")
+    _add_changes_arguments(parser, "Re-render")
+    parser.add_argument("--serve", help="Serve live HTML preview of the documentation, re-rendered "
+                                        "on changes of the module meta files.", action="store_true")
+    parser.add_argument("--bind", help="Address to bind the preview server. Default: 127.0.0.1.",
+                        default="127.0.0.1")
+    parser.add_argument("--port", help="Port of the preview server. Default: 8000.", type=int, default=8000)
+    parser.add_argument("-v", "--verbose", help="Log preview requests.", action="store_true")
+
+
+def _run_gendoc(parser, args, extra_args):
+    """
+    Generate module documentation.
+
+    :param parser: parser of the command
+    :param args: parsed arguments
+    :param extra_args: unknown arguments
+    :return: exit code
+    """
+    import sugar.lib.exceptions
+    import sugarsdk.api
+    from sugarsdk.reporters import ConsoleReporter
+
+    ret = 0
+    if args.serve:
+        ret = _serve_docs(args)
+    elif not args.out:
+        parser.print_help()
+    else:
+        try:
+            sugarsdk.api.generate_docs(args.out, shard=args.shard, costs=args.costs, changes=_get_changes(args),
+                                       reporter=ConsoleReporter())
+        except (sugar.lib.exceptions.SugarException, ValueError) as exc:
+            ret = _print_error(parser, exc)
+    return ret
+
+
+def _serve_docs(args):
+    """
+    Serve live documentation preview.
+
+    :param args: parsed arguments
+    :return: exit code
+    """
+    import threading
+    from sugarsdk.docserve import DocPreview, DocServer, RENDER_ERRORS
+    from sugarsdk.reporters import ConsoleReporter
+
+    reporter = ConsoleReporter()
+    preview = DocPreview(reporter=reporter)
+    start = time.perf_counter()
+    try:
+        preview.refresh(force=True)
+        reporter.info("Rendered documentation in {:.3f}s", time.perf_counter() - start)
+    except RENDER_ERRORS as exc:
+        reporter.error("Rendering failed, the watcher will retry: {}", exc)
+    threading.Thread(target=preview.watch, daemon=True).start()
+
+    server = DocServer((args.bind, args.port), preview, verbose=args.verbose)
+    reporter.info("Serving documentation preview at http://{}:{}/", args.bind, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+    return 0
+
+
+def _add_mkmod_arguments(parser):
+    """
+    Add arguments of the mkmod command.
+
+    :param parser: argument parser
+    :return: None
+    """
+    parser.add_argument("-n", "--name", help="Name of the module with the namespace. Example: 'foo.bar.mymodule'.")
+    parser.add_argument("-t", "--type", help="Type of the module.", choices=["runner", "state"])
+    parser.add_argument("-i", "--impl", help="Imlementation name. Default: {}".format(platform.system().lower()),
+                        default=platform.system().lower())
+    parser.add_argument("-c", "--cython", help="Generate typed Cython (.pyx) implementation with its build script.",
+                        action="store_true")
+    parser.add_argument("-m", "--manifest", help="YAML file with many modules to generate in one run.")
+
+
+def _run_mkmod(parser, args, extra_args):
+    """
+    Generate new modules.
+
+    :param parser: parser of the command
+    :param args: parsed arguments
+    :param extra_args: unknown arguments
+    :return: exit code
+    """
+    import sugar.lib.exceptions
+    import sugarsdk.api
+    from sugarsdk.reporters import ConsoleReporter
+
+    ret = 0
+    try:
+        if args.manifest:
+            sugarsdk.api.scaffold_manifest(args.manifest, impl=args.impl, cython=args.cython,
+                                           reporter=ConsoleReporter())
+        else:
+            sugarsdk.api.scaffold(args.name, args.type, impl=args.impl, cython=args.cython,
+                                  reporter=ConsoleReporter())
+    except sugar.lib.exceptions.SugarException as exc:
+        ret = _print_error(parser, exc, help_=True)
+    return ret
+
+
+def _add_profmod_arguments(parser):
+    """
+    Add arguments of the profmod command.
+
+    :param parser: argument parser
+    :return: None
+    """
+    parser.add_argument("-n", "--name", help="Name of the runner module with the namespace. "
+                                             "Example: 'foo.bar.mymodule'.")
+    parser.add_argument("-f", "--fixture", help="YAML file with task arguments instead of the module examples.")
+    parser.add_argument("-r", "--repeat", help="Number of timed calls per task. Default: 100.", type=int, default=100)
+    parser.add_argument("-t", "--top", help="Number of cProfile hot spots per task (0 to skip). Default: 10.",
+                        type=int, default=10)
+
+
+def _run_profmod(parser, args, extra_args):
+    """
+    Profile tasks of a runner module.
+
+    :param parser: parser of the command
+    :param args: parsed arguments
+    :param extra_args: unknown arguments
+    :return: exit code
+    """
+    import sugar.lib.exceptions
+    from sugarsdk.profmod import ModuleProfiler
+
+    ret = 0
+    if not args.name:
+        parser.print_help()
+    else:
+        try:
+            profiler = ModuleProfiler(args)
+            ret = profiler.report(profiler.profile())
+        except sugar.lib.exceptions.SugarException as exc:
+            ret = _print_error(parser, exc)
+    return ret
+
+
+def _add_loadmod_arguments(parser):
+    """
+    Add arguments of the loadmod command.
+
+    :param parser: argument parser
+    :return: None
+    """
+    parser.add_argument("-n", "--name", help="Name of the runner module with the namespace. "
+                                             "Example: 'foo.bar.mymodule'.")
+    parser.add_argument("-f", "--fixture", help="YAML file with task arguments instead of the module examples.")
+    parser.add_argument("-k", "--task", help="Load only this task (can be repeated). Default: all tasks.",
+                        action="append")
+    parser.add_argument("-w", "--workers", help="Worker kinds (can be repeated). Default: all.",
+                        choices=WORKER_MODES, action="append")
+    parser.add_argument("-c", "--levels", help="Comma-separated concurrency levels. Default: '1,2,4,8'.",
+                        type=parse_levels, default="1,2,4,8")
+    parser.add_argument("-d", "--duration", help="Seconds to run every level. Default: 5.", type=float, default=5)
+
+
+def _run_loadmod(parser, args, extra_args):
+    """
+    Load-test a runner module.
+
+    :param parser: parser of the command
+    :param args: parsed arguments
+    :param extra_args: unknown arguments
+    :return: exit code
+    """
+    import sugar.lib.exceptions
+    from sugarsdk.loadmod import ModuleLoadTester
+
+    args.workers = args.workers or WORKER_MODES
+    ret = 0
+    if not args.name:
+        parser.print_help()
+    else:
+        try:
+            tester = ModuleLoadTester(args)
+            ret = tester.report(tester.run())
+        except sugar.lib.exceptions.SugarException as exc:
+            ret = _print_error(parser, exc)
+    return ret
+
+
+def _add_killall_arguments(parser):
+    """
+    Add arguments of the killall command.
+
+    :param parser: argument parser
+    :return: None
+    """
+    parser.add_argument("-c", "--component", help="Kill only this Sugar component, e.g. 'master' or 'client' "
+                                                  "(can be repeated). Default: all.", action="append")
+    parser.add_argument("-u", "--user", help="Kill processes of this user. Default: current user.")
+    parser.add_argument("-a", "--all-users", help="Kill processes of all users.", action="store_true")
+    parser.add_argument("-t", "--timeout", help="Seconds to wait after SIGTERM before SIGKILL. Default: 5.",
+                        type=float, default=5)
+    parser.add_argument("-n", "--dry-run", help="Only show the processes.", action="store_true")
+
+
+def _run_killall(parser, args, extra_args):
+    """
+    Terminate Sugar processes.
+
+    :param parser: parser of the command
+    :param args: parsed arguments
+    :param extra_args: unknown arguments
+    :return: exit code
+    """
+    import sugar.lib.exceptions
+    from sugarsdk.killall import SugarKiller
+
+    try:
+        ret = SugarKiller(args).kill()
+    except sugar.lib.exceptions.SugarException as exc:
+        ret = _print_error(parser, exc)
+    return ret
+
+
+def _add_genssl_arguments(parser):
+    """
+    Add arguments of the genssl command.
+
+    :param parser: argument parser
+    :return: None
+    """
+    parser.add_argument("-c", "--count", help="Number of key/certificate pairs. Without it, one pair is written "
+                                              "as key.pem, certificate.pem and certificate.p12.", type=int)
+    parser.add_argument("-o", "--out", help="Output directory. Default: current directory.", default=".")
+    parser.add_argument("-n", "--name", help="Common name (prefix of the names with --count). Default: 'minion'.",
+                        default="minion")
+    parser.add_argument("--ca", help="Sign certificates by the local test CA (ca.key.pem, ca.cert.pem "
+                                     "in the output directory, generated if missing).", action="store_true")
+    parser.add_argument("-b", "--bits", help="RSA key size. Default: 2048.", type=int, default=2048)
+    parser.add_argument("-d", "--days", help="Validity days. Default: 365.", type=int, default=365)
+    parser.add_argument("-p", "--password", help="PKCS12 password. Default: none.")
+    parser.add_argument("--no-p12", help="Do not write PKCS12 bundles.", action="store_true")
+    parser.add_argument("-j", "--jobs", help="Worker processes. Default: number of CPUs.", type=int)
+
+
+def _run_genssl(parser, args, extra_args):
+    """
+    Generate test certificates.
+
+    :param parser: parser of the command
+    :param args: parsed arguments
+    :param extra_args: unknown arguments
+    :return: exit code
+    """
+    import sugar.lib.exceptions
+    from sugarsdk.genssl import CertificateGenerator
+
+    ret = 0
+    try:
+        CertificateGenerator(args).generate()
+    except sugar.lib.exceptions.SugarException as exc:
+        ret = _print_error(parser, exc)
+    return ret
+
+
+def _add_cacheserver_arguments(parser):
+    """
+    Add arguments of the cacheserver command.
+
+    :param parser: argument parser
+    :return: None
+    """
+    parser.add_argument("-b", "--bind", help="Address to bind. Default: 127.0.0.1.", default="127.0.0.1")
+    parser.add_argument("-p", "--port", help="Port to listen. Default: 8765.", type=int, default=8765)
+    parser.add_argument("-r", "--root", help="Directory of the cache entries. "
+                                             "Default: 'remote' in the SDK cache directory.")
+    parser.add_argument("-v", "--verbose", help="Log requests.", action="store_true")
+
+
+def _run_cacheserver(parser, args, extra_args):
+    """
+    Serve the remote cache.
+
+    :param parser: parser of the command
+    :param args: parsed arguments
+    :param extra_args: unknown arguments
+    :return: exit code
+    """
+    from sugarsdk.cacheserver import CacheServer
+
+    server = CacheServer((args.bind, args.port), args.root or sugarsdk.utils.get_cache_dir("remote"),
+                         verbose=args.verbose, token=os.environ.get("SUGAR_SDK_CACHE_TOKEN"))
+    print("Serving cache at http://{}:{}/ from {}".format(args.bind, args.port, server.root))
+    if server.token is None:
+        print("WARNING: SUGAR_SDK_CACHE_TOKEN is not set, anyone who can reach the server can write to the cache. "
+              "Use it on trusted networks only.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+    return 0
+
+
+def _add_merge_arguments(parser):
+    """
+    Add arguments of the merge command.
+
+    :param parser: argument parser
+    :return: None
+    """
+    parser.add_argument("-k", "--kind", help="Kind of the outputs.", choices=["valmod", "gendoc", "lint"],
+                        required=True)
+    parser.add_argument("-o", "--out", help="Merged output: JSON report file or documentation directory.")
+    parser.add_argument("--costs", help="Cost book file to record measured costs. "
+                                        "Default: costs.json in the SDK cache directory.")
+    parser.add_argument("inputs", help="JSON reports (valmod, lint) or documentation directories (gendoc).",
+                        nargs="+")
+
+
+def _run_merge(parser, args, extra_args):
+    """
+    Merge outputs of the sharded runs.
+
+    :param parser: parser of the command
+    :param args: parsed arguments
+    :param extra_args: unknown arguments
+    :return: exit code
+    """
+    from sugarsdk.merge import ShardMerger
+
+    try:
+        ret = ShardMerger(args).merge()
+    except (ValueError, IOError, OSError) as exc:
+        ret = _print_error(parser, exc)
+    return ret
+
+
+def _add_bench_arguments(parser):
+    """
+    Add arguments of the bench command.
+
+    :param parser: argument parser
+    :return: None
+    """
+    actions = parser.add_subparsers(dest="action")
+    record = actions.add_parser("record", help="Run the benchmarks and record the samples in the history.",
+                                description="Time the suites and record the samples, keyed by the commit, "
+                                            "the machine and the Python version.")
+    record.add_argument("-s", "--suite", help="Suite to run (can be repeated). Default: all.", action="append",
+                        choices=BENCH_SUITES)
+    record.add_argument("-r", "--repeat", help="Timed runs of every suite. Default: 5.", type=int, default=5)
+    record.add_argument("-w", "--warmup", help="Untimed runs of every suite before the timed. Default: 1.",
+                        type=int, default=1)
+    record.add_argument("-p", "--path", help="Path to lint in the lint suite (can be repeated). Default: sugar/",
+                        action="append")
+    record.add_argument("--bench-repeat", help="Timed calls per benchmark case of the runners. Default: 100.",
+                        type=int, default=100)
+    record.add_argument("-l", "--label", help="Label of the run.")
+    compare = actions.add_parser("compare", help="Compare the recorded runs of two commits.",
+                                 description="Compare medians of the metrics of two commits, recorded on this "
+                                             "machine with this Python. Exits with 1 if any tracked metric "
+                                             "has regressed beyond the threshold.")
+    compare.add_argument("-b", "--base", help="Base commit (git reference). Default: the latest recorded commit "
+                                              "before the head.")
+    compare.add_argument("--head", help="Head commit (git reference). Default: the latest recorded commit.")
+    compare.add_argument("-t", "--threshold", help="Allowed slowdown in percent. Default: 5.", type=float, default=5)
+    compare.add_argument("-m", "--metric", help="Tracked metric, shell-style pattern (can be repeated). "
+                                                "Example: 'runner:*'. Default: all.", action="append")
+    compare.add_argument("-c", "--confidence", help="Confidence level of the interval. Default: 0.95.",
+                         type=float, default=0.95)
+    compare.add_argument("--resamples", help="Bootstrap resamples. Default: 2000.", type=int, default=2000)
+    compare.add_argument("--require-base", help="Exit with 1 if there are no recorded runs of the base "
+                                                "(default: warn and exit with 0).", action="store_true")
+    compare.add_argument("--include-dirty", help="Also compare runs, recorded in the work trees with uncommitted "
+                                                 "changes.", action="store_true")
+    for subparser in (record, compare):
+        subparser.add_argument("--history", help="History database. "
+                                                 "Default: SUGAR_SDK_BENCH_HISTORY or bench.sqlite "
+                                                 "in the SDK cache directory.")
+
+
+def _run_bench(parser, args, extra_args):
+    """
+    Record or compare benchmark runs.
+
+    :param parser: parser of the command
+    :param args: parsed arguments
+    :param extra_args: unknown arguments
+    :return: exit code
+    """
+    import sugar.lib.exceptions
+    from sugarsdk.benchhistory import BenchRecorder, BenchComparer
+
+    ret = 0
+    if args.action is None:
+        parser.print_help()
+    else:
+        try:
+            if args.action == "record":
+                args.suite = args.suite or BENCH_SUITES
+                ret = BenchRecorder(args).record()
+            else:
+                ret = BenchComparer(args).compare()
+        except (sugar.lib.exceptions.SugarException, ValueError, IOError, OSError) as exc:
+            ret = _print_error(parser, exc)
+    return ret
+
+
+def _add_pipeline_arguments(parser):
+    """
+    Add arguments of the pipeline command.
+
+    :param parser: argument parser
+    :return: None
+    """
+    parser.add_argument("stages", help="Stages to run in this order: {}.".format(", ".join(PIPELINE_STAGES)),
+                        nargs="+", choices=PIPELINE_STAGES)
+    parser.add_argument("-p", "--path", help="Path to check by flake and lint (can be repeated). Default: sugar/",
+                        action="append")
+    parser.add_argument("-o", "--out", help="Documentation output directory of the gendoc stage.")
+    parser.add_argument("--fast", help="Run only Sugar checkers without pylint in the lint stage.",
+                        action="store_true")
+    parser.add_argument("--no-cache", help="Do not use cached results.", action="store_true")
+    parser.add_argument("--cache-url", help="URL of the shared remote cache. Default: SUGAR_SDK_CACHE_URL.")
+    parser.add_argument("-k", "--keep-going", help="Run all stages, even if a stage fails.", action="store_true")
+    _add_changes_arguments(parser, "In lint, valmod and gendoc stages, process")
+
+
+def _get_stage_argv(args, stage):
+    """
+    Get command line of the pipeline stage.
+
+    :param args: pipeline arguments
+    :param stage: stage name
+    :return: list of arguments
+    """
+    paths = args.path or ["sugar/"]
+    cache = [] if args.no_cache else ["--cache-url", args.cache_url] if args.cache_url else []
+    argv = {
+        "flake": paths + ([] if args.no_cache else ["--cache"]),
+        "lint": paths + (["--no-cache"] if args.no_cache else cache) + (["--fast"] if args.fast else []),
+        "valmod": ["--all"] + (["--no-cache"] if args.no_cache else cache),
+        "gendoc": ["--out", args.out, "--force"] if args.out else [],
+    }
+    if stage != "flake":
+        argv[stage] += ["--changed-since", args.changed_since] if args.changed_since else []
+        argv[stage] += ["--staged"] if args.staged else []
+    return argv[stage]
+
+
+def _run_pipeline(parser, args, extra_args):
+    """
+    Run the stages in this process, so they share module discovery,
+    file contents and parsed trees.
+
+    :param parser: parser of the command
+    :param args: parsed arguments
+    :param extra_args: unknown arguments
+    :return: exit code
+    """
+    summary = []
+    ret = 0
+    if "gendoc" in args.stages and not args.out:
+        ret = _print_error(parser, "The gendoc stage requires the output directory (-o).")
+
+    for stage in args.stages if not ret else []:
+        stage_parser = get_parser(stage)
+        stage_args, stage_extra = stage_parser.parse_known_args(_get_stage_argv(args, stage))
+        sys.stdout.write("{}=== {} ==={}".format(os.linesep, stage, os.linesep))
+        sys.stdout.flush()
+        start = time.perf_counter()
+        code = COMMANDS[stage].run(stage_parser, stage_args, stage_extra) or 0
+        summary.append((stage, code, time.perf_counter() - start))
+        ret = ret or code
+        if code and not args.keep_going:
+            break
+
+    if summary:
+        print()
+    for stage, code, elapsed in summary:
+        print("{:<8} {:<6} {:.2f}s".format(stage, "failed" if code else "ok", elapsed))
+    return ret
+
+
+Command = collections.namedtuple("Command", ["help", "description", "add_arguments", "run", "extra_args"])
+
+COMMANDS = collections.OrderedDict([
+    ("flake", Command("Run flake8 over the sources.", "Sugar Flake8 Runner, {}", _add_flake_arguments, _run_flake,
+                      False)),
+    ("lint", Command("Run pylint with the Sugar checkers.",
+                     "Sugar Linter, {}. All other options are passed to pylint.", _add_lint_arguments, _run_lint,
+                     True)),
+    ("valmod", Command("Validate modules.", "Sugar Module Validator, {}", _add_valmod_arguments, _run_valmod,
+                       False)),
+    ("gendoc", Command("Generate module documentation.", "Sugar Module Documentation Generator, {}",
+                       _add_gendoc_arguments, _run_gendoc, False)),
+    ("mkmod", Command("Generate new modules.", "Sugar Module Generator, {}", _add_mkmod_arguments, _run_mkmod,
+                      False)),
+    ("profmod", Command("Profile tasks of a runner module.", "Sugar Runner Module Profiler, {}",
+                        _add_profmod_arguments, _run_profmod, False)),
+    ("loadmod", Command("Load-test a runner module.", "Sugar Runner Module Load Tester, {}",
+                        _add_loadmod_arguments, _run_loadmod, False)),
+    ("killall", Command("Terminate Sugar processes.", "Sugar Process Killer, {}", _add_killall_arguments,
+                        _run_killall, False)),
+    ("genssl", Command("Generate test certificates.", "Sugar Test Certificate Generator, {}",
+                       _add_genssl_arguments, _run_genssl, False)),
+    ("cacheserver", Command("Serve the shared remote cache.",
+                            "Sugar SDK Remote Cache Server, {}. Point SUGAR_SDK_CACHE_URL to it. "
+                            "Writes require SUGAR_SDK_CACHE_TOKEN, if it is set.",
+                            _add_cacheserver_arguments, _run_cacheserver, False)),
+    ("merge", Command("Merge outputs of the sharded valmod, gendoc or lint runs.", "Sugar SDK Shard Merger, {}",
+                      _add_merge_arguments, _run_merge, False)),
+    ("bench", Command("Record benchmark runs and compare them to catch regressions.",
+                      "Sugar SDK Benchmark History, {}", _add_bench_arguments, _run_bench, False)),
+    ("pipeline", Command("Run several stages in one process.", "Sugar SDK Pipeline, {}", _add_pipeline_arguments,
+                         _run_pipeline, False)),
+])
+
+
+def get_parser(command=None):
+    """
+    Get argument parser of the command (for the alias scripts)
+    or of "sugar-sdk" with all commands.
+
+    :param command: command name or None
+    :return: ArgumentParser object
+    """
+    if command is not None:
+        parser = argparse.ArgumentParser(prog="sugar-{}".format(command),
+                                         description=COMMANDS[command].description.format(__version__))
+        COMMANDS[command].add_arguments(parser)
+    else:
+        parser = argparse.ArgumentParser(prog="sugar-sdk", description="Sugar SDK, {}".format(__version__))
+        subparsers = parser.add_subparsers(dest="command")
+        for name, cmd in COMMANDS.items():
+            subparser = subparsers.add_parser(name, help=cmd.help, description=cmd.description.format(__version__))
+            cmd.add_arguments(subparser)
+            subparser.set_defaults(command_parser=subparser)
+    return parser
+
+
+def main(argv=None, command=None):
+    """
+    Run the command.
+
+    :param argv: arguments. Default: command line.
+    :param command: command of the alias script or None for "sugar-sdk"
+    :return: exit code
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    parser = get_parser(command)
+    args, extra_args = parser.parse_known_args(argv)
+    command = command or args.command
+    ret = 0
+    if command is None:
+        parser.print_help()
+    else:
+        parser = getattr(args, "command_parser", parser)
+        if extra_args and not COMMANDS[command].extra_args:
+            parser.error("unrecognized arguments: {}".format(" ".join(extra_args)))
+        ret = COMMANDS[command].run(parser, args, extra_args) or 0
+
+    return ret
@@ -0,0 +1,144 @@
+# coding: utf-8
+"""
+Diagnostics store of the validator.
+
+Every diagnostic has a stable code, severity, message template
+(interned, so thousands of entries share one string) and
+arguments. It is keyed to the module and function it is about.
+Exact duplicates are dropped on insert. Entries can be filtered
+by code, module or severity and grouped for the report.
+"""
+import sys
+import collections
+
+SEVERITIES = ["info", "warning", "error"]
+
+
+class Diagnostic(collections.namedtuple("Diagnostic", ["code", "severity", "template", "args",
+                                                       "module", "function"])):
+    """
+    Single diagnostic.
+    """
+    __slots__ = ()
+
+    @property
+    def message(self) -> str:
+        """
+        Formatted message.
+
+        :return: message text
+        """
+        return self.template.format(*self.args)
+
+    @property
+    def location(self) -> str:
+        """
+        Location of the diagnostic.
+
+        :return: "module::function", "module" or empty string
+        """
+        return "::".join([part for part in [self.module, self.function] if part])
+
+
+class DiagnosticStore:
+    """
+    Deduplicated store of the diagnostics.
+    """
+    def __init__(self):
+        self._entries = []
+        self._keys = set()
+        self._index = {"severity": {}, "code": {}, "module": {}}
+        self.duplicates = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def add(self, code, severity, template, args=(), module=None, function=None) -> bool:
+        """
+        Add a diagnostic.
+
+        :param code: stable code of the diagnostic
+        :param severity: info, warning or error
+        :param template: message template with "{}" placeholders
+        :param args: template arguments
+        :param module: module key (e.g. URI)
+        :param function: function key
+        :return: True if added, False if it is a duplicate
+        """
+        args = tuple(args)
+        key = (code, template, tuple([str(arg) for arg in args]), module, function)
+        added = key not in self._keys
+        if added:
+            self._keys.add(key)
+            entry = Diagnostic(code, severity, sys.intern(template), args, module, function)
+            self._entries.append(entry)
+            for field, value in [("severity", severity), ("code", code), ("module", module)]:
+                self._index[field].setdefault(value, []).append(entry)
+        else:
+            self.duplicates += 1
+        return added
+
+    def get(self, severity=None, code=None, module=None) -> list:
+        """
+        Get diagnostics, filtered. Lookup starts from the smallest index.
+
+        :param severity: severity or None for any
+        :param code: code or None for any
+        :param module: module key or None for any
+        :return: list of Diagnostic objects
+        """
+        filters = [(field, value) for field, value in [("severity", severity), ("code", code), ("module", module)]
+                   if value is not None]
+        if not filters:
+            entries = list(self._entries)
+        else:
+            field, value = min(filters, key=lambda item: len(self._index[item[0]].get(item[1], [])))
+            entries = [entry for entry in self._index[field].get(value, [])
+                       if all([getattr(entry, f_name) == f_value for f_name, f_value in filters])]
+        return entries
+
+    def get_messages(self, severity) -> list:
+        """
+        Get (template, args) tuples of the severity, as the validator had them before the store.
+
+        :param severity: info, warning or error
+        :return: list of (template, args) tuples
+        """
+        return [(entry.template, entry.args) for entry in self.get(severity=severity)]
+
+    def group(self, severity) -> list:
+        """
+        Group diagnostics of the severity by code and message,
+        in the order of their first appearance.
+
+        :param severity: info, warning or error
+        :return: list of (code, message, [locations]) tuples
+        """
+        groups = collections.OrderedDict()
+        for entry in self.get(severity=severity):
+            groups.setdefault((entry.code, entry.message), []).append(entry.location)
+        return [(code, message, [location for location in locations if location])
+                for (code, message), locations in groups.items()]
+
+    def to_list(self, start=0) -> list:
+        """
+        Get JSON-serialisable form of the diagnostics.
+
+        :param start: index of the first diagnostic
+        :return: list of lists
+        """
+        return [[entry.code, entry.severity, entry.template, [str(arg) for arg in entry.args],
+                 entry.module, entry.function] for entry in self._entries[start:]]
+
+    def load(self, data) -> None:
+        """
+        Add diagnostics from their JSON-serialisable form.
+
+        :param data: list of lists, as returned by to_list
+        :return: None
+        """
+        for code, severity, template, args, module, function in data:
+            self.add(code, severity, template, args, module=module, function=function)
@@ -0,0 +1,363 @@
+# coding: utf-8
+"""
+Live documentation preview.
+
+Renders module documentation in memory and serves it as HTML
+from a local HTTP server. Meta files of the modules are polled:
+when they change, only the pages of that module are rendered
+again and the open pages of it reload themselves.
+
+HTML is rendered by docutils, if it is installed, otherwise
+the RST source is shown as is. Sphinx-only directives are
+replaced with their plain RST equivalents for the preview.
+"""
+import os
+import re
+import sys
+import html
+import time
+import sqlite3
+import threading
+import socketserver
+import http.server
+import jinja2
+
+import sugar.lib.exceptions
+
+from sugar.lib.loader import SugarModuleLoader
+from sugarsdk.gendoc import ModRSTDoc
+from sugarsdk.model import ModuleModel
+from sugarsdk.registry import ModuleRegistry
+from sugarsdk.session import get_session
+
+try:
+    import docutils.core
+except ImportError:
+    docutils = None
+
+TOCTREE = re.compile(r"^\.\. toctree::\n(?:[ \t]+:[\w-]+:.*\n)*((?:[ \t]*\n|[ \t]+\S.*\n)*)", re.M)
+CODE_BLOCK = re.compile(r"^\.\. code-block::.*$", re.M)
+
+# Errors of a module, which is being edited: the preview reports them and keeps watching
+RENDER_ERRORS = (OSError, ValueError, LookupError, sqlite3.Error, jinja2.TemplateError,
+                 sugar.lib.exceptions.SugarException)
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body><p><a href="/">Module Reference</a></p>
+{body}
+<script>
+(function() {{
+  var version = "{version}";
+  setInterval(function() {{
+    fetch("/_version/{name}").then(function(r) {{ return r.text(); }}).then(function(v) {{
+      if (v !== version) {{ location.reload(); }}
+    }}).catch(function() {{}});
+  }}, 500);
+}})();
+</script>
+</body></html>
+"""
+
+
+def _toctree_to_list(match):
+    """
+    Replace toctree directive with the list of links to its pages.
+
+    :param match: match of the toctree directive
+    :return: RST source
+    """
+    names = [line.strip() for line in match.group(1).splitlines() if line.strip()]
+    return "".join(["- `{0} <{0}.html>`_\n".format(name) for name in names]) + "\n"
+
+
+def to_preview_rst(source):
+    """
+    Replace Sphinx-only directives with plain RST.
+
+    :param source: RST source
+    :return: RST source
+    """
+    return CODE_BLOCK.sub("::", TOCTREE.sub(_toctree_to_list, source))
+
+
+def rst_to_html(source):
+    """
+    Render RST to HTML body.
+
+    :param source: RST source
+    :return: HTML
+    """
+    source = to_preview_rst(source)
+    if docutils is not None:
+        body = docutils.core.publish_parts(source, writer_name="html",
+                                           settings_overrides={"report_level": 4, "halt_level": 5})["html_body"]
+    else:
+        body = "<pre>{}</pre>".format(html.escape(source))
+    return body
+
+
+class DocPreview:
+    """
+    In-memory rendered documentation of all modules.
+    """
+    META_FILES = ["doc.yaml", "examples.yaml", "scheme.yaml"]
+    INDEX_NAME = "index"
+
+    def __init__(self, reporter=None):
+        self._loader = SugarModuleLoader()
+        self._registry = get_session().registry
+        self._reporter = reporter
+        self._lock = threading.Lock()
+        self._pages = {}  # name: (version, HTML)
+        self._module_pages = {}  # (type, URI): [names]
+        self._stamps = {}  # (type, URI): meta files stamp
+        self._version = 0
+
+    def _get_roots(self):
+        """
+        Get roots of the module types.
+
+        :return: list of (type, root path) tuples
+        """
+        return [("runner", self._loader.runners.root_path), ("state", self._loader.states.root_path)]
+
+    def _get_stamp(self, path):
+        """
+        Get stamp of the module meta files.
+
+        :param path: module directory
+        :return: tuple of mtimes
+        """
+        stamp = []
+        for fname in self.META_FILES:
+            try:
+                stamp.append(os.stat(os.path.join(path, fname)).st_mtime_ns)
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def _set_pages(self, pages):
+        """
+        Store rendered pages under new versions.
+
+        :param pages: list of (name, title, HTML body) tuples
+        :return: None
+        """
+        for name, title, body in pages:
+            self._version += 1
+            self._pages[name] = (self._version, PAGE.format(title=html.escape(title), body=body,
+                                                            version=self._version, name=name))
+
+    @staticmethod
+    def _get_toc_name(mod_type, uri):
+        """
+        Get name of the module TOC page.
+
+        :param mod_type: runner or state
+        :param uri: URI of the module
+        :return: page name
+        """
+        return "doc_m_toc_{}_{}".format(mod_type[0], uri.replace(".", "_"))
+
+    def _render_error(self, mod_type, uri, path, exc):
+        """
+        Replace TOC page of the module with the rendering error.
+        Function pages are kept until the module renders again.
+
+        :param mod_type: runner or state
+        :param uri: URI of the module
+        :param path: module directory
+        :param exc: rendering error
+        :return: None
+        """
+        toc_name = self._get_toc_name(mod_type, uri)
+        body = "<h1>{}</h1>\n<pre>{}</pre>".format(html.escape(uri), html.escape(str(exc)))
+        with self._lock:
+            self._set_pages([(toc_name, uri, body)])
+            names = [name for name in self._module_pages.get((mod_type, uri), []) if name != toc_name]
+            self._module_pages[(mod_type, uri)] = [toc_name] + names
+            self._stamps[(mod_type, uri)] = self._get_stamp(path)
+
+    def render_module(self, mod_type, uri, root_path):
+        """
+        Render TOC and function pages of the module.
+        Pages are rendered outside of the lock, so serving is not blocked.
+        Module with broken meta files keeps its previous pages until
+        the files change again.
+
+        :param mod_type: runner or state
+        :param uri: URI of the module
+        :param root_path: root of the modules of that type
+        :raises ValueError: if meta files of the module cannot be loaded
+        :return: None
+        """
+        model = ModuleModel(uri, mod_type, root_path)
+        if model.broken:
+            with self._lock:
+                self._stamps[(mod_type, uri)] = self._get_stamp(model.path)
+            raise ValueError("; ".join(["'{}' is broken: {}".format(metafile, exc) for metafile, exc in model.broken]))
+        mod_rst_doc = ModRSTDoc.from_model(model)
+        toc = rst_to_html(mod_rst_doc.get_module_toc() or "``{}``".format(uri))
+        pages = [(self._get_toc_name(mod_type, uri), uri, toc)]
+        for f_name, f_man in mod_rst_doc.next_func():
+            f_uri = "{}.{}".format(uri, f_name)
+            pages.append(("doc_f_{}_{}".format(mod_type[0], f_uri.replace(".", "_")), f_uri, rst_to_html(f_man)))
+        names = [page[0] for page in pages]
+        with self._lock:
+            self._set_pages(pages)
+            for name in set(self._module_pages.get((mod_type, uri), [])) - set(names):
+                self._pages.pop(name, None)
+            self._module_pages[(mod_type, uri)] = names
+            self._stamps[(mod_type, uri)] = self._get_stamp(model.path)
+
+    def _render_index(self):
+        """
+        Render module reference page.
+
+        :return: None
+        """
+        mod_toc = {"mod_runner": [], "mod_state": []}
+        for mod_type, uri in sorted(self._module_pages):
+            mod_toc["mod_{}".format(mod_type)].append(self._module_pages[(mod_type, uri)][0])
+        body = rst_to_html(ModRSTDoc.get_template("doc_modbook").render(mod_toc=mod_toc, len=len))
+        with self._lock:
+            self._set_pages([(self.INDEX_NAME, "Module Reference", body)])
+
+    def refresh(self, force=False, registry=None):
+        """
+        Render modules, which are new or whose meta files have changed,
+        and drop removed modules. Module, which fails to render, gets
+        the error in place of its TOC page.
+
+        :param force: refresh the module registry too
+        :param registry: module registry, opened by the calling thread.
+                         Default: registry of the session (only for the thread, which created the preview).
+        :return: list of re-rendered (type, URI) tuples
+        """
+        registry = registry or self._registry
+        rendered = []
+        failed = []
+        known = set()
+        for mod_type, root_path in self._get_roots():
+            registry.refresh(mod_type, root_path, force=force)
+            for uri in registry.get_uris(mod_type, root_path):
+                known.add((mod_type, uri))
+                path = os.path.join(root_path, *uri.split("."))
+                if self._stamps.get((mod_type, uri)) != self._get_stamp(path):
+                    try:
+                        self.render_module(mod_type, uri, root_path)
+                    except RENDER_ERRORS as exc:
+                        self._render_error(mod_type, uri, path, exc)
+                        failed.append((mod_type, uri))
+                        if self._reporter is not None:
+                            self._reporter.error("Rendering {} module '{}' failed: {}", mod_type, uri, exc)
+                    else:
+                        rendered.append((mod_type, uri))
+        removed = set(self._module_pages) - known
+        with self._lock:
+            for key in removed:
+                for name in self._module_pages.pop(key):
+                    self._pages.pop(name, None)
+                self._stamps.pop(key, None)
+        if rendered or failed or removed or self.INDEX_NAME not in self._pages:
+            self._render_index()
+        return rendered
+
+    def watch(self, interval=0.3, rescan=10):
+        """
+        Poll meta files and re-render changed modules. Runs forever
+        in the watcher thread, which opens its own connection to the
+        registry, as SQLite connections cannot be shared by threads.
+
+        :param interval: seconds between polls
+        :param rescan: polls between registry refreshes (new or removed modules)
+        :return: None
+        """
+        registry = ModuleRegistry(self._registry.path)
+        polls = 0
+        while True:
+            time.sleep(interval)
+            polls += 1
+            try:
+                start = time.perf_counter()
+                for mod_type, uri in self.refresh(force=polls % rescan == 0, registry=registry):
+                    if self._reporter is not None:
+                        self._reporter.info("Re-rendered {} module '{}' in {:.3f}s", mod_type, uri,
+                                            time.perf_counter() - start)
+            except RENDER_ERRORS as exc:
+                if self._reporter is not None:
+                    self._reporter.error("Rendering failed: {}", exc)
+
+    def get_page(self, name):
+        """
+        Get rendered page.
+
+        :param name: page name
+        :return: tuple of (version, HTML) or None if not found
+        """
+        with self._lock:
+            return self._pages.get(name)
+
+
+class DocRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serves the rendered pages at "/<name>.html" and their versions at "/_version/<name>".
+    """
+    def _respond(self, code, body, content_type="text/html; charset=utf-8"):
+        """
+        Send response.
+
+        :param code: HTTP status code
+        :param body: response text
+        :param content_type: content type
+        :return: None
+        """
+        data = body.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):  # pylint: disable=C0103
+        """
+        Get page or its version.
+
+        :return: None
+        """
+        path = self.path.split("?", 1)[0]
+        if path.startswith("/_version/"):
+            page = self.server.preview.get_page(path[len("/_version/"):])
+            self._respond(200, str(page[0]) if page else "", content_type="text/plain")
+        else:
+            name = path.strip("/") or DocPreview.INDEX_NAME
+            page = self.server.preview.get_page(name[:-len(".html")] if name.endswith(".html") else name)
+            if page is None:
+                self._respond(404, "<h1>Page not found</h1>")
+            else:
+                self._respond(200, page[1])
+
+    def log_message(self, format, *args):  # pylint: disable=W0622
+        """
+        Log requests only in verbose mode.
+
+        :param format: message format
+        :param args: message arguments
+        :return: None
+        """
+        if self.server.verbose:
+            sys.stderr.write("{} - {}\n".format(self.address_string(), format % args))
+
+
+class DocServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """
+    Live documentation preview server.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, preview, verbose=False):
+        http.server.HTTPServer.__init__(self, address, DocRequestHandler)
+        self.preview = preview
+        self.verbose = verbose
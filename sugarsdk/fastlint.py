@@ -0,0 +1,530 @@
+# coding: utf-8
+"""
+Fast Sugar checkers.
+
+Equivalents of the checkers from sugarsdk.linting, running
+directly on the stdlib "ast" and "tokenize" without pylint
+and astroid. Messages (codes, symbols and texts) are the same
+as the pylint plugins emit.
+"""
+import io
+import os
+import re
+import ast
+import tokenize
+import configparser
+import concurrent.futures
+
+import sugarsdk.utils
+import sugarsdk.linting
+
+MESSAGES = {
+    "C8001": ("docstring-newlines", "Docstring definition error: %s"),
+    "C8002": ("docstring-triple-double-quotes",
+              "Triple single-quotes are banned. Please use triple double-quotes instead."),
+    "C8003": ("unnecessary-backslash",
+              "Backslashes are not nice to look at. Please consider avoiding them (use parenthesis etc)."),
+    "E3010": ("pep8-empty-lines", "Expected %s"),
+    "R8001": ("multiple-return-statements",
+              "Multiple returns in a function or a method considered harmful (even if you do not think so)"),
+    "E8010": ("PEP287-no-return", "'%s' has no return mentioned"),
+    "E8011": ("PEP287-no-doc-return", "'%s' has undocumented return statement"),
+    "E8012": ("PEP287-no-varargs", "Variable arguments are not described in the docstring of '%s'"),
+    "E8014": ("PEP287-no-kwargs", "Keyword arguments are not mentioned and not described in the docstring of '%s'"),
+    "E8015": ("PEP287-undocumented-param", "Parameter '%s' is missing explanation in %s"),
+    "E8016": ("PEP287-doc-missing-param", "Parameter '%s' is not mentioned in the docstring of %s at all"),
+    "E8017": ("PEP287-excessive-param",
+              "Parameter '%s' is mentioned in the docstring, but is not in the function signature ('%s')"),
+    "E8018": ("PEP287-main-explanation-missing", "Docstring of '%s' does not contain main explanation."),
+    "E8019": ("PEP287-line-after-main-explanation",
+              "One line expected between main explanation and parameters block in '%s'"),
+    "E8020": ("PEP287-params-block-last", "Parameters block in '%s' is not the last one"),
+    "E8021": ("PEP287-tabs", "Docstring in '%s' contains tabs instead of four spaces."),
+    "E8022": ("PEP287-raises-missing", "Code raises %s but the docstring doesn't mention that."),
+    "E8023": ("PEP287-superfluous-raises", "Code does not raises %s as docstring describes."),
+    "E8024": ("PEP287-doc-why-raised-missing", "Docstring is missing explanation why %s is raised."),
+    "E8025": ("PEP287-doc-raised-wrong-syntax",
+              "The syntax is ':raises %s:', i.e. it should end with the semi-colon, when describing the exception."),
+    "E8026": ("PEP287-doc-raises-instead-raise",
+              "Got E8019 as well? Just use ':raises' instead of '%s' in function '%s'."),
+}
+SYMBOLS = {symbol: msgid for msgid, (symbol, _) in MESSAGES.items()}
+MSG_TYPES = {"C": "convention", "R": "refactor", "W": "warning", "E": "error", "F": "fatal"}
+PEP287_KEYWORDS = ["return", "returns", "param", "raises"]
+PRAGMA = re.compile(r"#\s*pylint\s*:\s*disable\s*=\s*([\w\-, ]+)")
+STMT_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
+TRIPLE_SINGLE_QUOTES = "'" * 3
+
+
+def iter_statements(node):
+    """
+    Iterate over the statements directly nested in the node.
+    Definitions, returns and raises are statements, so
+    expressions are never walked into.
+
+    :param node: ast node
+    :return: iterator of ast nodes
+    """
+    for field in STMT_FIELDS:
+        for child in getattr(node, field, None) or ():
+            yield child
+
+
+def count_returns(node):
+    """
+    Count return statements in the node, including nested definitions.
+
+    :param node: ast node
+    :return: number of return statements
+    """
+    returns = 0
+    for child in iter_statements(node):
+        returns += 1 if isinstance(child, ast.Return) else count_returns(child)
+    return returns
+
+
+def get_disabled_messages(rcfile, pylint_args):
+    """
+    Get message ids, disabled in pylintrc or on the command line.
+
+    :param rcfile: path to pylintrc or None
+    :param pylint_args: pylint command line arguments
+    :return: set of message ids
+    """
+    names = []
+    if rcfile:
+        config = configparser.ConfigParser(interpolation=None, strict=False)
+        try:
+            config.read(rcfile)
+        except configparser.Error:
+            pass
+        for section in config.sections():
+            if section.lower() == "messages control" and config.has_option(section, "disable"):
+                names.extend(config.get(section, "disable").split(","))
+    for idx, arg in enumerate(pylint_args):
+        if arg.startswith("--disable="):
+            names.extend(arg.split("=", 1)[-1].split(","))
+        elif arg in ["-d", "--disable"] and idx + 1 < len(pylint_args):
+            names.extend(pylint_args[idx + 1].split(","))
+
+    return {SYMBOLS.get(name.strip(), name.strip()) for name in names if name.strip()}
+
+
+class FastFileChecker:
+    """
+    Runs all fast Sugar checks on one file.
+    """
+    def __init__(self, path, disabled=()):
+        self._path = path
+        self._disabled = set(disabled)
+        self._module = sugarsdk.utils.get_module_name(path)[1]
+        self.messages = []
+        self._source = None
+        self._pragmas = []
+
+    def add_message(self, msgid, line, column=0, obj="", args=None):
+        """
+        Add a message in pylint JSON format.
+
+        :param msgid: message id
+        :param line: line number
+        :param column: column offset
+        :param obj: qualified name of the function or class
+        :param args: message arguments
+        :return: None
+        """
+        if msgid in self._disabled or self._is_suppressed(msgid, line):
+            return
+        symbol, template = MESSAGES[msgid]
+        self.messages.append({
+            "type": MSG_TYPES[msgid[0]], "module": self._module, "obj": obj, "line": line, "column": column,
+            "path": self._path, "symbol": symbol, "message": template % args if args is not None else template,
+            "message-id": msgid,
+        })
+
+    def _is_suppressed(self, msgid, line):
+        """
+        Check if message is disabled by the "pylint: disable" pragma.
+        A trailing pragma applies to its line. A standalone pragma applies
+        until the end of the block of its indentation.
+
+        :param msgid: message id
+        :param line: line number
+        :return: bool
+        """
+        suppressed = False
+        for first, last, names in self._pragmas:
+            if first <= line <= last and (msgid in names or MESSAGES[msgid][0] in names or "all" in names):
+                suppressed = True
+                break
+        return suppressed
+
+    def _collect_pragmas(self, lines):
+        """
+        Collect "pylint: disable" pragmas from the comments.
+
+        :param lines: source lines
+        :return: None
+        """
+        tokens = []
+        if "pylint" in self._source:
+            try:
+                tokens = list(tokenize.generate_tokens(io.StringIO(self._source).readline))
+            except (tokenize.TokenError, SyntaxError):
+                tokens = []
+        for token in tokens:
+            if token.type != tokenize.COMMENT:
+                continue
+            match = PRAGMA.search(token.string)
+            if match is None:
+                continue
+            names = {name.strip() for name in match.group(1).split(",")}
+            row, col = token.start
+            last = row
+            if not lines[row - 1][:col].strip():
+                last = len(lines)
+                for idx in range(row, len(lines)):
+                    if lines[idx].strip() and len(lines[idx]) - len(lines[idx].lstrip()) < col:
+                        last = idx
+                        break
+            self._pragmas.append((row, last, names))
+
+    def _check_lines(self, lines):
+        """
+        Line-based checks: backslashes, triple single-quotes, empty lines.
+
+        :param lines: source lines
+        :return: None
+        """
+        index = []
+        for idx, line in enumerate(lines):
+            s_line = line.strip()
+            if s_line.endswith("\\") and "with " not in s_line and not s_line.startswith("#"):
+                self.add_message("C8003", line=idx + 1)
+            if TRIPLE_SINGLE_QUOTES in line:
+                self.add_message("C8002", line=idx + 1)
+
+            if not line:
+                index.append("-")
+            elif line.startswith("def "):
+                index.append("f")
+            elif s_line.startswith("def "):
+                index.append("m")
+            elif (TRIPLE_SINGLE_QUOTES in line or '"""' in line or line.endswith("'") or line.endswith('"')
+                  or s_line.startswith("#")):
+                index.append("d")
+            elif s_line.startswith("@"):
+                index.append("c")
+            else:
+                index.append("#")
+
+        for idx, element in enumerate(index):
+            if idx < 2 or element not in ["f", "m"]:
+                continue
+            offset = 0
+            for char in index[:idx][::-1]:
+                if char == "c":
+                    continue
+                if char == "-":
+                    offset += 1
+                elif char == "d":
+                    offset = None
+                    break
+                else:
+                    break
+            if offset is not None:
+                if element == "f" and offset != 2:
+                    self.add_message("E3010", line=idx + 1,
+                                     args=("2 blank lines before function, found {}.".format(offset),))
+                elif element == "m" and offset != 1:
+                    self.add_message("E3010", line=idx + 1,
+                                     args=("1 blank line before class method, found {}.".format(offset or "nothing"),))
+
+    def _check_docstring_newlines(self, node, doc, obj):
+        """
+        Docstring should start and end with the newline.
+
+        :param node: ast node (module, class or function)
+        :param doc: raw docstring
+        :param obj: qualified name
+        :return: None
+        """
+        if doc:
+            doc = doc.strip("\t").strip(" ")
+            msg = None
+            if not doc.startswith(os.linesep):
+                msg = "should start with the newline after triple double-quotes"
+            if not doc.endswith(os.linesep):
+                msg = "should end with the newline before triple double-quotes"
+            if msg is not None:
+                self.add_message("C8001", line=getattr(node, "lineno", 1), column=getattr(node, "col_offset", 0),
+                                 obj=obj, args=(msg,))
+
+    def _check_returns(self, node, obj):
+        """
+        Only one return statement per function.
+
+        :param node: function node
+        :param obj: qualified name
+        :return: None
+        """
+        if node.body and count_returns(node) > 1:
+            self.add_message("R8001", line=node.lineno, column=node.col_offset, obj=obj)
+
+    def _visit(self, node, scope):
+        """
+        Walk over definitions.
+
+        :param node: ast node
+        :param scope: list of the enclosing definition names
+        :return: None
+        """
+        for child in iter_statements(node):
+            if isinstance(child, (ast.FunctionDef, ast.ClassDef)):
+                obj = ".".join(scope + [child.name])
+                doc = ast.get_docstring(child, clean=False)
+                self._check_docstring_newlines(child, doc, obj)
+                if isinstance(child, ast.FunctionDef):
+                    self._check_returns(child, obj)
+                    PEP287FastCheck(self, child, doc, obj).check()
+                self._visit(child, scope + [child.name])
+            else:
+                self._visit(child, scope)
+
+    def check(self):
+        """
+        Check the file.
+
+        :return: list of messages
+        """
+        data = sugarsdk.utils.read_file(self._path)
+        try:
+            encoding = tokenize.detect_encoding(io.BytesIO(data).readline)[0]
+            self._source = data.decode(encoding)
+            tree = sugarsdk.utils.parse_file(self._path)
+        except (SyntaxError, UnicodeDecodeError, ValueError):
+            tree = None
+
+        if tree is not None:
+            lines = sugarsdk.linting.split_lines(self._source)
+            self._collect_pragmas(lines)
+            self._check_lines(lines)
+            self._check_docstring_newlines(tree, ast.get_docstring(tree, clean=False), "")
+            self._visit(tree, [])
+
+        return self.messages
+
+
+class PEP287FastCheck:
+    """
+    PEP287 reStructuredText docstring checks of one function.
+    """
+    def __init__(self, checker, node, doc, obj):
+        self._checker = checker
+        self._node = node
+        self._doc = doc
+        self._obj = obj
+
+    def add_message(self, msgid, args):
+        """
+        Add a message on the function node.
+
+        :param msgid: message id
+        :param args: message arguments
+        :return: None
+        """
+        self._checker.add_message(msgid, line=self._node.lineno, column=self._node.col_offset,
+                                  obj=self._obj, args=args)
+
+    def _get_doc_params(self):
+        """
+        Get documentation parameters.
+
+        :return: map of parameter names to their description
+        """
+        params = {}
+        for line in self._doc.split(os.linesep):
+            line = line.strip()
+            if line.startswith(":param "):
+                tokens = re.sub(r"\s+", " ", line).split(" ", 2)
+                _, arg, doc = tokens + ["" for _ in range(3 - len(tokens))]
+                params[arg.strip(":")] = doc
+            if line.startswith(":return"):
+                ret = re.sub(r"\s+", " ", line).split(" ", 1)
+                params["return"] = (ret + ['' for _ in range(2 - len(ret))])[-1]
+        return params
+
+    def _check_explanation_block(self):
+        """
+        Docstring should contain explanation block.
+
+        :return: None
+        """
+        docmap = []
+        kw_ident = -1
+        for idx, line in enumerate(self._doc.rstrip().split(os.linesep)):
+            if not idx:
+                continue
+            s_line = line.strip()
+            ident = len([True for elm in line.split(" ") if not bool(elm)])
+            if not s_line:
+                docmap.append("-")
+            elif s_line.startswith(":") and s_line.split(" ", 1)[0].strip(":") in PEP287_KEYWORDS:
+                docmap.append(":")
+                kw_ident = max(ident, kw_ident)
+            else:
+                docmap.append(":" if kw_ident > -1 and ident > kw_ident else "#")
+        docmap = "".join(docmap)
+
+        if "#:" in docmap or "--:" in docmap:
+            self.add_message("E8019", (self._node.name,))
+        if "#" not in docmap:
+            self.add_message("E8018", (self._node.name,))
+        if not (docmap.strip(":") + ":").endswith("-:"):
+            self.add_message("E8020", (self._node.name,))
+
+    def _compare_signature(self, d_pars):
+        """
+        Find out what is missing in the documentation.
+
+        :param d_pars: documentation parameters
+        :return: None
+        """
+        n_args = self._node.args
+        name = self._node.name
+        signature_names = []
+        if n_args.vararg:
+            signature_names.append(n_args.vararg.arg)
+            if n_args.vararg.arg not in d_pars:
+                self.add_message("E8012", (name,))
+        if n_args.kwarg:
+            signature_names.append(n_args.kwarg.arg)
+            if n_args.kwarg.arg not in d_pars:
+                self.add_message("E8014", (name,))
+
+        for idx, arg in enumerate(n_args.args):
+            signature_names.append(arg.arg)
+            if idx == 0 and arg.arg in ["cls", "self"] or arg.arg.startswith("_"):
+                continue
+            if arg.arg not in d_pars:
+                self.add_message("E8016", (arg.arg, name))
+            elif not d_pars[arg.arg]:
+                self.add_message("E8015", (arg.arg, name))
+
+        for arg in d_pars:
+            if arg not in signature_names and arg not in ["return"]:
+                self.add_message("E8017", (arg, name))
+
+        if "return" not in d_pars:
+            self.add_message("E8010", (name,))
+        elif not d_pars["return"]:
+            self.add_message("E8011", (name,))
+
+    def _what_raises(self, node, raises):
+        """
+        Collect explicitly raised exception class names.
+
+        :param node: ast node
+        :param raises: list to collect to
+        :return: list of exception names
+        """
+        for element in iter_statements(node):
+            if isinstance(element, ast.Raise):
+                if isinstance(element.exc, ast.Name) or (element.exc is None and element.cause is None):
+                    raises.append("-")
+                elif isinstance(element.exc, ast.Call) and isinstance(element.exc.func, ast.Name):
+                    raises.append(element.exc.func.id)
+                elif isinstance(element.exc, ast.Call) and isinstance(element.exc.func, ast.Attribute):
+                    raises.append(element.exc.func.attr)
+                else:
+                    raises.append("undetected exception")
+            else:
+                self._what_raises(element, raises)
+        return raises
+
+    def _check_raises(self):
+        """
+        Find out if a function raises something but
+        is not documents that or vice versa.
+
+        :return: None
+        """
+        exceptions = list(set(self._what_raises(self._node, [])))
+        documented = 0
+        lines = [line.strip() for line in self._doc.strip().split(os.linesep)]
+        for line in lines:
+            if line.startswith(":raises "):
+                exc_name = line.split(" ", 1)[-1].split(" ", 1)
+                if len(exc_name) == 1:
+                    self.add_message("E8024", ('"{}"'.format(exc_name[0].replace(":", "")),))
+                elif not exc_name[0].endswith(":"):
+                    self.add_message("E8025", ('"{}"'.format(exc_name[0]),))
+        for line in lines:
+            if line.startswith(":rais"):
+                keyword = line.split(" ", 1)[0]
+                if keyword != ":raises":
+                    self.add_message("E8026", (keyword, self._node.name))
+                exc_name = line.replace(":raises ", ":raise ").split(" ", 1)[-1].replace(":", "").split(" ")[0]
+                if exc_name not in exceptions and "-" not in exceptions:
+                    self.add_message("E8023", (exc_name,))
+                else:
+                    documented += 1
+                    if exc_name in exceptions:
+                        exceptions.pop(exceptions.index(exc_name))
+        for exc_name in exceptions:
+            if exc_name.startswith("current exception") and documented or exc_name == "-":
+                continue
+            if not exc_name.startswith("current"):
+                exc_name = '"{}"'.format(exc_name)
+            self.add_message("E8022", (exc_name,))
+        if len([skp for skp in exceptions if skp == "-"]) > documented:
+            self.add_message("E8022", ("an exception in the function '{}'".format(self._node.name),))
+
+    def check(self):
+        """
+        Run all PEP287 checks.
+
+        :return: None
+        """
+        if not self._node.name.startswith("__") and self._doc is not None:
+            self._check_raises()
+
+        if not self._node.name.startswith("_") and self._doc:
+            if len(self._doc.split("\t")) > 1:
+                self.add_message("E8021", (self._node.name,))
+            self._check_explanation_block()
+            self._compare_signature(self._get_doc_params())
+
+
+def check_file(path, disabled=()):
+    """
+    Run fast checks on one file.
+
+    :param path: path to the Python file
+    :param disabled: message ids to skip
+    :return: list of messages
+    """
+    return FastFileChecker(path, disabled=disabled).check()
+
+
+def check_files(files, disabled=(), jobs=None):
+    """
+    Run fast checks on many files in a process pool.
+
+    :param files: list of file paths
+    :param disabled: message ids to skip
+    :param jobs: number of worker processes. Default: number of CPUs
+    :return: list of messages
+    """
+    jobs = jobs or os.cpu_count() or 1
+    messages = []
+    if jobs == 1 or len(files) < 64:
+        for path in files:
+            messages.extend(check_file(path, disabled))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            chunksize = max(1, len(files) // (jobs * 4))
+            for f_messages in executor.map(check_file, files, [frozenset(disabled)] * len(files),
+                                           chunksize=chunksize):
+                messages.extend(f_messages)
+    return messages
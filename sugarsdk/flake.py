@@ -0,0 +1,177 @@
+# coding: utf-8
+"""
+Flake8 runner.
+
+Runs flake8 and colorifies its output line by line, as it arrives.
+Optionally keeps per-file results in the cache, so only changed
+files are checked again.
+"""
+import os
+import sys
+import fnmatch
+import subprocess
+
+import colored
+
+import sugarsdk.utils
+from sugarsdk.cache import ResultCache
+from sugarsdk.options import FLAKE_IGNORED, FLAKE_EXCLUDE
+
+
+class FlakeRunner:
+    """
+    Flake8 runner with streaming colored output.
+    """
+    IGNORED = FLAKE_IGNORED
+    EXCLUDE = FLAKE_EXCLUDE
+
+    CONFIG_FILES = ["setup.cfg", "tox.ini", ".flake8"]
+    FAILED = 2  # Exit code, when flake8 cannot run
+
+    def __init__(self, args):
+        self._cli_args = args
+        self._ignored = args.ignore.split(",") if args.ignore else self.IGNORED
+        self._exclude = args.exclude.split(",") if args.exclude else self.EXCLUDE
+        self._cache = ResultCache("flake") if args.cache else None
+        self.errors = 0
+
+    def _get_command(self, paths):
+        """
+        Get flake8 command line.
+
+        :param paths: paths to check
+        :return: list of arguments
+        """
+        cmd = ["flake8", "--ignore", ",".join(self._ignored), "--exclude", ",".join(self._exclude)]
+        if self._cli_args.jobs:
+            cmd.extend(["-j", str(self._cli_args.jobs)])
+        return cmd + paths
+
+    def _is_excluded(self, path):
+        """
+        Check if path is excluded (the same way as flake8 does).
+
+        :param path: path to the file or directory
+        :return: bool
+        """
+        excluded = False
+        for pattern in self._exclude:
+            if fnmatch.fnmatch(os.path.basename(path), pattern) or fnmatch.fnmatch(os.path.abspath(path), pattern):
+                excluded = True
+                break
+        return excluded
+
+    def _get_files(self):
+        """
+        Expand target paths into the list of Python files.
+
+        :return: sorted list of file paths
+        """
+        files = set()
+        for target in self._cli_args.paths:
+            if os.path.isdir(target):
+                for root, dirs, fnames in os.walk(target):
+                    dirs[:] = [dname for dname in dirs if not self._is_excluded(os.path.join(root, dname))]
+                    for fname in fnames:
+                        path = os.path.join(root, fname)
+                        if fname.endswith(".py") and not self._is_excluded(path):
+                            files.add(os.path.normpath(path))
+            elif not self._is_excluded(target):
+                files.add(os.path.normpath(target))
+        return sorted(files)
+
+    def _get_cache_keys(self, files):
+        """
+        Get cache keys of the files.
+
+        :param files: list of file paths
+        :return: map of file path to the key
+        """
+        base = sugarsdk.utils.get_digest(",".join(sorted(self._ignored)),
+                                         *[sugarsdk.utils.get_file_digest(cfg) for cfg in self.CONFIG_FILES])
+        return {path: sugarsdk.utils.get_digest(base, sugarsdk.utils.get_file_digest(path)) for path in files}
+
+    def _print_line(self, line):
+        """
+        Print a colorified flake8 line.
+
+        :param line: flake8 output line
+        :return: None
+        """
+        filename, error = (line.split(" ", 1) + [""])[:2]
+        self.errors += 1
+        print("  {o}{f}  {oo}{e}{r}".format(o=colored.fg("yellow"), f=filename, oo=colored.fg("light_red"),
+                                            e=error, r=colored.attr("reset")))
+        sys.stdout.flush()
+
+    def _stream(self, paths):
+        """
+        Run flake8 and print its output as it comes.
+
+        :param paths: paths to check
+        :return: tuple of flake8 exit code and list of output lines
+        """
+        lines = []
+        try:
+            process = subprocess.Popen(self._get_command(paths), stdout=subprocess.PIPE, universal_newlines=True)
+        except OSError as exc:
+            process = None
+            sys.stderr.write("Unable to run flake8: {}{}".format(exc, os.linesep))
+        for line in process.stdout if process is not None else []:
+            line = line.rstrip("\n")
+            if line:
+                lines.append(line)
+                self._print_line(line)
+        if process is not None:
+            process.stdout.close()
+        return (process.wait() if process is not None else self.FAILED), lines
+
+    def _run_cached(self):
+        """
+        Replay cached results and run flake8 only on the changed files.
+
+        :return: exit code
+        """
+        keys = self._get_cache_keys(self._get_files())
+        dirty = []
+        for path in sorted(keys):
+            cached = self._cache.get(keys[path])
+            if cached is None:
+                dirty.append(path)
+            else:
+                for line in cached:
+                    self._print_line(line)
+        ret = 0
+        if dirty:
+            ret, lines = self._stream(dirty)
+            by_path = {}
+            for line in lines:
+                by_path.setdefault(os.path.normpath(line.split(":", 1)[0]), []).append(line)
+            if ret in [0, 1]:
+                for path in dirty:
+                    self._cache.put(keys[path], by_path.get(path, []))
+        return ret or int(bool(self.errors))
+
+    def run(self):
+        """
+        Run Flake8 and colorify output.
+
+        :return: exit code
+        """
+        if self._cache is not None:
+            ret = self._run_cached()
+        else:
+            ret = self._stream(self._cli_args.paths)[0]
+
+        if ret == 0:
+            print("{g}No {gg}PEP8 {g}errors has been found. G'job!{r}".format(g=colored.fg("light_green"),
+                                                                              gg=colored.fg("light_yellow"),
+                                                                              r=colored.attr("reset")))
+        elif self.errors:
+            print("{cc}Sorry, {n} PEP8 errors has been found.{r}".format(n=self.errors,
+                                                                         cc=colored.fg("light_cyan"),
+                                                                         r=colored.attr("reset")))
+        else:
+            print("{cc}Flake8 has failed with the exit code {n}.{r}".format(n=ret, cc=colored.fg("light_red"),
+                                                                            r=colored.attr("reset")))
+        return ret
@@ -7,6 +7,7 @@ and their documentaiton.
 """
 import os
 import json
+import time
 import jinja2
 import textwrap
 
@@ -17,7 +18,9 @@ import sugar.utils.files
 from sugar.components.docman.docrnd import ModDocBase
 from sugar.components.docman.jinfilters import JinjaRstFilters
 from sugar.lib.loader import SugarModuleLoader
-from sugar.lib.outputters.console import ConsoleMessages
+from sugarsdk.reporters import ConsoleReporter
+from sugarsdk.session import get_session
+from sugarsdk.sharding import CostBook, select_shard
 
 
 class ModRSTDoc(ModDocBase):
@@ -25,6 +28,46 @@ class ModRSTDoc(ModDocBase):
     Generate RST documentation.
     """
     filters = JinjaRstFilters()
+    _templates = {}  # Compiled once per process
+
+    @classmethod
+    def get_template(cls, name):
+        """
+        Get compiled documentation template.
+
+        :param name: template name
+        :return: jinja2.Template object
+        """
+        if name not in cls._templates:
+            cls._templates[name] = jinja2.Template(sugarsdk.utils.get_template(name))
+        return cls._templates[name]
+
+    def __init__(self, uri, mod_type=None, docmap=None):
+        """
+        Documentation renderer of the module.
+
+        :param uri: URI of the module
+        :param mod_type: runner or state
+        :param docmap: already loaded documentation map of the module.
+                       If given, the module files are not loaded again.
+        """
+        if docmap is None:
+            ModDocBase.__init__(self, uri, mod_type=mod_type)
+        else:
+            self._mod_uri = uri
+            self._mod_type = mod_type
+            self._docmap = docmap
+
+    @classmethod
+    def from_model(cls, model):
+        """
+        Create documentation renderer from already loaded module model,
+        without loading module files again.
+
+        :param model: ModuleModel object
+        :return: ModRSTDoc object
+        """
+        return cls(model.uri, mod_type=model.mod_type, docmap=model.get_docmap())
 
     def _to_rst_header_table(self, table:str) -> str:
         """
@@ -123,8 +166,8 @@ class ModRSTDoc(ModDocBase):
         :param f_name: function name
         :return: rendered table of the returning data
         """
-        interface = next(iter(self._docmap.get("scheme", {})))
-        data = self._docmap.get("scheme", {}).get(interface, {}).get(f_name, {})
+        interface = next(iter(self._docmap.get("scheme") or {}), None)
+        data = (self._docmap.get("scheme") or {}).get(interface, {}).get(f_name, {})
         return textwrap.indent(json.dumps(data, indent=4, sort_keys=True), "   ") if data else None
 
     def get_function_manual(self, f_name: str) -> str:
@@ -134,7 +177,7 @@ class ModRSTDoc(ModDocBase):
         :param f_name: function name.
         :return: rendered manual data
         """
-        template = sugarsdk.utils.get_template("doc_m_func_{}".format(self._mod_type))
+        template = self.get_template("doc_m_func_{}".format(self._mod_type))
         f_docmap = self._docmap.get("doc", {}).get("tasks", {}).get(f_name, {})
 
         example_descr, cli_example = self._get_cli_example_usage(f_name=f_name)
@@ -152,7 +195,7 @@ class ModRSTDoc(ModDocBase):
             "t_return_data": self._get_return_data_json(f_name=f_name) if self._mod_type == "runner" else None,
         })
 
-        return jinja2.Template(template).render(f_doc=f_doc, len=len)
+        return template.render(f_doc=f_doc, len=len)
 
     def next_func(self):
         """
@@ -171,7 +214,7 @@ class ModRSTDoc(ModDocBase):
         """
 
         doc_header = self._docmap.get("doc", {}).get("module", {})
-        template = sugarsdk.utils.get_template("doc_m_idx_{}".format(self._mod_type))
+        template = self.get_template("doc_m_idx_{}".format(self._mod_type))
         func_list = self._docmap.get("doc", {}).get("tasks")
 
         if func_list:
@@ -181,7 +224,7 @@ class ModRSTDoc(ModDocBase):
                 "version_added": doc_header.get("since_version", "N/A"),
                 "f_docs": ["doc_f_{}_{}".format(self._mod_type[0], _uri.replace(".", "_")) for _uri in func_list],
             })
-            out = jinja2.Template(template).render(m_doc=m_doc, filters=self.filters, len=len)
+            out = template.render(m_doc=m_doc, filters=self.filters, len=len)
         else:
             out = None
 
@@ -192,44 +235,102 @@ class ModuleDocumentationGenerator:
     """
     Module documentaiton generator class.
     """
+    INDEX_NAME = "doc_idx_modbook"
 
-    def __init__(self, args):
+    def __init__(self, args, reporter=None):
         self._args = args
         self.loader = SugarModuleLoader()  # We're not generating anything for the custom modules.
-        self.out = ConsoleMessages()
+        self.session = get_session()
+        self.registry = self.session.registry
+        self.out = reporter or ConsoleReporter()
+        self.files = []
+        self.mod_toc = {"mod_runner": [], "mod_state": []}
+
+    def _get_models(self) -> list:
+        """
+        Load models of all modules.
 
-    def generate(self) -> None:
+        :return: list of ModuleModel objects
+        """
+        models = []
+        for mod_type in ["runner", "state"]:
+            loader = self.loader.runners if mod_type == "runner" else self.loader.states
+            self.registry.refresh(mod_type, loader.root_path)
+            for uri in self.registry.get_uris(mod_type, loader.root_path):
+                models.append(self.session.get_model(uri, mod_type, loader.root_path))
+        return models
+
+    def _write(self, fname, data) -> None:
+        """
+        Write documentation file to the output directory.
+
+        :param fname: file name
+        :param data: content
+        :return: None
+        """
+        with sugar.utils.files.fopen(os.path.join(self._args.out, fname), "w") as doc_h:
+            doc_h.write(data)
+        self.files.append(fname)
+
+    def generate(self, models=None) -> None:
         """
         Generate a documentation.
 
+        :param models: ModuleModel objects to document. Default: all modules.
         :returns: None
         """
-        mod_toc = type("mod_toc", (), {"mod_runner": [], "mod_state": []})
+        if models is None:
+            models = self._get_models()
+        os.makedirs(self._args.out, exist_ok=True)
+
+        shard = getattr(self._args, "shard", None)
+        if shard:
+            costs = CostBook("gendoc", getattr(self._args, "costs", None))
+            models = select_shard(models, shard, costs, key=lambda mdl: "{}:{}".format(mdl.mod_type, mdl.uri))
+
+        changes = getattr(self._args, "changes", None)
+        mod_toc = self.mod_toc
+        measured = {}
         for mod_type in ["runner", "state"]:
             self.out.info("Generating documentation for {} modules", mod_type)
             self.out.info("  - collecting TOC")
-            if mod_type == "runner":
-                loader_map = self.loader.runners.map()
+            type_models = sorted([mdl for mdl in models if mdl.mod_type == mod_type], key=lambda mdl: mdl.uri)
+            if changes is not None and type_models:
+                changed = set(changes.select_modules([mdl.uri for mdl in type_models], type_models[0].root_path))
+                self.out.info("  - {} changed module(s)", len(changed))
             else:
-                loader_map = self.loader.states.map()
+                changed = None
+            for model in type_models:
+                uri = model.uri
+                toc_name = "doc_m_toc_{}_{}".format(mod_type[0], uri.replace(".", "_"))
+                mod_toc["mod_{}".format(mod_type)].append(toc_name)
+                if changed is not None and uri not in changed:
+                    continue  # Documentation of the unchanged module is kept
 
-            for uri in sorted(loader_map.keys()):
+                start = time.perf_counter()
                 self.out.info("  - create module TOC for {}", uri)
-
-                toc_name = "doc_m_toc_{}_{}".format(mod_type[0], uri.replace(".", "_"))
-                getattr(mod_toc, "mod_{}".format(mod_type)).append(toc_name)
-                mod_rst_doc = ModRSTDoc(uri, mod_type=mod_type)
+                mod_rst_doc = ModRSTDoc.from_model(model)
 
                 self.out.info("  - write module TOC ({})", toc_name)
-                with sugar.utils.files.fopen("{}.rst".format(toc_name), "w") as toc_h:
-                    toc_h.write(mod_rst_doc.get_module_toc())
+                self._write("{}.rst".format(toc_name), mod_rst_doc.get_module_toc())
 
                 self.out.info("  - generating module function manuals")
                 for doc_func_fname, doc_func_man in mod_rst_doc.next_func():
                     self.out.info("  - writing function manual for {}".format(doc_func_fname))
-                    with sugar.utils.files.fopen("doc_f_{}_{}.rst".format(mod_type[0], doc_func_fname), "w") as fh_h:
-                        fh_h.write(doc_func_man)
+                    self._write("doc_f_{}_{}.rst".format(mod_type[0], doc_func_fname), doc_func_man)
+                measured["{}:{}".format(mod_type, uri)] = time.perf_counter() - start
+
+        self.write_index(mod_toc)
+        self._write("{}.costs.json".format(self.INDEX_NAME), json.dumps(measured, indent=2, sort_keys=True))
 
-        self.out.info("Write reference TOC ({})", toc_name)
-        with sugar.utils.files.fopen("doc_idx_modbook.rst", "w") as mbh:
-            mbh.write(jinja2.Template(sugarsdk.utils.get_template("doc_modbook")).render(mod_toc=mod_toc, len=len))
+    def write_index(self, mod_toc) -> None:
+        """
+        Write reference TOC and its JSON manifest, which is used to merge the shards.
+
+        :param mod_toc: dictionary of "mod_runner" and "mod_state" TOC names
+        :return: None
+        """
+        self.out.info("Write reference TOC ({})", "{}.rst".format(self.INDEX_NAME))
+        self._write("{}.rst".format(self.INDEX_NAME),
+                    ModRSTDoc.get_template("doc_modbook").render(mod_toc=mod_toc, len=len))
+        self._write("{}.json".format(self.INDEX_NAME), json.dumps(mod_toc, indent=2, sort_keys=True))
@@ -0,0 +1,242 @@
+# coding: utf-8
+"""
+Bulk test certificate generator.
+
+Generates RSA keys and X.509 certificates in-process (with the
+optional "cryptography" package) across a process pool, e.g.
+for hundreds of simulated minions. Certificates are self-signed
+or signed by a local test CA. Pairs, which already exist and are
+valid, are kept.
+"""
+import os
+import datetime
+import concurrent.futures
+
+import sugar.lib.exceptions
+
+from sugar.lib.outputters.console import ConsoleMessages
+
+try:
+    from cryptography import x509
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.x509.oid import NameOID
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa, padding
+    from cryptography.hazmat.primitives.serialization import pkcs12
+except ImportError:
+    x509 = None
+
+CA_NAME = "ca"
+ORGANIZATION = "Sugar Test"
+RENEW_DAYS = 1  # Pairs expiring sooner are regenerated
+
+
+def get_file_names(name, legacy=False):
+    """
+    Get file names of the pair.
+
+    :param name: name of the pair
+    :param legacy: use file names of the old shell script
+    :return: tuple of (key, certificate, PKCS12) file names
+    """
+    if legacy:
+        names = "key.pem", "certificate.pem", "certificate.p12"
+    else:
+        names = "{}.key.pem".format(name), "{}.cert.pem".format(name), "{}.p12".format(name)
+    return names
+
+
+def _not_after(cert):
+    """
+    Get expiration time of the certificate as aware UTC.
+
+    :param cert: certificate
+    :return: datetime
+    """
+    not_after = getattr(cert, "not_valid_after_utc", None)
+    return not_after if not_after is not None else cert.not_valid_after.replace(tzinfo=datetime.timezone.utc)
+
+
+def _load_pair(key_path, cert_path):
+    """
+    Load the key and certificate.
+
+    :param key_path: path to the PEM key
+    :param cert_path: path to the PEM certificate
+    :return: tuple of (key, certificate)
+    """
+    with open(key_path, "rb") as key_h:
+        key = serialization.load_pem_private_key(key_h.read(), password=None, backend=default_backend())
+    with open(cert_path, "rb") as cert_h:
+        cert = x509.load_pem_x509_certificate(cert_h.read(), default_backend())
+    return key, cert
+
+
+def is_valid_pair(key_path, cert_path, ca_cert=None):
+    """
+    Check if the pair exists, matches, is not about to expire
+    and is signed by the CA (or self-signed without CA).
+
+    :param key_path: path to the PEM key
+    :param cert_path: path to the PEM certificate
+    :param ca_cert: CA certificate or None
+    :return: bool
+    """
+    valid = os.path.exists(key_path) and os.path.exists(cert_path)
+    if valid:
+        try:
+            key, cert = _load_pair(key_path, cert_path)
+            pub_format = (serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+            issuer = ca_cert or cert
+            valid = (key.public_key().public_bytes(*pub_format) == cert.public_key().public_bytes(*pub_format)
+                     and _not_after(cert) >= (datetime.datetime.now(datetime.timezone.utc)
+                                              + datetime.timedelta(days=RENEW_DAYS))
+                     and cert.issuer == issuer.subject)
+            if valid:
+                issuer.public_key().verify(cert.signature, cert.tbs_certificate_bytes, padding.PKCS1v15(),
+                                           cert.signature_hash_algorithm)
+        except (ValueError, InvalidSignature, OSError):
+            valid = False
+    return valid
+
+
+def _write(path, data):
+    """
+    Write file atomically, keys readable only by the owner.
+
+    :param path: file path
+    :param data: bytes
+    :return: None
+    """
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as out_h:
+        out_h.write(data)
+    os.replace(tmp_path, path)
+
+
+def make_pair(name, key_size=2048, days=365, ca_key=None, ca_cert=None, is_ca=False):
+    """
+    Generate a key and a certificate.
+
+    :param name: common name
+    :param key_size: RSA key size
+    :param days: validity days
+    :param ca_key: CA key or None for the self-signed certificate
+    :param ca_cert: CA certificate or None for the self-signed certificate
+    :param is_ca: certificate is of a CA
+    :return: tuple of (key, certificate)
+    """
+    key = rsa.generate_private_key(public_exponent=65537, key_size=key_size, backend=default_backend())
+    subject = x509.Name([x509.NameAttribute(NameOID.ORGANIZATION_NAME, ORGANIZATION),
+                         x509.NameAttribute(NameOID.COMMON_NAME, name)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    builder = (x509.CertificateBuilder()
+               .subject_name(subject)
+               .issuer_name(ca_cert.subject if ca_cert is not None else subject)
+               .public_key(key.public_key())
+               .serial_number(x509.random_serial_number())
+               .not_valid_before(now - datetime.timedelta(minutes=5))
+               .not_valid_after(now + datetime.timedelta(days=days))
+               .add_extension(x509.BasicConstraints(ca=is_ca, path_length=None), critical=True))
+    if not is_ca:
+        builder = builder.add_extension(x509.SubjectAlternativeName([x509.DNSName(name)]), critical=False)
+    cert = builder.sign(ca_key if ca_key is not None else key, hashes.SHA256(), default_backend())
+    return key, cert
+
+
+def generate_pair(out, name, key_size=2048, days=365, ca_paths=None, p12=True, password=None, legacy=False):
+    """
+    Generate a pair, unless it exists and is valid.
+    Runs in the pool workers, so everything is passed by paths.
+
+    :param out: output directory
+    :param name: name of the pair (common name of the certificate)
+    :param key_size: RSA key size
+    :param days: validity days
+    :param ca_paths: tuple of CA (key, certificate) paths or None for the self-signed certificate
+    :param p12: also write PKCS12 bundle
+    :param password: PKCS12 password or None
+    :param legacy: use file names of the old shell script
+    :return: tuple of (name, generated)
+    """
+    ca_key, ca_cert = _load_pair(*ca_paths) if ca_paths else (None, None)
+    key_name, cert_name, p12_name = [os.path.join(out, f_name) for f_name in get_file_names(name, legacy=legacy)]
+    generated = not is_valid_pair(key_name, cert_name, ca_cert=ca_cert) or bool(p12 and not os.path.exists(p12_name))
+    if generated:
+        key, cert = make_pair(name, key_size=key_size, days=days, ca_key=ca_key, ca_cert=ca_cert)
+        _write(key_name, key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL,
+                                           serialization.NoEncryption()))
+        _write(cert_name, cert.public_bytes(serialization.Encoding.PEM))
+        if p12:
+            encryption = (serialization.BestAvailableEncryption(password.encode("utf-8")) if password
+                          else serialization.NoEncryption())
+            _write(p12_name, pkcs12.serialize_key_and_certificates(name.encode("utf-8"), key, cert,
+                                                                   [ca_cert] if ca_cert is not None else None,
+                                                                   encryption))
+    return name, generated
+
+
+class CertificateGenerator:
+    """
+    Generates test certificates in bulk.
+    """
+    def __init__(self, args):
+        if x509 is None:
+            raise sugar.lib.exceptions.SugarException("Certificate generation requires 'cryptography' package.")
+        self._cli_args = args
+        self._console = ConsoleMessages()
+
+    def get_names(self):
+        """
+        Get names of the pairs.
+
+        :return: list of names
+        """
+        width = len(str(self._cli_args.count))
+        names = [self._cli_args.name]
+        if self._cli_args.count:
+            names = ["{}-{}".format(self._cli_args.name, str(idx).zfill(width))
+                     for idx in range(1, self._cli_args.count + 1)]
+        return names
+
+    def get_ca(self):
+        """
+        Get the test CA, generate it if missing or invalid.
+
+        :return: tuple of CA (key, certificate) paths
+        """
+        key_path, cert_path = [os.path.join(self._cli_args.out, f_name) for f_name in get_file_names(CA_NAME)[:2]]
+        if not is_valid_pair(key_path, cert_path):
+            self._console.info("Generating test CA")
+            key, cert = make_pair("{} CA".format(ORGANIZATION), key_size=self._cli_args.bits,
+                                  days=self._cli_args.days, is_ca=True)
+            _write(key_path, key.private_bytes(serialization.Encoding.PEM,
+                                               serialization.PrivateFormat.TraditionalOpenSSL,
+                                               serialization.NoEncryption()))
+            _write(cert_path, cert.public_bytes(serialization.Encoding.PEM))
+        return key_path, cert_path
+
+    def generate(self):
+        """
+        Generate all pairs across the process pool.
+
+        :return: tuple of (generated, skipped) counts
+        """
+        os.makedirs(self._cli_args.out, exist_ok=True)
+        ca_paths = self.get_ca() if self._cli_args.ca else None
+        names = self.get_names()
+        legacy = not self._cli_args.count
+        generated = skipped = 0
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self._cli_args.jobs or None) as pool:
+            futures = [pool.submit(generate_pair, self._cli_args.out, name, key_size=self._cli_args.bits,
+                                   days=self._cli_args.days, ca_paths=ca_paths, p12=not self._cli_args.no_p12,
+                                   password=self._cli_args.password, legacy=legacy) for name in names]
+            for future in concurrent.futures.as_completed(futures):
+                if future.result()[1]:
+                    generated += 1
+                else:
+                    skipped += 1
+        self._console.info("Generated {} pair(s), kept {} valid pair(s) in '{}'", generated, skipped,
+                           os.path.abspath(self._cli_args.out))
+        return generated, skipped
@@ -0,0 +1,137 @@
+# coding: utf-8
+"""
+Git-aware changed-only mode.
+
+Maps files, changed since a git reference (or staged for
+a commit), to the files to lint and to the module URIs to
+validate and document. A module is affected if any of its
+files has changed or if its sources import (transitively)
+a changed file, e.g. a shared library module. Cython (.pyx)
+sources are followed as well. Failures of git are raised
+as ValueError.
+"""
+import os
+import subprocess
+
+import sugarsdk.lint
+
+from sugarsdk.registry import IMPL_EXTENSIONS
+
+
+def _git(cwd, *args):
+    """
+    Run git command.
+
+    :param cwd: directory inside the work tree
+    :param args: git arguments
+    :raises ValueError: if git fails
+    :return: output
+    """
+    try:
+        return subprocess.check_output(["git"] + list(args), cwd=cwd, stderr=subprocess.PIPE,
+                                       universal_newlines=True)
+    except (OSError, subprocess.CalledProcessError) as exc:
+        raise ValueError("git {} failed in '{}': {}".format(
+            " ".join(args), cwd, (getattr(exc, "stderr", None) or str(exc)).strip()))
+
+
+class ChangeSet:
+    """
+    Files, changed since the reference or staged.
+    """
+    def __init__(self, since=None, staged=False):
+        self.since = since
+        self.staged = staged
+        self._files = {}
+        self._tops = {}
+
+    def get_files(self, cwd=None):
+        """
+        Get changed files of the work tree, which contains the directory.
+        Deleted files are included; untracked files count as changed
+        since the reference.
+
+        :param cwd: directory inside the work tree. Default: current directory.
+        :return: set of real paths
+        """
+        cwd = os.path.realpath(cwd or os.getcwd())
+        if cwd not in self._tops:
+            self._tops[cwd] = os.path.realpath(_git(cwd, "rev-parse", "--show-toplevel").strip())
+        top = self._tops[cwd]
+        if top not in self._files:
+            if self.staged:
+                names = _git(top, "diff", "--cached", "--name-only", "-z").split("\0")
+            else:
+                base = _git(top, "merge-base", self.since, "HEAD").strip()
+                names = (_git(top, "diff", "--name-only", "-z", base).split("\0")
+                         + _git(top, "ls-files", "--others", "--exclude-standard", "-z").split("\0"))
+            self._files[top] = {os.path.realpath(os.path.join(top, name)) for name in names if name}
+        return self._files[top]
+
+    def select_files(self, files):
+        """
+        Select files to lint: changed files and the files,
+        which import (transitively) any changed file.
+
+        :param files: list of file paths
+        :return: list of selected file paths
+        """
+        changed = set()
+        for cwd in {os.path.dirname(os.path.abspath(path)) for path in files}:
+            changed |= self.get_files(cwd)
+        selected = []
+        if changed:
+            deps = sugarsdk.lint.get_dependencies(files)
+            selected = [path for path in files
+                        if os.path.realpath(path) in changed or {os.path.realpath(dep) for dep in deps[path]} & changed]
+        return selected
+
+    def select_modules(self, uris, root_path):
+        """
+        Select affected modules.
+
+        :param uris: URIs of the modules
+        :param root_path: root of the modules of that type
+        :return: list of selected URIs
+        """
+        changed = self.get_files(root_path)
+        sources = {}
+        for uri in uris if changed else []:
+            for root, dirs, fnames in os.walk(os.path.realpath(os.path.join(root_path, *uri.split(".")))):
+                dirs[:] = [dname for dname in dirs if dname != "__pycache__"]
+                sources[uri] = sources.get(uri, []) + [os.path.join(root, fname) for fname in fnames
+                                                       if fname.endswith(IMPL_EXTENSIONS)]
+        deps = sugarsdk.lint.get_dependencies([src for srcs in sources.values() for src in srcs])
+
+        selected = []
+        for uri in uris if changed else []:
+            prefix = os.path.join(os.path.realpath(os.path.join(root_path, *uri.split("."))), "")
+            affected = {path for path in changed if path.startswith(prefix)}
+            for src in sources.get(uri, []):
+                affected |= {os.path.realpath(dep) for dep in deps.get(src, [])} & changed
+            if affected:
+                selected.append(uri)
+        return selected
+
+
+def get_commit(cwd=None):
+    """
+    Get the current commit of the work tree.
+
+    :param cwd: directory inside the work tree. Default: current directory.
+    :return: tuple of (commit ID, work tree has uncommitted changes)
+    """
+    cwd = os.path.realpath(cwd or os.getcwd())
+    return (_git(cwd, "rev-parse", "HEAD").strip(),
+            bool(_git(cwd, "status", "--porcelain", "--untracked-files=no").strip()))
+
+
+def resolve_commit(ref, cwd=None):
+    """
+    Resolve the reference (branch, tag, abbreviated ID) to the commit ID.
+
+    :param ref: git reference
+    :param cwd: directory inside the work tree. Default: current directory.
+    :return: commit ID
+    """
+    return _git(os.path.realpath(cwd or os.getcwd()), "rev-parse", "--verify", "{}^{{commit}}".format(ref)).strip()
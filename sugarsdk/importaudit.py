@@ -0,0 +1,216 @@
+# coding: utf-8
+"""
+Import-time and memory audit of the modules.
+
+Each module is imported in an isolated Python subprocess,
+where import time is measured by "-X importtime" and the
+memory by tracemalloc and resident set size.
+"""
+import os
+import sys
+import json
+import subprocess
+
+import terminaltables
+
+import sugar.modules.runners
+import sugar.modules.states
+
+from sugar.lib.loader.virtual import VirtualModuleLoader
+from sugar.lib.loader.simple import SimpleModuleLoader
+from sugar.lib.outputters.console import ConsoleMessages, TitleOutput
+from sugarsdk.registry import IMPL_EXTENSIONS
+
+AUDIT_MARKER = "--sugar-import-audit--"
+AUDIT_SCRIPT = """
+import sys, json, time, importlib, tracemalloc
+import sugar.modules.runners, sugar.modules.states
+
+
+def rss():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * {page}
+    except (IOError, OSError, ValueError, IndexError):
+        return 0
+
+rss_before = rss()
+errors = []
+sys.stderr.write("{marker}\\n")
+sys.stderr.flush()
+tracemalloc.start()
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    try:
+        importlib.import_module(name)
+    except Exception as exc:
+        errors.append("{{}}: {{}}".format(name, exc))
+elapsed = time.perf_counter() - start
+memory = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+print(json.dumps({{"time": elapsed, "memory": memory, "rss": rss() - rss_before, "errors": errors}}))
+"""
+
+
+def parse_importtime(output):
+    """
+    Parse "-X importtime" output after the audit marker.
+
+    :param output: stderr of the Python process
+    :return: list of (name, self_us, cumulative_us, depth, children) tuples in import completion order
+    """
+    entries = []
+    stack = []
+    measured = False
+    for line in output.splitlines():
+        if line.strip() == AUDIT_MARKER:
+            measured = True
+            continue
+        if not measured or not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line.split(":", 1)[-1].split("|", 2)
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        children = []
+        while stack and stack[-1][3] > depth:
+            child = stack.pop()
+            if child[3] == depth + 1:
+                children.insert(0, child)
+        entry = (name.strip(), self_us, cumulative_us, depth, children)
+        stack.append(entry)
+        entries.append(entry)
+    return entries
+
+
+def get_foreign_imports(entries):
+    """
+    Get all non-Sugar imports in the subtrees of the entries, also
+    the transitive ones, so the modules that actually take the time
+    are found, not only the top-level package that imports them.
+
+    :param entries: list of parsed "-X importtime" entries
+    :return: dict of name to (self_us, cumulative_us)
+    """
+    found = {}
+    stack = list(entries)
+    while stack:
+        name, self_us, cumulative_us, _, children = stack.pop()
+        if name != "sugar" and not name.startswith("sugar."):
+            found[name] = (self_us, cumulative_us)
+        stack.extend(children)
+    return found
+
+
+class ImportAuditor:
+    """
+    Import-time and memory auditor of the runner and state modules.
+    """
+    def __init__(self, args):
+        self._cli_args = args
+        self._runner_module_loader = VirtualModuleLoader(sugar.modules.runners)
+        self._state_module_loader = SimpleModuleLoader(sugar.modules.states)
+        self._console = ConsoleMessages()
+        self._title = TitleOutput()
+        self._title.add("import audit", "info")
+        self.results = []
+
+    def _get_import_names(self, mod_type, uri):
+        """
+        Get Python module names to import for the Sugar module.
+
+        :param mod_type: runner or state
+        :param uri: module URI
+        :return: list of dotted names
+        """
+        loader = self._runner_module_loader if mod_type == "runner" else self._state_module_loader
+        package = "sugar.modules.{}s.{}".format(mod_type, uri)
+        mod_path = os.path.join(loader.root_path, *uri.split("."))
+        names = [package]
+        if mod_type == "runner":
+            names.append("{}.interface".format(package))
+            imp_path = os.path.join(mod_path, "_impl")
+            for fname in sorted(os.listdir(imp_path)) if os.path.isdir(imp_path) else []:
+                name = "{}._impl.{}".format(package, os.path.splitext(fname)[0])
+                if fname.endswith(IMPL_EXTENSIONS) and not fname.startswith("_") and name not in names:
+                    names.append(name)
+        elif os.path.exists(os.path.join(mod_path, "impl.py")):
+            names.append("{}.impl".format(package))
+        return names
+
+    def _audit_module(self, mod_type, uri):
+        """
+        Import the module in a subprocess and measure it.
+
+        :param mod_type: runner or state
+        :param uri: module URI
+        :return: result dictionary
+        """
+        names = self._get_import_names(mod_type, uri)
+        script = AUDIT_SCRIPT.format(marker=AUDIT_MARKER, page=os.sysconf("SC_PAGE_SIZE"))
+        process = subprocess.Popen([sys.executable, "-X", "importtime", "-c", script] + names,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        st_out, st_err = process.communicate()
+        try:
+            result = json.loads(st_out.strip().splitlines()[-1])
+        except (ValueError, IndexError):
+            result = {"time": 0, "memory": 0, "rss": 0,
+                      "errors": st_err.strip().splitlines()[-1:] or [
+                          "audit process exited with code {}".format(process.returncode)]}
+
+        heavy = {}
+        for name, _, _, _, children in parse_importtime(st_err):
+            if name.startswith("sugar.modules."):
+                heavy.update(get_foreign_imports(children))
+        heavy = sorted(heavy.items(), key=lambda item: (-item[1][0], item[0]))[:self._cli_args.heavy_top]
+
+        result.update({"uri": uri, "type": mod_type, "heavy": heavy})
+        result["over_budget"] = (result["time"] * 1000 > self._cli_args.budget_time
+                                 or result["memory"] / 1024.0 > self._cli_args.budget_memory)
+        return result
+
+    def audit(self):
+        """
+        Audit all modules (or of the given type only).
+
+        :return: None
+        """
+        sys.stdout.write(self._title.paint("import audit") + os.linesep)
+        for mod_type in [self._cli_args.type] if self._cli_args.type else ["runner", "state"]:
+            loader = self._runner_module_loader if mod_type == "runner" else self._state_module_loader
+            for uri in sorted(loader.map().keys()):
+                self._console.info("Importing {} module '{}'", mod_type, uri)
+                self.results.append(self._audit_module(mod_type, uri))
+
+    def report(self):
+        """
+        Print report and return an exit code.
+
+        :return: 1 if any of the modules failed to import or is over the budget
+        """
+        table_data = [["Module", "Type", "Import, ms", "Traced, KiB", "RSS, KiB", "Budget"]]
+        for res in sorted(self.results, key=lambda item: -item["time"]):
+            table_data.append([res["uri"], res["type"], "{:.1f}".format(res["time"] * 1000),
+                               "{:.1f}".format(res["memory"] / 1024.0), "{:.1f}".format(res["rss"] / 1024.0),
+                               "ERROR" if res["errors"] else "OVER" if res["over_budget"] else "ok"])
+        print(terminaltables.AsciiTable(table_data=table_data).table)
+
+        failed = 0
+        for res in self.results:
+            for error in res["errors"]:
+                failed = 1
+                self._console.error("{} module '{}' failed to import: {}", res["type"].title(), res["uri"], error)
+            if res["over_budget"]:
+                failed = 1
+                self._console.warning("{} module '{}' is over the budget ({} ms, {} KiB). Heavy imports:",
+                                      res["type"].title(), res["uri"], "{:.1f}".format(res["time"] * 1000),
+                                      "{:.1f}".format(res["memory"] / 1024.0))
+                for name, (self_us, cumulative) in res["heavy"]:
+                    self._console.warning("  - {} ({} ms self, {} ms cumulative)", name,
+                                          "{:.1f}".format(self_us / 1000.0), "{:.1f}".format(cumulative / 1000.0))
+        if not failed:
+            self._console.warning("  All modules are within the budget!\n")
+
+        return failed
@@ -0,0 +1,261 @@
+# coding: utf-8
+"""
+Sugar process killer.
+
+Finds Sugar processes by scanning /proc and matching their
+command line and owner, then terminates whole process trees:
+SIGTERM to all of them at once, a bounded wait for all of
+them together, and SIGKILL only to the survivors.
+"""
+import os
+import pwd
+import time
+import signal
+import collections
+
+import sugar.lib.exceptions
+
+from sugar.lib.outputters.console import ConsoleMessages
+
+PROC = "/proc"
+INTERPRETERS = ("python", "pypy")
+INTERPRETER_OPTIONS = "WXQ"  # Short interpreter options, which take a value
+INTERPRETER_LONG_OPTIONS = ("--check-hash-based-pycs",)
+
+ProcessInfo = collections.namedtuple("ProcessInfo", ["pid", "ppid", "uid", "start", "cmdline"])
+
+
+def read_process(pid):
+    """
+    Read process information from /proc.
+
+    :param pid: process ID
+    :return: ProcessInfo or None if the process is gone or is a kernel thread
+    """
+    info = None
+    try:
+        with open(os.path.join(PROC, str(pid), "stat"), "rb") as stat_h:
+            stat = stat_h.read().decode("utf-8", "replace")
+        with open(os.path.join(PROC, str(pid), "cmdline"), "rb") as cmd_h:
+            cmdline = [arg.decode("utf-8", "replace") for arg in cmd_h.read().split(b"\0") if arg]
+        uid = os.stat(os.path.join(PROC, str(pid))).st_uid
+    except OSError:
+        cmdline = None
+    if cmdline:
+        # Command name in the stat can contain spaces and parentheses
+        fields = stat[stat.rfind(")") + 2:].split()
+        if fields[0] != "Z":
+            info = ProcessInfo(pid=pid, ppid=int(fields[1]), uid=uid, start=int(fields[19]), cmdline=cmdline)
+
+    return info
+
+
+def get_processes():
+    """
+    Get all user space processes.
+
+    :return: dict of PID to ProcessInfo
+    """
+    processes = {}
+    for name in os.listdir(PROC):
+        if name.isdigit():
+            info = read_process(int(name))
+            if info is not None:
+                processes[info.pid] = info
+    return processes
+
+
+def _get_script(interpreter, args):
+    """
+    Get script of the interpreter command line, skipping the
+    interpreter options and their values. A module, run with
+    "-m", is the program under the name of its top package.
+
+    :param interpreter: interpreter name
+    :param args: interpreter arguments
+    :return: tuple of (program name, its arguments)
+    """
+    program, idx = None, 0
+    while program is None and idx < len(args):
+        arg, idx = args[idx], idx + 1
+        if arg == "-" or not arg.startswith("-"):
+            program = interpreter if arg == "-" else os.path.basename(arg)
+        elif arg.startswith("--"):
+            idx += int(arg in INTERPRETER_LONG_OPTIONS)
+        else:
+            for pos, opt in enumerate(arg[1:], 2):
+                if opt in "mc" + INTERPRETER_OPTIONS:
+                    value = arg[pos:] or (args[idx] if idx < len(args) else "")
+                    idx += int(not arg[pos:])
+                    if opt in "mc":
+                        program = value.split(".")[0] if opt == "m" else interpreter
+                    break
+
+    return program or interpreter, args[idx:]
+
+
+def get_program(cmdline):
+    """
+    Get program of the command line: the script name,
+    if the program is run by an interpreter.
+
+    :param cmdline: list of arguments
+    :return: tuple of (program name, its arguments)
+    """
+    name = os.path.basename(cmdline[0])
+    args = cmdline[1:]
+    if name.startswith(INTERPRETERS):
+        name, args = _get_script(name, args)
+    return name, args
+
+
+def is_sugar(cmdline, components=None):
+    """
+    Check if the command line is of a Sugar process.
+
+    :param cmdline: list of arguments
+    :param components: components to match (e.g. master, client) or None for all
+    :return: bool
+    """
+    name, args = get_program(cmdline)
+    return name == "sugar" and (not components or bool(args) and args[0] in components)
+
+
+def get_trees(processes, roots):
+    """
+    Get PIDs of the process trees.
+
+    :param processes: dict of PID to ProcessInfo
+    :param roots: PIDs of the tree roots
+    :return: set of PIDs
+    """
+    children = collections.defaultdict(list)
+    for info in processes.values():
+        children[info.ppid].append(info.pid)
+    pids, stack = set(), list(roots)
+    while stack:
+        pid = stack.pop()
+        if pid not in pids:
+            pids.add(pid)
+            stack.extend(children[pid])
+    return pids
+
+
+class SugarKiller:
+    """
+    Terminates Sugar processes.
+    """
+    def __init__(self, args):
+        self._cli_args = args
+        self._console = ConsoleMessages()
+        self._uid = self._get_uid(args.user) if args.user else os.getuid()
+
+    @staticmethod
+    def _get_uid(user):
+        """
+        Get UID of the user.
+
+        :param user: user name
+        :raises SugarException: if there is no such user
+        :return: UID
+        """
+        try:
+            uid = pwd.getpwnam(user).pw_uid
+        except KeyError:
+            raise sugar.lib.exceptions.SugarException("Unknown user '{}'".format(user))
+        return uid
+
+    def _get_own_pids(self, processes):
+        """
+        Get PIDs of this process and its ancestors, which must survive.
+
+        :param processes: dict of PID to ProcessInfo
+        :return: set of PIDs
+        """
+        pids, pid = set(), os.getpid()
+        while pid and pid not in pids:
+            pids.add(pid)
+            pid = processes[pid].ppid if pid in processes else 0
+        return pids
+
+    def find(self):
+        """
+        Find Sugar processes with their trees.
+
+        :return: list of ProcessInfo to terminate
+        """
+        processes = get_processes()
+        own = self._get_own_pids(processes)
+        roots = [info.pid for info in processes.values()
+                 if info.pid not in own and (self._cli_args.all_users or info.uid == self._uid)
+                 and is_sugar(info.cmdline, self._cli_args.component)]
+        return [processes[pid] for pid in sorted(get_trees(processes, roots) - own) if pid in processes]
+
+    def _signal(self, targets, signum):
+        """
+        Signal the processes, which are still the same processes.
+
+        :param targets: list of ProcessInfo
+        :param signum: signal
+        :return: list of signalled ProcessInfo
+        """
+        signalled = []
+        for info in targets:
+            current = read_process(info.pid)
+            if current is None or current.start != info.start:
+                continue  # Gone or PID is reused
+            try:
+                os.kill(info.pid, signum)
+                signalled.append(info)
+            except ProcessLookupError:
+                pass
+            except PermissionError:
+                self._console.error("Not permitted to signal process {}", info.pid)
+        return signalled
+
+    def _wait(self, targets):
+        """
+        Wait for all processes together until the timeout.
+
+        :param targets: list of ProcessInfo
+        :return: list of ProcessInfo, which are still alive
+        """
+        deadline = time.monotonic() + self._cli_args.timeout
+        delay = 0.01
+        while targets:
+            alive = []
+            for info in targets:
+                current = read_process(info.pid)
+                if current is not None and current.start == info.start:
+                    alive.append(info)
+            targets = alive
+            if not targets or time.monotonic() >= deadline:
+                break
+            time.sleep(delay)
+            delay = min(delay * 2, 0.2)
+        return targets
+
+    def kill(self):
+        """
+        Terminate Sugar processes.
+
+        :return: exit code
+        """
+        targets = self.find()
+        survivors = []
+        if not targets:
+            self._console.info("No Sugar processes found")
+        for info in targets:
+            self._console.info("{} {}: {}", "Found" if self._cli_args.dry_run else "Terminating",
+                               info.pid, " ".join(info.cmdline))
+
+        if targets and not self._cli_args.dry_run:
+            survivors = self._wait(self._signal(targets, signal.SIGTERM))
+            if survivors:
+                self._console.warning("{} process(es) did not stop in {}s, killing", len(survivors),
+                                      self._cli_args.timeout)
+                survivors = self._wait(self._signal(survivors, signal.SIGKILL))
+            for info in survivors:
+                self._console.error("Process {} cannot be killed", info.pid)
+
+        return int(bool(survivors))
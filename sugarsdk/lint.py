@@ -0,0 +1,516 @@
+# coding: utf-8
+"""
+Sugar linter front-end.
+
+Runs pylint with the Sugar checkers on PYTHONPATH and keeps
+a persistent per-file cache of the messages. Cached messages
+are replayed for the unchanged files, and pylint runs only on
+the files that are changed (or whose imported modules are changed).
+"""
+import os
+import ast
+import sys
+import json
+import tempfile
+import time
+import threading
+import subprocess
+import concurrent.futures
+
+import sugarsdk.pyx
+import sugarsdk.utils
+import sugarsdk.linting
+import sugarsdk.fastlint
+from sugarsdk.cache import ResultCache
+from sugarsdk.sharding import CostBook, select_shard
+from sugarsdk.linting import CheckerStats, format_checker_stats
+
+
+def get_checkers_digest():
+    """
+    Get digest of the Sugar checkers sources.
+    Any change to the checkers invalidates all cached results.
+
+    :return: hex digest
+    """
+    root = os.path.dirname(sugarsdk.linting.__file__)
+    chunks = []
+    for fname in sorted(os.listdir(root)):
+        if fname.endswith(".py"):
+            chunks.append(fname)
+            chunks.append(sugarsdk.utils.get_file_digest(os.path.join(root, fname)))
+    return sugarsdk.utils.get_digest(*chunks)
+
+
+def get_linter_env():
+    """
+    Get environment for pylint, where Sugar checkers are importable as plugins.
+
+    :return: environment dictionary
+    """
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.pathsep.join([pth for pth in [env.get("PYTHONPATH"),
+                                                         os.path.dirname(sugarsdk.linting.__file__)] if pth])
+    return env
+
+
+def get_imports(path):
+    """
+    Get names of the modules, imported by the file.
+    Cython sources are converted to Python first.
+
+    :param path: path to the Python or Cython file
+    :return: set of dotted module names
+    """
+    _, modname = sugarsdk.utils.get_module_name(path)
+    package = modname if os.path.basename(path) == "__init__.py" else modname.rpartition(".")[0]
+    imports = set()
+    try:
+        if path.endswith(".pyx"):
+            tree = ast.parse(sugarsdk.pyx.pyx_to_py(sugarsdk.utils.read_file(path).decode("utf-8")), filename=path)
+        else:
+            tree = sugarsdk.utils.parse_file(path)
+    except (SyntaxError, ValueError, IOError, OSError):
+        tree = None
+
+    for node in ast.walk(tree) if tree is not None else []:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imports.add(alias.name)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:
+                pkg_parts = package.split(".") if package else []
+                pkg_parts = pkg_parts[:len(pkg_parts) - node.level + 1]
+                base = ".".join([part for part in pkg_parts + [base] if part])
+            imports.add(base)
+            for alias in node.names:
+                imports.add("{}.{}".format(base, alias.name) if base else alias.name)
+    imports.discard("")
+    return imports
+
+
+def resolve_module(modname, roots):
+    """
+    Find the file of the module within the given roots.
+
+    :param modname: dotted module name
+    :param roots: directories to look in
+    :return: path to the file or None if not found
+    """
+    path = None
+    parts = modname.split(".")
+    for root in roots:
+        for candidate in [os.path.join(root, *parts) + ".py", os.path.join(root, *(parts + ["__init__.py"]))]:
+            if os.path.isfile(candidate):
+                path = candidate
+                break
+        if path is not None:
+            break
+    return path
+
+
+def get_dependencies(files):
+    """
+    Get all local modules, that each file depends on (transitively).
+
+    :param files: list of file paths
+    :return: map of file path to the set of the dependency paths
+    """
+    roots = sorted({sugarsdk.utils.get_module_name(path)[0] for path in files})
+    direct = {}
+    pending = [os.path.abspath(path) for path in files]
+    while pending:
+        path = pending.pop()
+        if path in direct:
+            continue
+        direct[path] = set()
+        for modname in get_imports(path):
+            dep_path = resolve_module(modname, roots)
+            if dep_path is not None and os.path.abspath(dep_path) != path:
+                direct[path].add(os.path.abspath(dep_path))
+                pending.append(os.path.abspath(dep_path))
+
+    deps = {}
+    for path in files:
+        closure = set()
+        pending = list(direct[os.path.abspath(path)])
+        while pending:
+            dep_path = pending.pop()
+            if dep_path not in closure:
+                closure.add(dep_path)
+                pending.extend(direct.get(dep_path, []))
+        deps[path] = closure
+    return deps
+
+
+def get_project_root(path):
+    """
+    Get root of the project (the git work tree), which contains the path.
+    Cache keys use paths relative to it, so the clones at different
+    locations share the cached results.
+
+    :param path: path to a file or directory
+    :return: project root or the current directory, if the path is not in a work tree
+    """
+    root = os.path.dirname(os.path.abspath(path))
+    while not os.path.exists(os.path.join(root, ".git")) and os.path.dirname(root) != root:
+        root = os.path.dirname(root)
+    return root if os.path.exists(os.path.join(root, ".git")) else os.getcwd()
+
+
+def write_messages(messages):
+    """
+    Write messages in pylint text format.
+
+    :param messages: list of messages
+    :return: None
+    """
+    out = []
+    module = None
+    for msg in messages:
+        if msg.get("module") != module:
+            module = msg.get("module")
+            out.append("************* Module {}".format(module))
+        out.append("{path}:{line}:{column}: {message-id}: {message} ({symbol})".format(**msg))
+    if out:
+        sys.stdout.write(os.linesep.join(out) + os.linesep)
+        sys.stdout.flush()
+
+
+def sort_messages(messages):
+    """
+    Sort messages in place by path, position and message ID.
+
+    :param messages: list of messages
+    :return: None
+    """
+    messages.sort(key=lambda msg: (msg.get("path", ""), msg.get("line") or 0,
+                                   msg.get("column") or 0, msg.get("message-id", "")))
+
+
+def get_status(messages):
+    """
+    Get pylint-compatible exit code of the messages.
+
+    :param messages: list of messages
+    :return: status bitmask
+    """
+    status = 0
+    for msg in messages:
+        status |= SugarLinter.MSG_STATUS.get(msg.get("type"), 0)
+    return status
+
+
+class SugarLinter:
+    """
+    Front-end to pylint with Sugar checkers and a persistent per-file result cache.
+    """
+    MSG_STATUS = {"fatal": 1, "error": 2, "warning": 4, "refactor": 8, "convention": 16, "usage": 32}
+    PYLINT_ARGS = ["--suggestion-mode=y"]
+
+    def __init__(self, args, extra_args):
+        self._cli_args = args
+        self._targets = []
+        self._pylint_args = []
+        for arg in extra_args:
+            if not arg.startswith("-") and (os.path.isdir(arg) or arg.endswith(".py")):
+                self._targets.append(arg)
+            else:
+                self._pylint_args.append(arg)
+        self._cache = ResultCache("lint", url=getattr(args, "cache_url", None))
+        self._digests = {}
+        self._profile = CheckerStats() if getattr(args, "profile", False) else None
+        self._profile_lock = threading.Lock()
+        self._costs = CostBook("lint", getattr(args, "costs", None))
+        self._measured = {}
+
+    def _get_files(self):
+        """
+        Expand targets into the list of Python files.
+
+        :return: sorted list of file paths
+        """
+        files = set()
+        for target in self._targets:
+            if os.path.isdir(target):
+                for root, dirs, fnames in os.walk(target):
+                    dirs[:] = [dname for dname in dirs if not dname.startswith(".") and dname != "__pycache__"]
+                    for fname in fnames:
+                        if fname.endswith(".py"):
+                            files.add(os.path.normpath(os.path.join(root, fname)))
+            else:
+                files.add(os.path.normpath(target))
+        return sorted(files)
+
+    def _get_rcfile(self):
+        """
+        Find pylintrc in the same order as pylint does.
+
+        :return: path to pylintrc or None
+        """
+        rcfile = None
+        for idx, arg in enumerate(self._pylint_args):
+            if arg.startswith("--rcfile="):
+                rcfile = arg.split("=", 1)[-1]
+            elif arg == "--rcfile" and idx + 1 < len(self._pylint_args):
+                rcfile = self._pylint_args[idx + 1]
+        if rcfile is None:
+            for candidate in ["pylintrc", ".pylintrc", os.environ.get("PYLINTRC"),
+                              os.path.join(os.path.expanduser("~"), ".pylintrc"),
+                              os.path.join(os.path.expanduser("~"), ".config", "pylintrc"), "/etc/pylintrc"]:
+                if candidate and os.path.isfile(candidate):
+                    rcfile = candidate
+                    break
+        return rcfile
+
+    def _get_digest(self, path):
+        """
+        Get memoised digest of the file content.
+
+        :param path: path to the file
+        :return: hex digest
+        """
+        path = os.path.abspath(path)
+        if path not in self._digests:
+            self._digests[path] = sugarsdk.utils.get_file_digest(path)
+        return self._digests[path]
+
+    def _get_cache_keys(self, files):
+        """
+        Get cache keys for each file. The key depends on the file path and content,
+        paths and content of all local modules it imports, pylintrc,
+        pylint arguments and version and the Sugar checkers. Paths are
+        relative to the project root, so the keys are the same in every clone.
+
+        :param files: list of file paths
+        :return: map of file path to the key
+        """
+        try:
+            import pylint
+            pylint_version = getattr(pylint, "__version__", None)
+        except ImportError:
+            pylint_version = None
+        rcfile = self._get_rcfile()
+        base = sugarsdk.utils.get_digest(pylint_version, get_checkers_digest(),
+                                         self._get_digest(rcfile) if rcfile else None,
+                                         " ".join(self.PYLINT_ARGS + self._pylint_args))
+        keys = {}
+        roots = {}
+        for path, deps in get_dependencies(files).items():
+            dir_path = os.path.dirname(os.path.abspath(path))
+            root = roots[dir_path] = roots.get(dir_path) or get_project_root(path)
+            chunks = [base, os.path.relpath(os.path.abspath(path), root), self._get_digest(path)]
+            for dep_path in sorted(deps):
+                chunks.extend([os.path.relpath(dep_path, root), self._get_digest(dep_path)])
+            keys[path] = sugarsdk.utils.get_digest(*chunks)
+        return keys
+
+    def _run_pylint(self, files):
+        """
+        Run pylint on the files.
+
+        :param files: list of file paths
+        :return: list of messages or None if pylint failed to run
+        """
+        cmd = ["pylint"] + self.PYLINT_ARGS + self._pylint_args + ["--output-format=json"]
+        env = get_linter_env()
+        if self._profile is not None:
+            fd, env["SUGAR_LINT_PROFILE"] = tempfile.mkstemp(prefix="sugar-lint-", suffix=".json")
+            os.close(fd)
+            cmd.append("--load-plugins=checker_profiler")
+        messages = None
+        try:
+            process = subprocess.Popen(cmd + files, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+            st_out, st_err = process.communicate()
+        except OSError as exc:
+            process = None
+            sys.stderr.write("Unable to run pylint: {}{}".format(exc, os.linesep))
+        if self._profile is not None:
+            self._collect_profile(env["SUGAR_LINT_PROFILE"])
+        if process is not None:
+            st_out = st_out.decode("utf-8").strip()
+            # Usage error, crash or killed: no output is not "no messages"
+            if process.returncode < 0 or process.returncode & self.MSG_STATUS["usage"] or (
+                    not st_out and process.returncode):
+                sys.stderr.write("pylint failed with exit code {}{}".format(process.returncode, os.linesep))
+            else:
+                try:
+                    messages = json.loads(st_out or "[]")
+                except ValueError:
+                    pass
+            if messages is None:
+                sys.stderr.write(st_err.decode("utf-8"))
+        return messages
+
+    def _collect_profile(self, path):
+        """
+        Merge checker statistics, dumped by a pylint run.
+
+        :param path: path to the JSON dump
+        :return: None
+        """
+        try:
+            with open(path) as p_h:
+                stats = CheckerStats(json.load(p_h))
+        except (IOError, OSError, ValueError):
+            stats = None
+        finally:
+            os.unlink(path)
+        if stats is not None:
+            with self._profile_lock:
+                self._profile.merge(stats)
+
+    def _report_profile(self):
+        """
+        Print or dump merged checker statistics.
+
+        :return: None
+        """
+        if self._cli_args.profile_json:
+            with open(self._cli_args.profile_json, "w") as p_h:
+                json.dump(self._profile.to_dict(), p_h, indent=2, sort_keys=True)
+        else:
+            sys.stderr.write(format_checker_stats(self._profile.to_dict(), top=self._cli_args.profile_top))
+
+    def _get_shards(self, files, jobs):
+        """
+        Split files into shards of about the same total size.
+
+        :param files: list of file paths
+        :param jobs: number of shards
+        :return: list of file lists
+        """
+        shards = [[] for _ in range(max(1, min(jobs, len(files))))]
+        loads = [0 for _ in shards]
+        for path in sorted(files, key=lambda pth: (-os.path.getsize(pth), pth)):
+            idx = loads.index(min(loads))
+            shards[idx].append(path)
+            loads[idx] += os.path.getsize(path)
+        return [sorted(shard) for shard in shards]
+
+    def _run_parallel(self, files):
+        """
+        Run pylint on the file shards in parallel worker processes.
+        Cross-module checks (e.g. duplicate-code) see only their shard.
+
+        :param files: list of file paths
+        :return: list of messages or None if any of the workers failed
+        """
+        shards = self._get_shards(files, self._cli_args.jobs or 1)
+        if len(shards) == 1:
+            messages = self._run_pylint(shards[0])
+        else:
+            messages = []
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(shards)) as executor:
+                for shard_messages in executor.map(self._run_pylint, shards):
+                    if shard_messages is None:
+                        messages = None
+                    elif messages is not None:
+                        messages.extend(shard_messages)
+        return messages
+
+    def _measure(self, files, elapsed):
+        """
+        Split elapsed time of the batch across the files by their size, for the shard balancing.
+
+        :param files: list of linted file paths
+        :param elapsed: time of the batch in seconds
+        :return: None
+        """
+        sizes = {path: os.path.getsize(path) if os.path.exists(path) else 0 for path in files}
+        total = sum(sizes.values()) or 1
+        for path, size in sizes.items():
+            self._measured[path] = elapsed * size / total
+
+    def _lint_cached(self, files):
+        """
+        Lint files with pylint, replaying cached messages for unchanged files.
+
+        :param files: list of file paths
+        :return: list of messages or None if pylint failed
+        """
+        use_cache = not self._cli_args.no_cache and self._profile is None
+        if self._cli_args.clear_cache:
+            self._cache.clear()
+        keys = self._get_cache_keys(files) if use_cache else {}
+
+        messages = []
+        dirty = []
+        for path in files:
+            cached = self._cache.get(keys[path]) if use_cache else None
+            if cached is None:
+                dirty.append(path)
+            else:
+                for msg in cached:  # Entry may come from a clone at another location
+                    msg["path"] = path
+                    if "abspath" in msg:
+                        msg["abspath"] = os.path.abspath(path)
+                messages.extend(cached)
+
+        if dirty:
+            start = time.perf_counter()
+            fresh = self._run_parallel(dirty)
+            if fresh is None:
+                messages = None
+            else:
+                self._measure(dirty, time.perf_counter() - start)
+                by_path = {}
+                for msg in fresh:
+                    by_path.setdefault(os.path.abspath(msg.get("path", "")), []).append(msg)
+                for path in dirty if use_cache else []:
+                    f_msgs = by_path.get(os.path.abspath(path), [])
+                    if not [msg for msg in f_msgs if msg.get("type") == "fatal"]:
+                        self._cache.put(keys[path], f_msgs)
+                messages.extend(fresh)
+
+        return messages
+
+    def lint(self):
+        """
+        Lint the targets.
+
+        :return: pylint-compatible exit code
+        """
+        files = self._get_files()
+        if getattr(self._cli_args, "changes", None) is not None:
+            files = self._cli_args.changes.select_files(files)
+        if getattr(self._cli_args, "shard", None):
+            files = select_shard(files, self._cli_args.shard, self._costs)
+        if not files and not self._targets:
+            try:
+                status = subprocess.call(["pylint"] + self.PYLINT_ARGS + self._pylint_args, env=get_linter_env())
+            except OSError as exc:
+                sys.stderr.write("Unable to run pylint: {}{}".format(exc, os.linesep))
+                status = self.MSG_STATUS["fatal"]
+        else:
+            if self._cli_args.fast:
+                messages = sugarsdk.fastlint.check_files(
+                    files, disabled=sugarsdk.fastlint.get_disabled_messages(self._get_rcfile(), self._pylint_args),
+                    jobs=self._cli_args.jobs)
+            else:
+                messages = self._lint_cached(files)
+            if messages is None:
+                status = self.MSG_STATUS["fatal"]
+            else:
+                self._report(messages)
+                status = get_status(messages)
+
+        return status
+
+    def _report(self, messages):
+        """
+        Print and dump the messages. Measured costs are only dumped:
+        the cost book is recorded by "sugar-sdk merge", so all shards
+        read the same book.
+
+        :param messages: list of messages
+        :return: None
+        """
+        sort_messages(messages)
+        write_messages(messages)
+        if getattr(self._cli_args, "output_json", None):
+            with open(self._cli_args.output_json, "w") as o_h:
+                json.dump({"messages": messages, "costs": self._measured}, o_h)
+        if self._profile is not None:
+            self._report_profile()
@@ -0,0 +1,117 @@
+# coding: utf-8
+"""
+Sugar pylint checkers.
+
+This directory is added to PYTHONPATH by sugar-lint, so every
+checker is loaded by pylint as a plugin. Checkers keep no state
+between the visits and read module source only through the node,
+so they are safe to use in pylint parallel mode.
+"""
+import os
+
+
+def split_lines(source):
+    """
+    Split source into lines only by the line breaks, which Python
+    counts, so the indexes match the line numbers of the nodes
+    (str.splitlines() also splits by form feeds and Unicode separators).
+
+    :param source: source text
+    :return: list of lines
+    """
+    lines = [line[:-1] if line.endswith("\r") else line for line in source.split("\n")]
+    return lines[:-1] if lines and not lines[-1] else lines
+
+
+def get_source_lines(node):
+    """
+    Get source lines of the module node.
+
+    :param node: astroid module node
+    :return: list of lines
+    """
+    with node.stream() as src_h:
+        source = src_h.read().decode(node.file_encoding or "utf-8")
+    return split_lines(source)
+
+
+class CheckerStats:
+    """
+    Accumulated checker timings: calls and wall time
+    per checker method, per message and per file.
+    """
+    TABLES = ["methods", "messages", "files"]
+
+    def __init__(self, data=None):
+        data = data or {}
+        for table in self.TABLES:
+            setattr(self, table, {key: list(val) for key, val in data.get(table, {}).items()})
+
+    @staticmethod
+    def _add(table, key, calls, elapsed):
+        """
+        Add calls to the table.
+
+        :param table: statistics table
+        :param key: key in the table
+        :param calls: number of calls
+        :param elapsed: wall time in seconds
+        :return: None
+        """
+        entry = table.setdefault(key, [0, 0.0])
+        entry[0] += calls
+        entry[1] += elapsed
+
+    def add_call(self, method, path, messages, elapsed):
+        """
+        Account a visit call.
+
+        :param method: "Checker.visit_method" name
+        :param path: path to the file being checked
+        :param messages: message ids emitted during the call
+        :param elapsed: wall time in seconds
+        :return: None
+        """
+        self._add(self.methods, method, 1, elapsed)
+        self._add(self.files, path or "", 1, elapsed)
+        for msgid in messages:
+            self._add(self.messages, msgid, 1, elapsed / len(messages))
+
+    def merge(self, other):
+        """
+        Merge other statistics (e.g. from another worker) into these.
+
+        :param other: CheckerStats object
+        :return: None
+        """
+        for table in self.TABLES:
+            for key, (calls, elapsed) in getattr(other, table).items():
+                self._add(getattr(self, table), key, calls, elapsed)
+
+    def to_dict(self):
+        """
+        Export statistics.
+
+        :return: dict
+        """
+        return {table: getattr(self, table) for table in self.TABLES}
+
+
+def format_checker_stats(stats, top=20):
+    """
+    Format top-N tables of the checker statistics.
+
+    :param stats: statistics dictionary with "methods", "messages" and "files" tables
+    :param top: number of rows in each table
+    :return: formatted text
+    """
+    out = []
+    for title, table in [("Checker methods", "methods"), ("Messages", "messages"), ("Files", "files")]:
+        rows = sorted(stats.get(table, {}).items(), key=lambda item: (-item[1][1], item[0]))[:top]
+        out.append("{} (top {}):".format(title, top))
+        out.append("  {:>10}  {:>10}  {:>10}  {}".format("total, ms", "calls", "per call", "name"))
+        for name, (calls, elapsed) in rows:
+            out.append("  {:>10.2f}  {:>10}  {:>10.3f}  {}".format(elapsed * 1000, calls,
+                                                                   elapsed * 1000 / (calls or 1), name))
+        out.append("")
+    return os.linesep.join(out)
@@ -3,12 +3,12 @@ Backslashes are ugly. Use only when it is only syntactically
 necessary (multiple "with" statement, for example).
 """
 
-import os
-
 from pylint import checkers
 from pylint import interfaces
 from pylint.checkers import utils
 
+from sugarsdk.linting import get_source_lines
+
 
 class BackslashChecker(checkers.BaseChecker):
     """
@@ -34,11 +34,10 @@ class BackslashChecker(checkers.BaseChecker):
         :param node:
         :return:
         """
-        with open(node.file) as mod_fh:
-            for idx, line in enumerate(mod_fh.read().split(os.linesep)):
-                line = line.strip()
-                if line.endswith("\\") and "with " not in line and not line.startswith("#"):
-                    self.add_message("unnecessary-backslash", node=node, line=idx+1)
+        for idx, line in enumerate(get_source_lines(node)):
+            line = line.strip()
+            if line.endswith("\\") and "with " not in line and not line.startswith("#"):
+                self.add_message("unnecessary-backslash", node=node, line=idx+1)
 
 
 def register(linter):
@@ -0,0 +1,114 @@
+"""
+Opt-in profiler of the Sugar checkers.
+
+Wraps every visit_* and leave_* method of every registered Sugar checker
+and accumulates call counts and wall time per checker method, per message
+and per file. Enabled by loading this plugin. When SUGAR_LINT_PROFILE
+environment variable is set, statistics are dumped there as JSON,
+otherwise top SUGAR_LINT_PROFILE_TOP (default 20) entries are printed.
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import functools
+
+from sugarsdk.linting import CheckerStats, format_checker_stats
+
+
+STATS = CheckerStats()
+INSTRUMENTED = set()
+
+
+class _MeasuredMethod:
+    """
+    Checker method, which measures its calls and counts the emitted messages.
+    """
+    def __init__(self, checker, name, method):
+        functools.update_wrapper(self, method)
+        self._checker = checker
+        self._method = method
+        self._label = "{}.{}".format(checker.__class__.__name__, name)
+
+    @staticmethod
+    def _count_message(emitted, add_message, msgid, *args, **kwargs):
+        """
+        Count the message and add it.
+
+        :param emitted: message IDs, emitted by the call
+        :param add_message: original add_message of the checker
+        :param msgid: message ID
+        :return: result of add_message
+        """
+        emitted.append(msgid)
+        return add_message(msgid, *args, **kwargs)
+
+    def __call__(self, node):
+        """
+        Call the method and measure it.
+
+        :param node: visited node
+        :return: result of the method
+        """
+        emitted = []
+        add_message = self._checker.add_message
+        self._checker.add_message = functools.partial(self._count_message, emitted, add_message)
+        start = time.perf_counter()
+        try:
+            ret = self._method(node)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._checker.add_message = add_message
+            STATS.add_call(self._label, getattr(node.root(), "file", None), emitted, elapsed)
+        return ret
+
+
+def instrument(checker):
+    """
+    Instrument visit_* and leave_* methods of a Sugar checker
+    (loaded from this directory). Other checkers are left intact.
+
+    :param checker: checker instance
+    :return: None
+    """
+    mod_path = getattr(sys.modules.get(checker.__class__.__module__), "__file__", None) or ""
+    if (id(checker) not in INSTRUMENTED
+            and os.path.dirname(os.path.abspath(mod_path)) == os.path.dirname(os.path.abspath(__file__))):
+        for name in dir(checker):
+            if name.startswith(("visit_", "leave_")):
+                setattr(checker, name, _MeasuredMethod(checker, name, getattr(checker, name)))
+        INSTRUMENTED.add(id(checker))
+
+
+def dump_stats():
+    """
+    Dump or print statistics at the exit of pylint.
+    Pylint does not open or close checkers without messages,
+    so the statistics are not reported by a checker.
+
+    :return: None
+    """
+    path = os.environ.get("SUGAR_LINT_PROFILE")
+    if path:
+        with open(path, "w") as p_h:
+            json.dump(STATS.to_dict(), p_h)
+    else:
+        sys.stderr.write(format_checker_stats(STATS.to_dict(), top=int(os.environ.get("SUGAR_LINT_PROFILE_TOP", 20))))
+
+
+def register(linter):
+    """
+    Required method to auto register this checker
+    """
+    register_checker = linter.register_checker
+
+    def profiled_register_checker(checker):
+        instrument(checker)
+        return register_checker(checker)
+
+    for checker in linter.get_checkers():
+        instrument(checker)
+    linter.register_checker = profiled_register_checker
+    atexit.register(dump_stats)
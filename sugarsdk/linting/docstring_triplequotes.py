@@ -2,12 +2,12 @@
 Ugly triple-quotes (on the same line)
 """
 
-import os
-
 from pylint import checkers
 from pylint import interfaces
 from pylint.checkers import utils
 
+from sugarsdk.linting import get_source_lines
+
 
 class TripleDoublequotesChecker(checkers.BaseChecker):
     """
@@ -38,10 +38,9 @@ class TripleDoublequotesChecker(checkers.BaseChecker):
         :param node:
         :return:
         """
-        with open(node.file) as mod_fh:
-            for idx, line in enumerate(mod_fh.read().split(os.linesep)):
-                if "'''" in line:
-                    self.add_message("docstring-triple-double-quotes", node=node, line=idx+1)
+        for idx, line in enumerate(get_source_lines(node)):
+            if "'''" in line:
+                self.add_message("docstring-triple-double-quotes", node=node, line=idx+1)
 
 
 def register(linter):
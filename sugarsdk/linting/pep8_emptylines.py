@@ -2,11 +2,11 @@
 PEP8: look for two empty lines between functions, one empty line between methods.
 """
 
-import os
-
 from pylint import checkers
 from pylint import interfaces
 
+from sugarsdk.linting import get_source_lines
+
 
 class PEP8EmptyLinesChecker(checkers.BaseChecker):
     """
@@ -56,21 +56,20 @@ class PEP8EmptyLinesChecker(checkers.BaseChecker):
         """
         index = []
         # Gather map of the source
-        with open(node.file) as mod_fh:
-            for idx, line in enumerate(mod_fh.read().split(os.linesep)):
-                if not line:
-                    index.append("-")
-                elif line.startswith("def "):
-                    index.append("f")
-                elif not line.startswith("def ") and line.strip().startswith("def "):
-                    index.append("m")
-                elif ("'''" in line or '"""' in line or line.endswith("'")
-                      or line.endswith('"') or line.strip().startswith("#")):
-                    index.append("d")
-                elif line.strip().startswith("@"):
-                    index.append("c")
-                else:
-                    index.append("#")
+        for idx, line in enumerate(get_source_lines(node)):
+            if not line:
+                index.append("-")
+            elif line.startswith("def "):
+                index.append("f")
+            elif not line.startswith("def ") and line.strip().startswith("def "):
+                index.append("m")
+            elif ("'''" in line or '"""' in line or line.endswith("'")
+                  or line.endswith('"') or line.strip().startswith("#")):
+                index.append("d")
+            elif line.strip().startswith("@"):
+                index.append("c")
+            else:
+                index.append("#")
 
         for idx, element in enumerate(index):
             if idx < 2:
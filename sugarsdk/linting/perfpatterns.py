@@ -0,0 +1,301 @@
+"""
+Performance anti-patterns in Sugar runner and state modules.
+
+Checks only files within "modules/runners" or "modules/states"
+directories, as these are executed on every task call on a minion.
+"""
+import os
+
+import astroid
+
+from pylint import checkers
+from pylint import interfaces
+from pylint.checkers import utils
+
+LOOP_NODES = (astroid.For, astroid.While, astroid.AsyncFor)
+COMPREHENSION_NODES = (astroid.ListComp, astroid.SetComp, astroid.DictComp, astroid.GeneratorExp)
+SCOPE_NODES = (astroid.FunctionDef, astroid.ClassDef, astroid.Module, astroid.Lambda)
+
+
+def is_sugar_module(node):
+    """
+    Check if node belongs to a runner or state module.
+
+    :param node: any astroid node
+    :return: bool
+    """
+    path = os.path.abspath(node.root().file or "")
+    return any([os.sep.join(["modules", mod_type]) + os.sep in path for mod_type in ["runners", "states"]])
+
+
+def get_call_name(node):
+    """
+    Get dotted name of the called function, e.g. "subprocess.Popen".
+
+    :param node: astroid call node
+    :return: dotted name or None, if it is not a plain name
+    """
+    parts = []
+    func = node.func
+    while isinstance(func, astroid.Attribute):
+        parts.insert(0, func.attrname)
+        func = func.expr
+    if isinstance(func, astroid.Name):
+        parts.insert(0, func.name)
+    else:
+        parts = []
+    return ".".join(parts) or None
+
+
+def in_loop(node):
+    """
+    Check if the node is executed repeatedly by a loop (or a comprehension)
+    within the same function.
+
+    :param node: any astroid node
+    :return: bool
+    """
+    looped = False
+    first_iter = False
+    child, parent = node, node.parent
+    while parent is not None and not isinstance(parent, SCOPE_NODES):
+        if isinstance(parent, LOOP_NODES) and (child in parent.body or
+                                               (isinstance(parent, astroid.While) and child is parent.test)):
+            looped = True
+            break
+        if isinstance(parent, astroid.Comprehension):
+            # The first iterable of a comprehension is evaluated only once
+            first_iter = child is parent.iter and parent is parent.parent.generators[0]
+        elif isinstance(parent, COMPREHENSION_NODES):
+            if not first_iter:
+                looped = True
+                break
+            first_iter = False
+        child, parent = parent, parent.parent
+    return looped
+
+
+class FileOpenInLoopChecker(checkers.BaseChecker):
+    """
+    Opening the same or many files inside a loop costs a syscall pair per iteration.
+    Open once outside the loop, or read everything at once.
+    """
+    __implements__ = interfaces.IAstroidChecker
+
+    name = 'perf-file-open-in-loop'
+    calls = ["open", "io.open", "codecs.open", "fopen", "files.fopen", "sugar.utils.files.fopen"]
+
+    msgs = {
+        'W8101': (
+            "File is opened inside a loop. Consider opening it once outside of the loop.",
+            'perf-file-open-in-loop',
+            'Emitted when open() or fopen() is called inside a loop of a runner or state module.'
+            ),
+        }
+
+    @utils.check_messages('perf-file-open-in-loop')
+    def visit_call(self, node):
+        """
+        Find file opening in loops.
+
+        :param node: call node
+        :return: None
+        """
+        if get_call_name(node) in self.calls and in_loop(node) and is_sugar_module(node):
+            self.add_message("perf-file-open-in-loop", node=node)
+
+
+class StringConcatInLoopChecker(checkers.BaseChecker):
+    """
+    String concatenation with "+=" in a loop copies the whole string on every iteration.
+    Collect parts into a list and join them once.
+    """
+    __implements__ = interfaces.IAstroidChecker
+
+    name = 'perf-string-concat-in-loop'
+
+    msgs = {
+        'W8102': (
+            "String '%s' is concatenated with += inside a loop. Consider collecting parts and \"\".join() them.",
+            'perf-string-concat-in-loop',
+            'Emitted when a string is built with += inside a loop of a runner or state module.'
+            ),
+        }
+
+    def _is_string(self, node):
+        """
+        Check if the expression is syntactically a string.
+
+        :param node: expression node
+        :return: bool
+        """
+        return ((isinstance(node, astroid.Const) and isinstance(node.value, str))
+                or isinstance(node, astroid.JoinedStr)
+                or (isinstance(node, astroid.Call) and isinstance(node.func, astroid.Attribute)
+                    and node.func.attrname == "format" and self._is_string(node.func.expr))
+                or (isinstance(node, astroid.BinOp) and node.op in ["+", "%"] and self._is_string(node.left)))
+
+    def _is_string_name(self, node):
+        """
+        Check if the name is assigned a string anywhere in its scope.
+
+        :param node: AssignName node
+        :return: bool
+        """
+        is_str = False
+        for assign in node.scope().nodes_of_class(astroid.Assign):
+            if self._is_string(assign.value) and [target for target in assign.targets
+                                                  if isinstance(target, astroid.AssignName)
+                                                  and target.name == node.name]:
+                is_str = True
+                break
+        return is_str
+
+    @utils.check_messages('perf-string-concat-in-loop')
+    def visit_augassign(self, node):
+        """
+        Find string concatenation in loops.
+
+        :param node: augmented assignment node
+        :return: None
+        """
+        if (node.op == "+=" and isinstance(node.target, astroid.AssignName) and in_loop(node)
+                and is_sugar_module(node) and (self._is_string(node.value) or self._is_string_name(node.target))):
+            self.add_message("perf-string-concat-in-loop", node=node, args=(node.target.name,))
+
+
+class ReflectionInLoopChecker(checkers.BaseChecker):
+    """
+    Reflection is slow: dir() builds and sorts a list of all attributes,
+    getattr() and friends with computed names defeat any caching.
+    """
+    __implements__ = interfaces.IAstroidChecker
+
+    name = 'perf-reflection-in-loop'
+    calls = ["getattr", "setattr", "hasattr", "delattr"]
+
+    msgs = {
+        'W8103': (
+            "Reflection with %s() on a hot path. Consider explicit attribute access or a lookup table.",
+            'perf-reflection-in-loop',
+            'Emitted when dir() is called in a function or getattr() with a computed name '
+            'is called inside a loop of a runner or state module.'
+            ),
+        }
+
+    @utils.check_messages('perf-reflection-in-loop')
+    def visit_call(self, node):
+        """
+        Find reflection calls.
+
+        :param node: call node
+        :return: None
+        """
+        call_name = get_call_name(node)
+        if call_name == "dir" and isinstance(node.scope(), astroid.FunctionDef) and is_sugar_module(node):
+            self.add_message("perf-reflection-in-loop", node=node, args=(call_name,))
+        elif (call_name in self.calls and len(node.args) > 1 and not isinstance(node.args[1], astroid.Const)
+              and in_loop(node) and is_sugar_module(node)):
+            self.add_message("perf-reflection-in-loop", node=node, args=(call_name,))
+
+
+class RegexCompilePerCallChecker(checkers.BaseChecker):
+    """
+    Regular expression compiled inside a function is compiled (or looked up
+    in the limited re cache) on every call. Compile it once at module level.
+    """
+    __implements__ = interfaces.IAstroidChecker
+
+    name = 'perf-regex-compile-per-call'
+
+    msgs = {
+        'W8104': (
+            "Regular expression is compiled on every call. Consider compiling it once at module level.",
+            'perf-regex-compile-per-call',
+            'Emitted when re.compile() is called inside a function of a runner or state module.'
+            ),
+        }
+
+    @utils.check_messages('perf-regex-compile-per-call')
+    def visit_call(self, node):
+        """
+        Find regex compilation in functions.
+
+        :param node: call node
+        :return: None
+        """
+        if (get_call_name(node) == "re.compile" and isinstance(node.scope(), astroid.FunctionDef)
+                and is_sugar_module(node)):
+            self.add_message("perf-regex-compile-per-call", node=node)
+
+
+class SubprocessInLoopChecker(checkers.BaseChecker):
+    """
+    Spawning a process per loop iteration costs a fork/exec each time.
+    Batch the work into one call or use Python API instead.
+    """
+    __implements__ = interfaces.IAstroidChecker
+
+    name = 'perf-subprocess-in-loop'
+    calls = ["subprocess.Popen", "subprocess.call", "subprocess.check_call", "subprocess.check_output",
+             "subprocess.run", "subprocess.getoutput", "subprocess.getstatusoutput", "os.system", "os.popen",
+             "Popen", "check_call", "check_output"]
+
+    msgs = {
+        'W8105': (
+            "Process is spawned with %s() inside a loop. Consider batching into one call.",
+            'perf-subprocess-in-loop',
+            'Emitted when a subprocess is started inside a loop of a runner or state module.'
+            ),
+        }
+
+    @utils.check_messages('perf-subprocess-in-loop')
+    def visit_call(self, node):
+        """
+        Find process spawning in loops.
+
+        :param node: call node
+        :return: None
+        """
+        call_name = get_call_name(node)
+        if call_name in self.calls and in_loop(node) and is_sugar_module(node):
+            self.add_message("perf-subprocess-in-loop", node=node, args=(call_name,))
+
+
+class ImplSlotsChecker(checkers.BaseChecker):
+    """
+    Runner implementations are instantiated and accessed on every call.
+    Classes with __slots__ are smaller and have faster attribute access.
+    """
+    __implements__ = interfaces.IAstroidChecker
+
+    name = 'perf-impl-no-slots'
+
+    msgs = {
+        'W8106': (
+            "Class '%s' in the module implementation has no __slots__.",
+            'perf-impl-no-slots',
+            'Emitted when a class in "_impl" of a runner or state module does not define __slots__.'
+            ),
+        }
+
+    @utils.check_messages('perf-impl-no-slots')
+    def visit_classdef(self, node):
+        """
+        Find classes without __slots__ in implementations.
+
+        :param node: class node
+        :return: None
+        """
+        if ("_impl" in os.path.abspath(node.root().file or "").split(os.sep) and is_sugar_module(node)
+                and "__slots__" not in node.locals):
+            self.add_message("perf-impl-no-slots", node=node, args=(node.name,))
+
+
+def register(linter):
+    """
+    Required method to auto register this checker
+    """
+    for checker_class in [FileOpenInLoopChecker, StringConcatInLoopChecker, ReflectionInLoopChecker,
+                          RegexCompilePerCallChecker, SubprocessInLoopChecker, ImplSlotsChecker]:
+        linter.register_checker(checker_class(linter))
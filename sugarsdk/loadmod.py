@@ -0,0 +1,298 @@
+# coding: utf-8
+"""
+Runner module load tester.
+
+Drives the tasks of a runner module from many concurrent
+workers (threads, processes or asyncio coroutines) for a
+fixed duration at every concurrency level, with the arguments
+from its examples (or a local fixture file), and measures
+throughput, tail latency and growth of open files and memory.
+"""
+import os
+import time
+import asyncio
+import resource
+import itertools
+import threading
+import multiprocessing
+import concurrent.futures
+
+import terminaltables
+
+from sugar.lib.outputters.console import ConsoleMessages
+from sugarsdk.profmod import percentile
+from sugarsdk.tasks import RunnerTasks
+
+BARRIER_TIMEOUT = 60
+
+
+def get_fd_count():
+    """
+    Get number of open file descriptors of the current process.
+
+    :return: number of descriptors or None if unknown
+    """
+    try:
+        count = len(os.listdir("/proc/self/fd"))
+    except OSError:
+        count = None
+    return count
+
+
+def get_rss():
+    """
+    Get resident memory of the current process.
+
+    :return: bytes
+    """
+    try:
+        with open("/proc/self/statm") as stat_h:
+            rss = int(stat_h.read().split()[1]) * resource.getpagesize()
+    except (OSError, IndexError, ValueError):
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return rss
+
+
+def _run_calls(calls, deadline, offset=0):
+    """
+    Call the tasks round-robin until the deadline.
+
+    :param calls: list of (task name, callable, args, kwargs) tuples
+    :param deadline: perf_counter value to stop at
+    :param offset: first call, so the workers do not start with the same task
+    :return: tuple of (latencies, errors, seconds the worker was calling the tasks)
+    """
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _, func, args, kwargs in itertools.islice(itertools.cycle(calls), offset % len(calls), None):
+        start = time.perf_counter()
+        if start >= deadline:
+            break
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors, time.perf_counter() - started
+
+
+def _run_process_worker(uri, fixture, selected, duration, offset, barrier):
+    """
+    Worker of the process pool: loads the module on its own,
+    waits for the other workers to load theirs and calls the
+    tasks for the duration, so the start-up is not measured.
+
+    :param uri: URI of the runner module
+    :param fixture: fixture file or None
+    :param selected: task names or None for all tasks
+    :param duration: seconds
+    :param offset: first call
+    :param barrier: barrier of all the workers of the level
+    :return: tuple of (latencies, errors, seconds of calling, fd growth, RSS growth)
+    """
+    calls = None
+    try:
+        calls = ModuleLoadTester.get_calls(RunnerTasks(uri, fixture=fixture), selected)
+    finally:
+        if calls is None:
+            barrier.abort()  # Do not keep the other workers waiting: the error is reported by the pool
+    try:
+        barrier.wait(BARRIER_TIMEOUT)
+    except threading.BrokenBarrierError:
+        pass  # Another worker failed to load: its error is reported by the pool
+    fds, rss = get_fd_count(), get_rss()
+    latencies, errors, elapsed = _run_calls(calls, time.perf_counter() + duration, offset)
+    fds_after = get_fd_count()
+    return latencies, errors, elapsed, (fds_after - fds) if None not in (fds, fds_after) else None, get_rss() - rss
+
+
+async def _run_coroutine_worker(calls, deadline, offset):
+    """
+    Asyncio worker. Coroutine tasks are awaited, plain tasks
+    are called in the event loop, so blocking tasks show up
+    as the lack of scaling.
+
+    :param calls: list of (task name, callable, args, kwargs) tuples
+    :param deadline: loop time to stop at
+    :param offset: first call
+    :return: tuple of (latencies, errors, seconds the worker was calling the tasks)
+    """
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _, func, args, kwargs in itertools.islice(itertools.cycle(calls), offset % len(calls), None):
+        start = time.perf_counter()
+        if start >= deadline:
+            break
+        try:
+            ret = func(*args, **kwargs)
+            if asyncio.iscoroutine(ret):
+                await ret
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0)
+    return latencies, errors, time.perf_counter() - started
+
+
+async def _run_coroutine_workers(calls, deadline, concurrency):
+    """
+    Run asyncio workers concurrently.
+
+    :param calls: list of (task name, callable, args, kwargs) tuples
+    :param deadline: loop time to stop at
+    :param concurrency: number of workers
+    :return: list of (latencies, errors, seconds of calling) tuples
+    """
+    return await asyncio.gather(*[_run_coroutine_worker(calls, deadline, offset) for offset in range(concurrency)])
+
+
+class ModuleLoadTester:
+    """
+    Runner module load tester.
+    """
+    def __init__(self, args):
+        self._cli_args = args
+        self._tasks = RunnerTasks(args.name, fixture=args.fixture)
+        self._console = ConsoleMessages()
+
+    @staticmethod
+    def get_calls(tasks, selected=None):
+        """
+        Get calls of the tasks.
+
+        :param tasks: RunnerTasks object
+        :param selected: task names or None for all tasks
+        :return: list of (task name, callable, args, kwargs) tuples
+        """
+        calls = []
+        for task in tasks.get_task_names():
+            if selected and task not in selected:
+                continue
+            func = tasks.get_task(task)
+            for args, kwargs in tasks.get_task_args(task):
+                calls.append((task, func, args, kwargs))
+        return calls
+
+    def _run_thread(self, calls, concurrency):
+        """
+        Run the level with a thread pool.
+
+        :param calls: list of calls
+        :param concurrency: number of workers
+        :return: list of (latencies, errors, seconds of calling) tuples
+        """
+        deadline = time.perf_counter() + self._cli_args.duration
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+            workers = list(pool.map(lambda offset: _run_calls(calls, deadline, offset), range(concurrency)))
+        return workers
+
+    def _run_process(self, calls, concurrency):
+        """
+        Run the level with a process pool.
+        Resource growth is summed over the worker processes.
+
+        :param calls: list of calls (unused: every process loads the module itself)
+        :param concurrency: number of workers
+        :return: list of (latencies, errors, seconds of calling, fd growth, RSS growth) tuples
+        """
+        with multiprocessing.Manager() as manager:
+            barrier = manager.Barrier(concurrency)
+            with concurrent.futures.ProcessPoolExecutor(max_workers=concurrency) as pool:
+                futures = [pool.submit(_run_process_worker, self._tasks.uri, self._cli_args.fixture,
+                                       self._cli_args.task, self._cli_args.duration, offset, barrier)
+                           for offset in range(concurrency)]
+                workers = [future.result() for future in futures]
+        return workers
+
+    def _run_asyncio(self, calls, concurrency):
+        """
+        Run the level with asyncio coroutines in one event loop.
+
+        :param calls: list of calls
+        :param concurrency: number of workers
+        :return: list of (latencies, errors, seconds of calling) tuples
+        """
+        deadline = time.perf_counter() + self._cli_args.duration
+        loop = asyncio.new_event_loop()
+        try:
+            workers = loop.run_until_complete(_run_coroutine_workers(calls, deadline, concurrency))
+        finally:
+            loop.close()
+        return workers
+
+    def _run_level(self, mode, calls, concurrency):
+        """
+        Run one concurrency level.
+
+        Throughput is the sum of the rates of the workers, each
+        measured over the time the worker was actually calling
+        the tasks, so spawning the pool and loading the module
+        in the worker processes is not counted.
+
+        :param mode: thread, process or asyncio
+        :param calls: list of calls
+        :param concurrency: number of workers
+        :return: result dictionary
+        """
+        fds, rss = get_fd_count(), get_rss()
+        workers = getattr(self, "_run_{}".format(mode))(calls, concurrency)
+        fds_after = get_fd_count()
+        fd_growth = (fds_after - fds) if None not in (fds, fds_after) else None
+        rss_growth = get_rss() - rss
+        if mode == "process":
+            fd_growth = sum([worker[3] for worker in workers if worker[3] is not None])
+            rss_growth = sum([worker[4] for worker in workers])
+        latencies = [latency for worker in workers for latency in worker[0]]
+        return {
+            "mode": mode, "concurrency": concurrency, "calls": len(latencies),
+            "errors": sum([worker[1] for worker in workers]),
+            "throughput": sum([len(worker[0]) / worker[2] for worker in workers if worker[2]]),
+            "p50": percentile(latencies, 50), "p95": percentile(latencies, 95), "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else 0, "fd_growth": fd_growth, "rss_growth": rss_growth,
+        }
+
+    def run(self):
+        """
+        Run all workers at all concurrency levels.
+
+        :return: list of result dictionaries
+        """
+        calls = self.get_calls(self._tasks, self._cli_args.task)
+        results = []
+        if not calls:
+            self._console.warning("Module '{}' has no tasks with examples or fixtures", self._tasks.uri)
+        for task, func, args, kwargs in calls:  # Warm up
+            try:
+                func(*args, **kwargs)
+            except Exception as exc:
+                self._console.warning("Warm-up call of the task '{}' failed: {}", task, exc)
+
+        for mode in self._cli_args.workers if calls else []:
+            for concurrency in self._cli_args.levels:
+                self._console.info("Loading '{}' with {} {} worker(s) for {}s", self._tasks.uri, concurrency, mode,
+                                   self._cli_args.duration)
+                results.append(self._run_level(mode, calls, concurrency))
+        return results
+
+    def report(self, results):
+        """
+        Print the throughput vs concurrency curve, tail latency and resource growth.
+
+        :param results: list of result dictionaries
+        :return: exit code
+        """
+        table_data = [["Workers", "Concurrency", "Calls", "Errors", "Calls/s", "Scaling", "p50, ms", "p95, ms",
+                       "p99, ms", "max, ms", "FDs +", "RSS +, KiB"]]
+        base = {}
+        for res in results:
+            base.setdefault(res["mode"], res["throughput"])
+            table_data.append([res["mode"], res["concurrency"], res["calls"], res["errors"],
+                               "{:.1f}".format(res["throughput"]),
+                               "{:.2f}x".format(res["throughput"] / base[res["mode"]]) if base[res["mode"]] else "-",
+                               "{:.3f}".format(res["p50"] * 1000), "{:.3f}".format(res["p95"] * 1000),
+                               "{:.3f}".format(res["p99"] * 1000), "{:.3f}".format(res["max"] * 1000),
+                               "-" if res["fd_growth"] is None else res["fd_growth"],
+                               "{:.1f}".format(res["rss_growth"] / 1024.0)])
+        print(terminaltables.AsciiTable(table_data=table_data).table)
+
+        return int(any([res["errors"] for res in results]))
@@ -0,0 +1,107 @@
+# coding: utf-8
+"""
+Merge outputs of the sharded runs.
+
+Every CI node runs one shard of valmod, gendoc or lint
+and publishes its output. These are merged into one
+report (or one modbook) and measured costs are recorded
+into the cost book for the next balancing.
+"""
+import os
+import json
+import shutil
+import argparse
+
+from sugarsdk.sharding import CostBook
+
+
+class ShardMerger:
+    """
+    Merger of the shard outputs.
+    """
+    def __init__(self, args):
+        self._cli_args = args
+        self._costs = CostBook(args.kind, args.costs)
+
+    def _merge_valmod(self):
+        """
+        Merge validation reports and print the final report.
+
+        :return: exit code
+        """
+        from sugarsdk.modval import ModuleValidator  # Requires Sugar, not needed for lint
+
+        validator = ModuleValidator(argparse.Namespace())
+        for path in self._cli_args.inputs:
+            validator.load(path)
+        self._costs.update(validator.measured)
+        if self._cli_args.out:
+            validator.dump(self._cli_args.out)
+
+        return validator.report()
+
+    def _merge_lint(self):
+        """
+        Merge lint messages and write them in pylint text format.
+
+        :return: pylint-compatible exit code
+        """
+        import sugarsdk.lint
+
+        messages = []
+        for path in self._cli_args.inputs:
+            with open(path) as i_h:
+                data = json.load(i_h)
+            messages.extend(data.get("messages", []))
+            self._costs.update(data.get("costs", {}))
+        sugarsdk.lint.sort_messages(messages)
+        sugarsdk.lint.write_messages(messages)
+        if self._cli_args.out:
+            with open(self._cli_args.out, "w") as o_h:
+                json.dump({"messages": messages}, o_h)
+
+        return sugarsdk.lint.get_status(messages)
+
+    def _merge_gendoc(self):
+        """
+        Merge documentation directories into one modbook.
+
+        :raises ValueError: if the output directory is not specified
+        :return: exit code
+        """
+        from sugarsdk.gendoc import ModuleDocumentationGenerator  # Requires Sugar, not needed for lint
+
+        if not self._cli_args.out:
+            raise ValueError("Output directory is required to merge the documentation")
+        generator = ModuleDocumentationGenerator(argparse.Namespace(out=self._cli_args.out, force=True))
+        os.makedirs(self._cli_args.out, exist_ok=True)
+        index_name = ModuleDocumentationGenerator.INDEX_NAME
+        mod_toc = {"mod_runner": [], "mod_state": []}
+        for path in self._cli_args.inputs:
+            with open(os.path.join(path, "{}.json".format(index_name))) as m_h:
+                manifest = json.load(m_h)
+            for section, names in manifest.items():
+                mod_toc.setdefault(section, []).extend(names)
+            costs_path = os.path.join(path, "{}.costs.json".format(index_name))
+            if os.path.exists(costs_path):
+                with open(costs_path) as c_h:
+                    self._costs.update(json.load(c_h))
+            for fname in os.listdir(path):
+                if fname.endswith(".rst") and not fname.startswith(index_name):
+                    shutil.copy(os.path.join(path, fname), os.path.join(self._cli_args.out, fname))
+        for names in mod_toc.values():
+            names.sort()
+        generator.write_index(mod_toc)
+
+        return 0
+
+    def merge(self):
+        """
+        Merge the shard outputs.
+
+        :return: exit code
+        """
+        ret = getattr(self, "_merge_{}".format(self._cli_args.kind))()
+        self._costs.save()
+
+        return ret
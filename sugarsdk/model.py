@@ -0,0 +1,92 @@
+# coding: utf-8
+"""
+Parsed module model.
+
+Holds everything that is loaded from the module directory
+(documentation, examples, scheme and parsed sources), so
+the validator and the documentation generator can share
+one pass over the module files.
+"""
+import os
+import astroid
+
+import sugar.utils.files
+
+from sugar.lib.compat import yaml
+from sugarsdk.scheme import ModuleScheme
+
+
+class ModuleModel:
+    """
+    Model of a runner or state module.
+    """
+    META_FILES = {
+        "runner": [("doc", "doc.yaml"), ("example", "examples.yaml"), ("scheme", "scheme.yaml")],
+        "state": [("doc", "doc.yaml"), ("example", "examples.yaml")],
+    }
+
+    def __init__(self, uri, mod_type, root_path):
+        self.uri = uri
+        self.mod_type = mod_type
+        self.root_path = root_path
+        self.path = os.path.join(root_path, os.path.sep.join(uri.split(".")))
+        self.meta = {}
+        self.missing = []
+        self.broken = []
+        self._interface = None
+        self._scheme = None
+        self._load_meta()
+
+    def _load_meta(self):
+        """
+        Load doc, examples and scheme of the module.
+
+        :return: None
+        """
+        for metakey, fname in self.META_FILES[self.mod_type]:
+            metafile = os.path.join(self.path, fname)
+            if not os.path.exists(metafile):
+                self.missing.append(metafile)
+                self.meta[metakey] = None
+                continue
+            with sugar.utils.files.fopen(metafile) as mth:
+                try:
+                    self.meta[metakey] = yaml.load(mth.read())
+                except Exception as exc:
+                    self.meta[metakey] = None
+                    self.broken.append((metafile, exc))
+
+    @property
+    def interface(self):
+        """
+        Parsed interface of the runner module.
+
+        :return: astroid module node
+        """
+        if self._interface is None:
+            with sugar.utils.files.fopen(os.path.join(self.path, "interface.py")) as src_h:
+                self._interface = astroid.parse(src_h.read())
+        return self._interface
+
+    @property
+    def scheme(self):
+        """
+        Compiled return data scheme of the runner module.
+
+        :return: ModuleScheme object
+        """
+        if self._scheme is None:
+            self._scheme = ModuleScheme(self.meta.get("scheme"))
+        return self._scheme
+
+    def get_docmap(self):
+        """
+        Get documentation map, as the documentation renderer expects it.
+
+        :return: dict of doc, examples and scheme
+        """
+        return {
+            "doc": self.meta.get("doc") or {},
+            "examples": self.meta.get("example") or {},
+            "scheme": self.meta.get("scheme") or {},
+        }
@@ -1,16 +1,21 @@
 #!/usr/bin/env python3
 
 import os
-import sys
+import collections
 import jinja2
 
 import sugarsdk
 import sugarsdk.utils
+from sugarsdk.registry import ModuleRegistry
+from sugarsdk.reporters import ConsoleReporter
+from sugarsdk.tasks import get_interface_tasks, parse_commandline
 
 try:
     import sugar.modules.states
     import sugar.modules.runners
     import sugar.lib.exceptions
+    import sugar.utils.files
+    from sugar.lib.compat import yaml
 except ImportError:
     raise ImportError("Sugar SDK makes no sense without Sugar installed.")
 
@@ -19,6 +24,8 @@ class BaseModuleResource:
     """
     Base resource finder.
     """
+    _templates = {}  # Compiled once per process
+
     def __init__(self):
         self._sdk_root = os.path.dirname(sugarsdk.__file__)
 
@@ -26,7 +33,10 @@ class BaseModuleResource:
         """
         Get corresponding resource and apply the namespace.
         """
-        return jinja2.Template(sugarsdk.utils.get_template("{}_{}".format(prefix, resource))).render(**namespace)
+        name = "{}_{}".format(prefix, resource)
+        if name not in self._templates:
+            self._templates[name] = jinja2.Template(sugarsdk.utils.get_template(name))
+        return self._templates[name].render(**namespace)
 
 
 class StateModuleResources(BaseModuleResource):
@@ -61,115 +71,283 @@ class ModuleGenerator:
     RS_INIT = "init"
     RS_INTERFACE = "interface"
     RS_IMPLEMENTATION = "impl"
+    RS_IMPLEMENTATION_PYX = "impl_pyx"
+    RS_BUILD = "build"
+    RS_TEST = "test"
 
-    def __init__(self, args):
+    def __init__(self, args, reporter=None):
         self._cli_args = args
         self.rs_runner = RunnerModuleResources()
         self.rs_state = StateModuleResources()
+        self.registry = ModuleRegistry()
+        self.files = []
+        self._console = reporter or ConsoleReporter()
+        self._staged = collections.OrderedDict()
+        self._init_dirs = set()
 
-    def _get_module_path(self):
+    @staticmethod
+    def _get_types_root(mod_type):
         """
-        Get module path.
-        
-        :raises SugarException: if unable to find the path.
-        :returns: path to the module without the module name
+        Get root directory of the modules of the type.
+
+        :param mod_type: runner or state
+        :raises SugarException: if type is unknown
+        :return: path
         """
-        if self._cli_args.type == "runner":
+        if mod_type == "runner":
             path = sugar.modules.runners.__file__
-        elif self._cli_args.type == "state":
+        elif mod_type == "state":
             path = sugar.modules.states.__file__
         else:
             raise sugar.lib.exceptions.SugarException("Type expected either to be 'runner' or 'state'.")
-        if not self._cli_args.name:
+        return os.path.dirname(path)
+
+    def _get_module_path(self, name=None, mod_type=None):
+        """
+        Get module path.
+
+        :param name: module name with the namespace. Default: from the command line.
+        :param mod_type: runner or state. Default: from the command line.
+        :raises SugarException: if unable to find the path.
+        :returns: path to the module without the module name
+        """
+        name = name or self._cli_args.name
+        mod_type = mod_type or self._cli_args.type
+        root = self._get_types_root(mod_type)
+        if not name:
             raise sugar.lib.exceptions.SugarException("Name of the module was not specified.")
 
-        return os.path.join(os.path.dirname(path), *self._cli_args.name.split("."))
+        self.registry.refresh(mod_type, root)
+        collisions = self.registry.get_collisions(mod_type, name, root)
+        if collisions:
+            raise sugar.lib.exceptions.SugarException("Module '{}' collides with existing {} module(s): {}".format(
+                name, mod_type, ", ".join(collisions)))
+
+        return os.path.join(root, *name.split("."))
 
-    def _add_resource(self, root, rs_name):
+    def _add_resource(self, root, rs_name, name, mod_type, impl=None):
         """
-        Add a resource stub.
+        Stage a resource stub.
+
+        :param root: directory of the resource
+        :param rs_name: resource name
+        :param name: module name with the namespace
+        :param mod_type: runner or state
+        :param impl: implementation name of the runner module
+        :raises SugarException: if the resource cannot be rendered
+        :return: None
         """
-        mod_name = self._cli_args.name.rsplit(".", 1)[-1]
-        mod_namespace = self._cli_args.name.rsplit(".", 1)[0]
         namespace = {
-            "mod_name": mod_name,
+            "mod_name": name.rsplit(".", 1)[-1],
             "mod_author": "Your Name <your@name.org>",
             "mod_summary": "Greeting module",
             "mod_synopsis": "Some more lines about this module.",
-            "mod_type": "{}s".format(self._cli_args.type),
+            "mod_type": "{}s".format(mod_type),
             "sugar_version": "0.0.0",
-            "mod_namespace": mod_namespace,
+            "mod_namespace": name.rsplit(".", 1)[0],
+            "mod_uri": name,
         }
+        if rs_name == self.RS_TEST:
+            namespace["bench_cases"] = self._get_bench_cases(root)
 
         name_map = {
             "init": "__init__.py",
             "examples": "examples.yaml",
             "doc": "doc.yaml",
-            "impl": "{}.py".format(self._cli_args.impl if self._cli_args.type == "runner" else "impl"),
+            "impl": "{}.py".format(impl if mod_type == "runner" else "impl"),
+            "impl_pyx": "{}.pyx".format(impl),
+            "build": "_build.py",
+            "test": "_bench.py",
             "interface": "interface.py"
         }
 
         try:
-            resource = getattr(self, "rs_{}".format(self._cli_args.type)).get_resource(rs_name, namespace)
-            with open(os.path.join(root, name_map[rs_name]), "w") as h_res:
-                h_res.write(resource)
+            resource = getattr(self, "rs_{}".format(mod_type)).get_resource(rs_name, namespace)
         except Exception as exc:
-            print("Failed to process '{}': {}".format(rs_name, exc))
-            sys.exit(1)
+            raise sugar.lib.exceptions.SugarException("Failed to process '{}': {}".format(rs_name, exc))
+        self._staged[os.path.join(root, name_map[rs_name])] = resource
+        if rs_name == self.RS_INIT:
+            self._init_dirs.add(root)
 
-    def _add_inits_over(self, root):
+    def _get_bench_cases(self, root):
         """
-        Add __init__.py files all across the root from "sugar/modules/<type/..." onwards.
+        Get benchmark cases of every task of the staged interface,
+        seeded from the first example call of the task.
+
+        :param root: directory of the module
+        :return: list of (task, args source, kwargs source) tuples
         """
-              
-        mod_type = "{}s".format(self._cli_args.type)
-        while True:
-            if not os.path.exists(os.path.join(root, "__init__.py")):
-                self._add_resource(root, "init")
-            root = os.path.abspath(os.path.join(root, os.pardir))
-            if root.endswith(mod_type):
-                break
+        examples = yaml.load(self._staged.get(os.path.join(root, "examples.yaml")) or "")
+        examples = examples if isinstance(examples, dict) else {}
+        cases = []
+        for task in get_interface_tasks(self._staged.get(os.path.join(root, "interface.py")) or ""):
+            example = examples.get(task) if isinstance(examples.get(task), dict) else {}
+            calls = parse_commandline(example.get("commandline"), task) or [([], {})]
+            cases.append((task, repr(calls[0][0]), repr(calls[0][1])))
+        return cases
 
-    def _create_runner_tree(self, root):
+    def _add_inits_over(self, root, name, mod_type):
         """
-        Create a tree of the state module, if it does not exists yet.
+        Add __init__.py files all across the root from "sugar/modules/<type/..." onwards.
+        Every directory is checked only once per run.
+
+        :param root: module directory
+        :param name: module name with the namespace
+        :param mod_type: runner or state
+        :return: None
         """
+        types_root = self._get_types_root(mod_type)
+        while root != types_root and root.startswith(types_root):
+            if root not in self._init_dirs:
+                if not os.path.exists(os.path.join(root, "__init__.py")):
+                    self._add_resource(root, self.RS_INIT, name, mod_type)
+                self._init_dirs.add(root)
+            root = os.path.dirname(root)
 
-        if not os.path.exists(root):
-            os.makedirs(root)
-            for rs_name in [self.RS_INIT, self.RS_EXAMPLES, self.RS_DOCUMENTATION, self.RS_INTERFACE]:
-                self._add_resource(root, rs_name)
-            root = os.path.join(root, "_impl")
-            os.mkdir(root)
-            self._add_resource(root, self.RS_INIT)
-            self._add_resource(root, self.RS_IMPLEMENTATION)
-        else:
+    def _check_tree(self, root):
+        """
+        Check that the module directory is neither on the disk nor staged.
+
+        :param root: module directory
+        :raises IOError: if the path exists
+        :return: None
+        """
+        prefix = root + os.path.sep
+        if os.path.exists(root) or [path for path in self._staged if path.startswith(prefix)]:
             raise IOError("Path '{}' already exists".format(root))
 
-    def _create_state_tree(self, root):
+    def _create_runner_tree(self, root, name, impls, cython=False):
         """
-        Create a tree of the state module, if if does not exists yet.
+        Stage a tree of the runner module.
 
-        :param root:
-        :return:
+        :param root: module directory
+        :param name: module name with the namespace
+        :param impls: implementation names
+        :param cython: implementations are Cython (.pyx) with the build script
+        :return: None
         """
-        if not os.path.exists(root):
-            os.makedirs(root)
-            for rs_name in [self.RS_INIT, self.RS_EXAMPLES, self.RS_DOCUMENTATION, self.RS_IMPLEMENTATION]:
-                self._add_resource(root, rs_name)
+        self._check_tree(root)
+        for rs_name in [self.RS_INIT, self.RS_EXAMPLES, self.RS_DOCUMENTATION, self.RS_INTERFACE, self.RS_TEST]:
+            self._add_resource(root, rs_name, name, "runner")
+        root = os.path.join(root, "_impl")
+        self._add_resource(root, self.RS_INIT, name, "runner")
+        for impl in impls:
+            self._add_resource(root, self.RS_IMPLEMENTATION_PYX if cython else self.RS_IMPLEMENTATION,
+                               name, "runner", impl=impl)
+        if cython:
+            self._add_resource(root, self.RS_BUILD, name, "runner")
+
+    def _create_state_tree(self, root, name):
+        """
+        Stage a tree of the state module.
+
+        :param root: module directory
+        :param name: module name with the namespace
+        :return: None
+        """
+        self._check_tree(root)
+        for rs_name in [self.RS_INIT, self.RS_EXAMPLES, self.RS_DOCUMENTATION, self.RS_IMPLEMENTATION]:
+            self._add_resource(root, rs_name, name, "state")
+
+    def _write(self):
+        """
+        Write all staged files in one pass, creating every directory once.
+
+        :return: None
+        """
+        for dirname in sorted(set([os.path.dirname(path) for path in self._staged])):
+            os.makedirs(dirname, exist_ok=True)
+        for path, content in self._staged.items():
+            with sugar.utils.files.fopen(path, "w") as h_res:
+                h_res.write(content)
+            self.files.append(path)
+        self._staged.clear()
+
+    def stage(self, name, mod_type, impls, cython=False):
+        """
+        Stage a module (runner or state) without writing it.
+
+        :param name: module name with the namespace
+        :param mod_type: runner or state
+        :param impls: implementation names of the runner module
+        :param cython: generate Cython implementations of the runner module
+        :return: path to the module
+        """
+        mod_path = self._get_module_path(name, mod_type)
+        if mod_type == "runner":
+            self._create_runner_tree(mod_path, name, impls, cython=cython)
         else:
-            raise IOError("Path '{}' already exists".format(root))
+            self._create_state_tree(mod_path, name)
+        self._add_inits_over(mod_path, name, mod_type)
+
+        return mod_path
 
     def generate(self):
         """
         Generate a module (runner or state).
+
+        :return: path to the generated module
+        """
+        mod_path = self.stage(self._cli_args.name, self._cli_args.type, [self._cli_args.impl],
+                              cython=getattr(self._cli_args, "cython", False))
+        self._write()
+        self._console.info("{} module has been generated to {}", (self._cli_args.type or "").title(), mod_path)
+
+        return mod_path
+
+    def load_manifest(self, path):
+        """
+        Load manifest of the modules.
+
+        Manifest is a YAML list of the modules (or a mapping with such list in "modules"):
+
+            - name: foo.bar.mymodule
+              type: runner
+              impl: [linux, freebsd]
+              cython: true
+            - name: foo.mystate
+              type: state
+
+        :param path: path to the manifest file
+        :raises SugarException: if the manifest is invalid
+        :return: list of (name, type, impls, cython) tuples
+        """
+        with sugar.utils.files.fopen(path) as m_h:
+            manifest = yaml.load(m_h.read())
+        if isinstance(manifest, dict):
+            manifest = manifest.get("modules")
+        if not isinstance(manifest, list):
+            raise sugar.lib.exceptions.SugarException("Manifest should be a list of the modules.")
+
+        modules = []
+        for entry in manifest:
+            if not isinstance(entry, dict) or not entry.get("name"):
+                raise sugar.lib.exceptions.SugarException("Module '{}' in manifest has no name.".format(entry))
+            impls = entry.get("impl") or [self._cli_args.impl]
+            modules.append((entry["name"], entry.get("type", self._cli_args.type),
+                            [impls] if isinstance(impls, str) else list(impls),
+                            bool(entry.get("cython", getattr(self._cli_args, "cython", False)))))
+        return modules
+
+    def generate_manifest(self, path):
+        """
+        Generate all modules of the manifest in one run.
+        Nothing is written, if any of the modules cannot be generated.
+
+        :param path: path to the manifest file
+        :raises SugarException: if modules of the manifest collide
+        :return: list of (name, type, path) tuples of the generated modules
         """
-        mod_path = self._get_module_path()
-        if self._cli_args.type == "runner":
-            self._create_runner_tree(mod_path)
-            print("Runner module has been generated to", mod_path)
-        elif self._cli_args.type == "state":
-            self._create_state_tree(mod_path)
-            print("State module has been generated to", mod_path)
+        generated = []
+        for name, mod_type, impls, cython in self.load_manifest(path):
+            for g_name, g_type, _ in generated:
+                if g_type == mod_type and (g_name.lower() == name.lower() or g_name.startswith(name + ".")
+                                           or name.startswith(g_name + ".")):
+                    raise sugar.lib.exceptions.SugarException(
+                        "Module '{}' collides with {} module '{}' in the manifest".format(name, g_type, g_name))
+            generated.append((name, mod_type, self.stage(name, mod_type, impls, cython=cython)))
+        self._write()
+        for name, mod_type, mod_path in generated:
+            self._console.info("{} module has been generated to {}", mod_type.title(), mod_path)
 
-        self._add_inits_over(mod_path)
+        return generated
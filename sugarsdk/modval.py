@@ -9,38 +9,181 @@ and checks if the external documentation, schemas etc
 looks legit.
 """
 import os
-import sys
+import json
+import shutil
+import time
 import astroid
 
 import sugar.modules.runners
 import sugar.modules.states
 import sugar.utils.files
+import sugarsdk.model
+import sugarsdk.pyx
+import sugarsdk.scheme
+import sugarsdk.utils
 
-from sugar.lib.compat import yaml
 from sugar.lib.loader.virtual import VirtualModuleLoader
 from sugar.lib.loader.simple import SimpleModuleLoader
-from sugar.lib.outputters.console import ConsoleMessages, TitleOutput
+from sugarsdk.cache import ResultCache
+from sugarsdk.registry import IMPL_EXTENSIONS
+from sugarsdk.reporters import ConsoleReporter
+from sugarsdk.diagnostics import DiagnosticStore
+from sugarsdk.results import ValidationResults
+from sugarsdk.sharding import CostBook, select_shard
+from sugarsdk.session import get_session
+
+
+MESSAGES = {
+    "E101": ("error", "{} module at '{}' is missing '{}' file!"),
+    "E102": ("error", "Documentation in '{}' {} module has no 'tasks' section"),
+    "E103": ("error", "Function '{}' is not documented in {} module"),
+    "E104": ("error", "Function '{}' is not abstract in the {} module interface"),
+    "E105": ("error", "Documentation in '{}' {} module contains superfluous data. "
+                      "The interface has less methods than the documentation describes"),
+    "E106": ("error", "Example does not contain usage of function '{}'."),
+    "E107": ("error", "Example does not contain '{}' section in function '{}'."),
+    "E108": ("error", "Documentation of the {} module '{}' has no parameters section"),
+    "E109": ("error", "Documentation of the {} module '{}' should explain what parameter '{}' "
+                      "in function '{}' is for."),
+    "E110": ("error", "Documentation of the {} module '{}' is missing description "
+                      "of the parameter '{}' in function '{}'."),
+    "E111": ("error", "Argument '{}' of the function '{}' in the {} module '{}' should be documented as required."),
+    "E112": ("error", "Argument '{}' of the function '{}' in the {} module '{}' should be documented as optional."),
+    "E113": ("error", "Function '{}::{}::{}' is not implemented."),
+    "E114": ("error", "Scheme of the {} module '{}' describes '{}' instead of the interface '{}'."),
+    "E115": ("error", "Scheme of the {} module '{}' describes task '{}', which is not in the interface."),
+    "E116": ("error", "Scheme of the task '{}' in the {} module '{}' is invalid: {}"),
+    "E117": ("error", "Returns of the task '{}' in the examples of the {} module '{}' do not match the scheme: {}"),
+    "E118": ("error", "Implementation '{}' of the {} module '{}' cannot be parsed: {}"),
+    "E119": ("error", "Scheme of the {} module '{}' is invalid: {}"),
+    "W101": ("warning", "'{}' in {} module seems broken ({})"),
+    "W102": ("warning", "Parameter '{}' in task '{}' of the {} module '{}' should be documented as default to '{}'."),
+    "W103": ("warning", "Function '{}::{}::{}' has different varargs than the interface."),
+    "W104": ("warning", "Function '{}::{}::{}' has different keyword arguments than the interface."),
+    "W105": ("warning", "Function '{}::{}::{}' has different usage parameter names ({}) than the interface ({})."),
+    "W106": ("warning", "Scheme of the {} module '{}' does not describe return data of the task '{}'."),
+    "I101": ("info", "Not so good: implicit arguments (varargs) are discouraged. "
+                     "Consider explicitly defining your parameters instead, or make few more methods."),
+    "I102": ("info", "Not so good: implicit keyword arguments are discouraged. "
+                     "Consider explicitly defining your keyword parameters or split to more methods."),
+    "I103": ("info", "State modules have no checks yet: skipped."),
+}
 
 
 class ModuleValidator:
     """
     Module validator.
     """
-    def __init__(self, args):
+    def __init__(self, args, reporter=None):
         self._cli_args = args
         self._runner_module_loader = VirtualModuleLoader(sugar.modules.runners)
         self._state_module_loader = SimpleModuleLoader(sugar.modules.states)
-        self._console = ConsoleMessages()
+        self._console = reporter or ConsoleReporter()
+
+        self.diagnostics = DiagnosticStore()
+        self._uri = None
+
+        self._session = get_session()
+        self._registry = self._session.registry
+        self._mod_type = None
+        self.clean_models = []
+        self.loaded_clean = []
+        self.measured = {}
+        self._cache = None if getattr(args, "no_cache", False) else ResultCache(
+            "valmod", url=getattr(args, "cache_url", None))
+
+    @property
+    def infos(self) -> list:
+        """
+        Information messages (read-only view of the diagnostics).
+
+        :return: list of (message, args) tuples
+        """
+        return self.diagnostics.get_messages("info")
+
+    @property
+    def warnings(self) -> list:
+        """
+        Warning messages (read-only view of the diagnostics).
+
+        :return: list of (message, args) tuples
+        """
+        return self.diagnostics.get_messages("warning")
+
+    @property
+    def errors(self) -> list:
+        """
+        Error messages (read-only view of the diagnostics).
+
+        :return: list of (message, args) tuples
+        """
+        return self.diagnostics.get_messages("error")
+
+    def _add(self, code, *args, function=None):
+        """
+        Add diagnostic about the module, which is being validated.
 
-        self._title = TitleOutput()
-        self._title.add("validation", "info")
-        self._title.add("information", "info")
-        self._title.add("warnings", "warning")
-        self._title.add("errors", "alert")
+        :param code: message code
+        :param args: message arguments
+        :param function: name of the function, if the diagnostic is about a function
+        :return: None
+        """
+        severity, template = MESSAGES[code]
+        self.diagnostics.add(code, severity, template, args, module=self._uri, function=function)
 
-        self.infos = []
-        self.warnings = []
-        self.errors = []
+    def _get_model(self, uri):
+        """
+        Get parsed model of the module, which is being validated.
+
+        :param uri: URI of the module
+        :return: ModuleModel object
+        """
+        loader = self._runner_module_loader if self._mod_type == "runner" else self._state_module_loader
+        return self._session.get_model(uri, self._mod_type, loader.root_path)
+
+    def _get_cache_key(self, mod_type, uri):
+        """
+        Get cache key of the module validation results: hash of the module
+        files and of the validator itself.
+
+        :param mod_type: runner or state
+        :param uri: URI of the module
+        :return: hex digest
+        """
+        loader = self._runner_module_loader if mod_type == "runner" else self._state_module_loader
+        self._registry.refresh_module(mod_type, uri, loader.root_path)  # Also if the tree was not refreshed
+        entry = self._registry.get(mod_type, uri, loader.root_path)
+        return sugarsdk.utils.get_digest(
+            mod_type, uri, entry["hash"] if entry else sugarsdk.utils.get_tree_digest(self._get_model(uri).path),
+            *[sugarsdk.utils.get_file_digest(path) for path in [__file__, sugarsdk.model.__file__,
+                                                                sugarsdk.scheme.__file__, sugarsdk.pyx.__file__]])
+
+    def _validate_cached(self, mod_type, uri):
+        """
+        Validate a module or replay its cached results.
+
+        :param mod_type: runner or state
+        :param uri: URI of the module
+        :return: True if the module has been checked and has no issues
+        """
+        self._uri = uri
+        key = self._get_cache_key(mod_type, uri) if self._cache is not None else None
+        cached = self._cache.get(key) if key is not None else None
+        if cached is not None:
+            self._console.info("  ...cached results")
+            self.diagnostics.load(cached.get("diagnostics", []))
+            clean = cached.get("clean", False)
+        else:
+            mark = len(self.diagnostics)
+            if mod_type == "runner":
+                self._validate_runner_by_uri(uri)
+            elif mod_type == "state":
+                self._validate_state_by_uri(uri)
+            diagnostics = self.diagnostics.to_list(start=mark)
+            clean = mod_type == "runner" and not [entry for entry in diagnostics if entry[1] != "info"]
+            if key is not None:
+                self._cache.put(key, {"diagnostics": diagnostics, "clean": clean})
+        return clean
 
     def _get_runner_meta(self, uri):
         """
@@ -49,27 +192,14 @@ class ModuleValidator:
         :param uri:
         :return:
         """
-        mod_type = self._cli_args.type
-        mod_path = os.path.join(self._runner_module_loader.root_path, os.path.sep.join(uri.split(".")))
+        mod_type = self._mod_type
+        model = self._get_model(uri)
+        for metafile in model.missing:
+            self._add("E101", mod_type.title(), uri, metafile)
+        for metafile, exc in model.broken:
+            self._add("W101", os.path.basename(metafile), mod_type, exc)
 
-        doc_path = os.path.join(mod_path, "doc.yaml")
-        xpl_path = os.path.join(mod_path, "examples.yaml")
-        scm_path = os.path.join(mod_path, "scheme.yaml")
-
-        for metafile in [doc_path, xpl_path, scm_path]:
-            if not os.path.exists(metafile):
-                self.errors.append(("{} module at '{}' is missing '{}' file!", (mod_type.title(), uri, metafile)))
-
-        meta = {}
-        for metakey, metafile in [("doc", doc_path), ("example", xpl_path), ("scheme", scm_path)]:
-            with sugar.utils.files.fopen(metafile) as mth:
-                try:
-                    meta[metakey] = yaml.load(mth.read())
-                except Exception as exc:
-                    meta[metakey] = None
-                    self.warnings.append(("'{}' in {} module seems broken ({})",
-                                          (os.path.basename(metafile), mod_type, exc)))
-        return meta
+        return model.meta
 
     def _get_runner_interface(self, uri):
         """
@@ -78,11 +208,7 @@ class ModuleValidator:
         :param uri:
         :return:
         """
-        ifc = {}
-        ifc_path = os.path.join(self._runner_module_loader.root_path, os.path.sep.join(uri.split(".")), "interface.py")
-        with sugar.utils.files.fopen(ifc_path) as src_h:
-            ifc["interface"] = astroid.parse(src_h.read())
-        return ifc
+        return {"interface": self._get_model(uri).interface}
 
     def _get_runner_implementations(self, ifc, uri):
         """
@@ -97,16 +223,21 @@ class ModuleValidator:
                 break
         imps = {ifc: []}
         imp_path = os.path.join(self._runner_module_loader.root_path, os.path.sep.join(uri.split(".")), "_impl")
-        for fname in os.listdir(imp_path):
-            if fname.startswith("_"):
+        for fname in sorted(os.listdir(imp_path)):
+            if fname.startswith("_") or not fname.endswith(IMPL_EXTENSIONS):
                 continue
             with sugar.utils.files.fopen(os.path.join(imp_path, fname)) as src_h:
-                parsed = astroid.parse(src_h.read())
-                for node in parsed.body:
-                    if isinstance(node, astroid.ClassDef):
-                        for node_base in node.bases:
-                            if node_base.name == ifc.name:
-                                imps[ifc].append((node, fname))
+                source = src_h.read()
+            try:
+                parsed = astroid.parse(sugarsdk.pyx.pyx_to_py(source) if fname.endswith(".pyx") else source)
+            except astroid.exceptions.AstroidSyntaxError as exc:
+                self._add("E118", fname, self._mod_type, uri, exc.error)
+                continue
+            for node in parsed.body:
+                if isinstance(node, astroid.ClassDef):
+                    for node_base in node.bases:
+                        if node_base.name == ifc.name:
+                            imps[ifc].append((node, fname))
         return imps
 
     def _runner_cmp_meta(self, ifc, meta, uri):
@@ -118,29 +249,31 @@ class ModuleValidator:
         :param uri: URI of the module.
         :return:
         """
-        mod_type = self._cli_args.type
+        mod_type = self._mod_type
         methods = []
+        ifc_name = None
         for node in ifc["interface"].body:
             if isinstance(node, astroid.ClassDef):
+                ifc_name = ifc_name or node.name
                 for func_node in node.body:
                     methods.append(func_node)
 
         self._console.info("Verifying scheme")
-        scheme = meta.get("scheme")
-        self._console.warning("  (unsupported yet)")
+        if meta.get("scheme") is not None:
+            self._runner_cmp_scheme(uri, ifc_name, [mtd.name for mtd in methods], meta.get("example") or {})
 
         self._console.info("Verifying documentation")
         doc = meta.get("doc")
 
         tasks = doc.get("tasks")
         if tasks is None:
-            self.errors.append(("Documentation in '{}' {} module has no 'tasks' section", (uri, mod_type)))
+            self._add("E102", uri, mod_type)
 
         ifc_method_names = set()
         for mtd in methods:
             ifc_method_names.add(mtd.name)
             if mtd.name not in tasks:
-                self.errors.append(("Function '{}' is not documented in {} module", (mtd.name, mod_type)))
+                self._add("E103", mtd.name, mod_type, function=mtd.name)
             is_abstract = False
             if mtd.decorators is not None:
                 for decorator in mtd.decorators.nodes:
@@ -148,27 +281,53 @@ class ModuleValidator:
                         is_abstract = True
                         break
             if not is_abstract:
-                self.errors.append(("Function '{}' is not abstract in the {} module interface", (mtd.name, mod_type)))
+                self._add("E104", mtd.name, mod_type, function=mtd.name)
 
             self._common_cmp_signature(uri, mtd, tasks.get(mtd.name, {}))
 
         for task in tasks:
             if task not in ifc_method_names:
-                self.errors.append(("Documentation in '{}' {} module contains superfluous data. "
-                                    "The interface has less methods than "
-                                    "the documentation describes", (uri, mod_type)))
+                self._add("E105", uri, mod_type)
                 break
 
         self._console.info("Verifying examples")
         example = meta.get("example")
         for mt_name in ifc_method_names:
             if mt_name not in example:
-                self.errors.append(("Example does not contain usage of function '{}'.", (mt_name,)))
+                self._add("E106", mt_name, function=mt_name)
             else:
                 for section in ["commandline", "description", "states"]:
                     if section not in example[mt_name]:
-                        self.errors.append(("Example does not contain '{}' section in function '{}'.",
-                                            (section, mt_name,)))
+                        self._add("E107", section, mt_name, function=mt_name)
+
+    def _runner_cmp_scheme(self, uri, ifc_name, task_names, example):
+        """
+        Compare compiled scheme to the interface and check return samples of the examples.
+
+        :param uri: URI of the module
+        :param ifc_name: name of the interface class
+        :param task_names: names of the interface tasks
+        :param example: examples of the module
+        :return: None
+        """
+        mod_type = self._mod_type
+        scheme = self._get_model(uri).scheme
+        if scheme.error is not None:
+            self._add("E119", mod_type, uri, scheme.error)
+        elif scheme.interface != ifc_name:
+            self._add("E114", mod_type, uri, scheme.interface, ifc_name)
+        for task in sorted(set(scheme.validators) | set(scheme.errors)):
+            if task not in task_names:
+                self._add("E115", mod_type, uri, task, function=task)
+        for task, error in sorted(scheme.errors.items()):
+            self._add("E116", task, mod_type, uri, error, function=task)
+        for task in task_names:
+            if scheme.error is None and task not in scheme.validators and task not in scheme.errors:
+                self._add("W106", mod_type, uri, task, function=task)
+            elif isinstance(example.get(task), dict) and "returns" in example[task]:
+                errors = scheme.check(task, example[task]["returns"])
+                if errors:
+                    self._add("E117", task, mod_type, uri, "; ".join(errors), function=task)
 
     def _common_cmp_signature(self, uri, node, doc):
         """
@@ -178,30 +337,22 @@ class ModuleValidator:
         :param doc: documentation for that node
         :return: None
         """
-        mod_type = self._cli_args.type
+        mod_type = self._mod_type
         if "parameters" not in doc:
-            self.errors.append(("Documentation of the {} module '{}' has no parameters section", (mod_type, uri)))
+            self._add("E108", mod_type, uri, function=node.name)
 
         if node.args.vararg:
-            self.infos.append(("Not so good: implicit arguments (varargs) are discouraged. "
-                               "Consider explicitly defining your parameters instead, "
-                               "or make few more methods.", ()))
+            self._add("I101", function=node.name)
         if node.args.kwarg:
-            self.infos.append(("Not so good: implicit keyword arguments are discouraged. "
-                               "Consider explicitly defining your keyword parameters "
-                               "or split to more methods.", ()))
+            self._add("I102", function=node.name)
         node_args = []
         for arg in node.args.args:
             if arg.name in ["self", "cls"]:
                 continue
             elif arg.name not in doc.get("parameters", {}):
-                self.errors.append(("Documentation of the {} module '{}' "
-                                    "should explain what parameter '{}' in function '{}' is for.",
-                                    (mod_type, uri, arg.name, node.name)))
+                self._add("E109", mod_type, uri, arg.name, node.name, function=node.name)
             elif "description" not in doc.get("parameters", {}).get(arg.name, {}):
-                self.errors.append(("Documentation of the {} module '{}' "
-                                    "is missing description of the parameter '{}' in function '{}'.",
-                                    (mod_type, uri, arg.name, node.name)))
+                self._add("E110", mod_type, uri, arg.name, node.name, function=node.name)
             node_args.append(arg)
         # Get a map of non-required attrs in signature
         sig_defaults = list(dict(zip([arg.name for arg in node_args][::-1],
@@ -213,20 +364,15 @@ class ModuleValidator:
         for p_name, p_doc in doc.get("parameters", {}).items():
             if p_name in sig_default_values:
                 if p_doc.get("default") != sig_default_values.get(p_name):
-                    self.warnings.append(("Parameter '{}' in task '{}' of the {} module '{}' "
-                                          "should be documented as default to '{}'.",
-                                          (p_name, node.name, mod_type, uri, sig_default_values.get(p_name))))
+                    self._add("W102", p_name, node.name, mod_type, uri, sig_default_values.get(p_name),
+                              function=node.name)
             doc_req[p_name] = p_doc.get("required", False)
 
         for arg in node_args:
             if arg.name not in sig_defaults and not doc_req.get(arg.name, False):
-                self.errors.append(("Argument '{}' of the function '{}' in the {} module "
-                                    "'{}' should be documented as required.",
-                                    (arg.name, node.name, mod_type, uri)))
+                self._add("E111", arg.name, node.name, mod_type, uri, function=node.name)
             elif arg.name in sig_defaults and doc_req.get(arg.name, True):
-                self.errors.append(("Argument '{}' of the function '{}' in the {} module "
-                                    "'{}' should be documented as optional.",
-                                    (arg.name, node.name, mod_type, uri)))
+                self._add("E112", arg.name, node.name, mod_type, uri, function=node.name)
 
     def _runner_cmp_impl(self, impl: dict, uri: str):
         """
@@ -242,25 +388,19 @@ class ModuleValidator:
             impl_func_names = [node.name for node in cls_impl.body]
             for ifc_fname in ifc_func_names:
                 if ifc_fname not in impl_func_names:
-                    self.errors.append(("Function '{}::{}::{}' is not implemented.",
-                                        (fname, cls_impl.name, ifc_fname)))
+                    self._add("E113", fname, cls_impl.name, ifc_fname, function=ifc_fname)
             for impl_f_node in cls_impl.body:
                 for ifc_f_node in ifc.body:
                     if ifc_f_node.name == impl_f_node.name:
                         if ifc_f_node.args.vararg != impl_f_node.args.vararg:
-                            self.warnings.append(("Function '{}::{}::{}' has different varargs than the interface.",
-                                                  (fname, cls_impl.name, ifc_f_node.name)))
+                            self._add("W103", fname, cls_impl.name, ifc_f_node.name, function=ifc_f_node.name)
                         if ifc_f_node.args.kwarg != impl_f_node.args.kwarg:
-                            self.warnings.append(("Function '{}::{}::{}' has different keyword "
-                                                  "arguments than the interface.",
-                                                  (fname, cls_impl.name, ifc_f_node.name)))
+                            self._add("W104", fname, cls_impl.name, ifc_f_node.name, function=ifc_f_node.name)
                         ifc_param_names = [n.name for n in ifc_f_node.args.args if n.name not in ["cls", "self"]]
                         ipl_param_names = [n.name for n in impl_f_node.args.args if n.name not in ["cls", "self"]]
                         if ifc_param_names != ipl_param_names:
-                            self.warnings.append(("Function '{}::{}::{}' has different usage parameter names ({}) "
-                                                  "than the interface ({}).",
-                                                  (fname, cls_impl.name, ifc_f_node.name,
-                                                   ", ".join(ipl_param_names), ", ".join(ifc_param_names))))
+                            self._add("W105", fname, cls_impl.name, ifc_f_node.name, ", ".join(ipl_param_names),
+                                      ", ".join(ifc_param_names), function=ifc_f_node.name)
 
     def _validate_runner_by_uri(self, uri):
         """
@@ -284,21 +424,25 @@ class ModuleValidator:
     def _validate_state_by_uri(self, uri):
         """
         Validate a state module by uri.
+        There are no checks of the state modules yet, so they are
+        reported as skipped and never counted as clean.
 
         :param uri:
         :return: tuple of infos warnings and errors
         """
+        self._add("I103")
 
-    def _get_all_modules_uri(self) -> list:
+    def _get_all_modules_uri(self, mod_type) -> list:
         """
         Get all module uri.
+
+        :param mod_type: runner or state
         :return:
         """
-        uris = []
-        if self._cli_args.type == "runner":
-            uris = list(self._runner_module_loader.map().keys())
+        loader = self._runner_module_loader if mod_type == "runner" else self._state_module_loader
+        self._registry.refresh(mod_type, loader.root_path)
 
-        return uris
+        return self._registry.get_uris(mod_type, loader.root_path)
 
     def _get_terminal_size(self):
         """
@@ -306,66 +450,91 @@ class ModuleValidator:
 
         :return:
         """
-        height, width = os.popen("stty size").read().strip().split()
-        return height, width
+        size = shutil.get_terminal_size()
+        return size.lines, size.columns
 
     def validate(self):
         """
         Validate modules.
 
-        :return: None
+        :return: True if there was anything to validate
         """
-        sys.stdout.write(self._title.paint("validation") + os.linesep)
-        ret = False
-        uris = []
-        if self._cli_args.all:
-            uris = self._get_all_modules_uri()
-        elif self._cli_args.name is not None:
-            uris.append(self._cli_args.name)
+        self._console.title("validation", "info")
+        if self._cli_args.type:
+            mod_types = [self._cli_args.type]
+        else:
+            mod_types = ["runner", "state"] if self._cli_args.all else []
+
+        names = getattr(self._cli_args, "names", None) or (
+            [self._cli_args.name] if self._cli_args.name is not None else [])
+        changes = getattr(self._cli_args, "changes", None)
+        modules = []
+        for mod_type in mod_types:
+            if self._cli_args.all:
+                uris = self._get_all_modules_uri(mod_type)
+                if changes is not None:
+                    loader = self._runner_module_loader if mod_type == "runner" else self._state_module_loader
+                    uris = changes.select_modules(uris, loader.root_path)
+                    self._console.info("{} changed {} module(s)", len(uris), mod_type)
+                modules.extend([(mod_type, uri) for uri in uris])
+            else:
+                modules.extend([(mod_type, uri) for uri in names])
+        ret = bool(modules) or changes is not None
 
-        for uri in uris:
-            h, w = self._get_terminal_size()
-            print()
-            self._console.info("Validating '{}' module", uri)
-            print("=" * int(w))
-            if self._cli_args.type == "runner":
-                self._validate_runner_by_uri(uri)
-            elif self._cli_args.type == "state":
-                self._validate_state_by_uri(uri)
-            if not ret:
-                ret = True
+        shard = getattr(self._cli_args, "shard", None)
+        if shard:
+            costs = CostBook("valmod", getattr(self._cli_args, "costs", None))
+            modules = select_shard(modules, shard, costs, key=lambda module: "{}:{}".format(*module))
 
-        if not ret:
-            self._console.error("Don't know what/how to validate for you...")
+        for mod_type, uri in modules:
+            self._mod_type = mod_type
+            h, w = self._get_terminal_size()
+            self._console.write(os.linesep)
+            self._console.info("Validating '{}' {} module", uri, mod_type)
+            self._console.write("=" * int(w) + os.linesep)
+            start = time.perf_counter()
+            if self._validate_cached(mod_type, uri):
+                self.clean_models.append(self._get_model(uri))
+            self.measured["{}:{}".format(mod_type, uri)] = time.perf_counter() - start
 
         return ret
 
+    def dump(self, path):
+        """
+        Dump validation results to the JSON file, so the shards can be merged later.
+
+        :param path: path to the JSON file
+        :return: None
+        """
+        self.get_results().dump(path)
+
+    def load(self, path):
+        """
+        Load validation results, dumped by another shard.
+
+        :param path: path to the JSON file
+        :return: dumped data
+        """
+        with sugar.utils.files.fopen(path) as r_h:
+            data = json.loads(r_h.read())
+        self.diagnostics.load(data.get("diagnostics", []))
+        self.loaded_clean.extend(data.get("clean", []))
+        self.measured.update(data.get("costs", {}))
+        return data
+
+    def get_results(self) -> ValidationResults:
+        """
+        Get validation results.
+
+        :return: ValidationResults object
+        """
+        return ValidationResults(diagnostics=self.diagnostics, clean_models=self.clean_models, measured=self.measured,
+                                 clean=self.loaded_clean)
+
     def report(self):
         """
         Print report and return an exit code.
 
         :return:
         """
-        print()
-        if self.infos:
-            sys.stdout.write(self._title.paint("information") + os.linesep)
-        for msg, args in self.infos:
-            self._console.info(msg, *args)
-        if self.warnings:
-            print()
-            sys.stdout.write(self._title.paint("warnings") + os.linesep)
-        for msg, args in self.warnings:
-            self._console.warning(msg, *args)
-        if self.errors:
-            print()
-            sys.stdout.write(self._title.paint("errors") + os.linesep)
-        for msg, args in self.errors:
-            self._console.error(msg, *args)
-
-        failed = int(bool(self.errors + self.warnings))
-        if not failed:
-            self._console.warning("  All seems to be OK!\n")
-        else:
-            self._console.warning("\nPlease fix these issues.")
-
-        return failed
+        return self.get_results().report(self._console)
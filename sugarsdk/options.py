@@ -0,0 +1,31 @@
+# coding: utf-8
+"""
+Defaults and argument types of the tool options.
+
+Shared by the tools and their command line. Uses only the standard
+library, so the parsers are built without the tool dependencies.
+"""
+
+FLAKE_IGNORED = [
+    "E501", "F821", "W503"
+]
+
+FLAKE_EXCLUDE = [
+    "six*", "compat*", "schemelib*"
+]
+
+WORKER_MODES = ["thread", "process", "asyncio"]
+
+
+def parse_levels(levels):
+    """
+    Parse concurrency levels.
+
+    :param levels: comma-separated numbers. Example: '1,2,4,8'.
+    :raises ValueError: if a level is not a positive number
+    :return: sorted list of unique levels
+    """
+    parsed = sorted(set([int(level) for level in levels.split(",") if level.strip()]))
+    if not parsed or parsed[0] < 1:
+        raise ValueError("Concurrency levels should be positive numbers")
+    return parsed
@@ -0,0 +1,163 @@
+# coding: utf-8
+"""
+Runner module profiler.
+
+Calls every task of a runner module with the arguments
+from its examples (or a fixture file) and measures
+latency, memory allocations and hot spots.
+"""
+import io
+import os
+import math
+import time
+import pstats
+import cProfile
+import tracemalloc
+
+import terminaltables
+
+from sugar.lib.outputters.console import ConsoleMessages
+from sugarsdk.tasks import RunnerTasks
+
+
+def percentile(values, pct):
+    """
+    Get percentile of the values (nearest rank).
+
+    :param values: list of numbers
+    :param pct: percentile (0-100)
+    :return: value at the percentile
+    """
+    values = sorted(values)
+    return values[max(0, min(len(values), int(math.ceil(pct / 100.0 * len(values)))) - 1)] if values else 0
+
+
+class ModuleProfiler:
+    """
+    Runner module task profiler.
+    """
+    def __init__(self, args):
+        self._cli_args = args
+        self._tasks = RunnerTasks(args.name, fixture=args.fixture)
+        self._console = ConsoleMessages()
+        self.failures = []
+
+    def _measure_latency(self, func, args, kwargs):
+        """
+        Measure latency of the calls.
+
+        :param func: task callable
+        :param args: positional arguments
+        :param kwargs: keyword arguments
+        :return: list of latencies in seconds
+        """
+        func(*args, **kwargs)  # Warm up
+        latencies = []
+        for _ in range(self._cli_args.repeat):
+            start = time.perf_counter()
+            func(*args, **kwargs)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    def _measure_memory(self, func, args, kwargs):
+        """
+        Measure memory allocated by one call.
+
+        :param func: task callable
+        :param args: positional arguments
+        :param kwargs: keyword arguments
+        :return: tuple of retained and peak allocated bytes
+        """
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        elif hasattr(tracemalloc, "reset_peak"):  # Python 3.9+, otherwise peak may be of the caller
+            tracemalloc.reset_peak()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            func(*args, **kwargs)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if started:  # Tracing of the caller is kept
+                tracemalloc.stop()
+        return current - before, max(0, peak - before)
+
+    def _get_hot_spots(self, func, args, kwargs):
+        """
+        Get cProfile hot spots of the calls.
+
+        :param func: task callable
+        :param args: positional arguments
+        :param kwargs: keyword arguments
+        :return: formatted statistics
+        """
+        profiler = cProfile.Profile()
+        for _ in range(self._cli_args.repeat):
+            profiler.runcall(func, *args, **kwargs)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(self._cli_args.top)
+        return out.getvalue()
+
+    def _profile_call(self, task, func, args, kwargs):
+        """
+        Profile one call of the task.
+
+        :param task: task name
+        :param func: task callable
+        :param args: positional arguments
+        :param kwargs: keyword arguments
+        :return: result dictionary
+        """
+        latencies = self._measure_latency(func, args, kwargs)
+        retained, peak = self._measure_memory(func, args, kwargs)
+        return {
+            "task": task, "args": args, "kwargs": kwargs, "calls": len(latencies),
+            "p50": percentile(latencies, 50), "p95": percentile(latencies, 95),
+            "retained": retained, "peak": peak,
+            "hot_spots": self._get_hot_spots(func, args, kwargs) if self._cli_args.top else None,
+        }
+
+    def profile(self):
+        """
+        Profile all tasks of the module.
+        Calls, which raise, are reported and kept in the failures.
+
+        :return: list of result dictionaries
+        """
+        results = []
+        for task in self._tasks.get_task_names():
+            calls = self._tasks.get_task_args(task)
+            if not calls:
+                self._console.warning("Task '{}' has no examples or fixtures, skipping", task)
+                continue
+            func = self._tasks.get_task(task)
+            for args, kwargs in calls:
+                self._console.info("Profiling '{}.{}' {} {}", self._tasks.uri, task, args, kwargs)
+                try:
+                    results.append(self._profile_call(task, func, args, kwargs))
+                except Exception as exc:
+                    self._console.error("Task '{}' failed: {}", task, exc)
+                    self.failures.append((task, exc))
+        return results
+
+    def report(self, results):
+        """
+        Print profiling results.
+
+        :param results: list of result dictionaries
+        :return: exit code
+        """
+        table_data = [["Task", "Arguments", "p50, ms", "p95, ms", "Retained, KiB", "Peak, KiB"]]
+        for res in results:
+            table_data.append([res["task"], " ".join([repr(arg) for arg in res["args"]]
+                                                     + ["{}={!r}".format(*kwarg) for kwarg in res["kwargs"].items()]),
+                               "{:.3f}".format(res["p50"] * 1000), "{:.3f}".format(res["p95"] * 1000),
+                               "{:.1f}".format(res["retained"] / 1024.0), "{:.1f}".format(res["peak"] / 1024.0)])
+        print(terminaltables.AsciiTable(table_data=table_data).table)
+        for res in results:
+            if res["hot_spots"]:
+                print()
+                self._console.info("Hot spots of '{}':", res["task"])
+                print(res["hot_spots"].strip() + os.linesep)
+
+        return int(bool(self.failures))
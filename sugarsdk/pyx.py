@@ -0,0 +1,208 @@
+# coding: utf-8
+"""
+Cython source support.
+
+Converts Cython (.pyx) implementation source into Python source,
+which can be parsed by astroid, so the validator can compare
+signatures of the compiled implementations to the interface.
+Only the declarations are converted: line numbers are kept.
+"""
+import re
+
+CIMPORT = re.compile(r"^\s*(from\s+\S+\s+)?cimport\s")
+INCLUDE = re.compile(r"^\s*include\s+['\"]")
+COMPILE_DEF = re.compile(r"^(\s*)DEF\s+")
+COMPILE_IF = re.compile(r"^(\s*)(IF|ELIF|ELSE)\b")
+CDEF_BLOCK = re.compile(r"^(\s*)cdef\s*(?:(?:public|readonly)\s*)?:\s*(?:#.*)?$")
+OPAQUE_BLOCK = re.compile(r"^(\s*)(?:cdef\s+extern\b|ctypedef\b|c(?:p)?def\s+(?:packed\s+)?(?:struct|union|enum)\b)"
+                          r".*:\s*(?:#.*)?$")
+OPAQUE = re.compile(r"^(\s*)(?:cdef\s+extern\b|ctypedef\b)")
+CDEF_CLASS = re.compile(r"^(\s*)c(?:p)?def\s+(?:(?:public|api|readonly|final)\s+)*class\s")
+CDEF_FUNC = re.compile(r"^(\s*)c(?:p)?def\s+(?:(?:inline|public|api|static)\s+)*"
+                       r"(?:[\w.]+(?:\[[^\]]*\])?[\s*&]+)*(\w+\s*\()")
+CDEF_VAR = re.compile(r"^(\s*)cdef\s+(?:(?:public|readonly|const)\s+)*(.*)$")
+DEF = re.compile(r"^(\s*def\s+\w+\s*\()(.*)(\)[^)]*:.*)$")
+CLAUSES = re.compile(r"\s+(?:noexcept|nogil|with\s+gil|except\s*[?*+]?\s*[-\w.]*)")
+TYPED = re.compile(r"^(\s*)(?:[\w.]+(?:\[[^\]]*\])?[\s*&]+)+?(\w+\s*(?:\[[^\]]*\])?\s*(?:=.*)?)$", re.S)
+NAME = re.compile(r"^\s*\**\s*(\w+)\s*(?:\[[^\]]*\])?\s*(?:=\s*(.+?))?\s*$", re.S)
+ANNOTATED = re.compile(r"^\s*\**\w+\s*:")
+NOT_NONE = re.compile(r"\s+(?:not|or)\s+None\s*$")
+COMMENT = re.compile(r"\s*#[^'\"]*$")
+CAST = re.compile(r"<(?:const\s+)?[\w.]+(?:\s*\*)*\s*\??>(?=\s*[\w(\[])")
+ADDRESS = re.compile(r"(?<=[(,=\[])(\s*)&(?=\w)")
+
+
+def _scan(source):
+    """
+    Split source by the commas, which are not nested in brackets or strings.
+
+    :param source: source fragment
+    :return: tuple of (parts, depth), where depth is the count of the brackets left open
+    """
+    parts = []
+    depth = start = 0
+    quote = None
+    for idx, char in enumerate(source):
+        if quote is not None:
+            quote = None if char == quote else quote
+        elif char in "'\"":
+            quote = char
+        elif char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+        elif char == "," and not depth:
+            parts.append(source[start:idx])
+            start = idx + 1
+    parts.append(source[start:])
+
+    return parts, depth
+
+
+def _strip_arg_types(args):
+    """
+    Remove C types from the function arguments.
+
+    :param args: arguments source
+    :return: arguments source without types
+    """
+    stripped = []
+    for arg in _scan(args)[0]:
+        if not ANNOTATED.match(arg):
+            name, eq, default = arg.partition("=")
+            arg = NOT_NONE.sub("", name) + eq + default
+            match = TYPED.match(arg)
+            if match is not None:
+                arg = match.group(1) + match.group(2)
+        stripped.append(arg)
+
+    return ",".join(stripped)
+
+
+def _declare(indent, declaration):
+    """
+    Convert C variable declaration into Python assignments.
+
+    :param indent: indentation of the declaration
+    :param declaration: declaration without "cdef", e.g. "int i = 0, j"
+    :return: Python source line
+    """
+    names = []
+    for idx, item in enumerate(_scan(COMMENT.sub("", declaration))[0]):
+        if not idx:
+            match = TYPED.match(item)
+            item = match.group(2) if match is not None else ""
+        match = NAME.match(item)
+        if match is None:
+            names = []
+            break
+        names.append("{} = {}".format(match.group(1), match.group(2) or "None"))
+
+    return indent + ("; ".join(names) or "pass")
+
+
+def _signature(lines, idx):
+    """
+    Get function signature, which might continue on the next lines.
+
+    :param lines: source lines
+    :param idx: index of the line, where the signature starts
+    :return: tuple of (signature, number of the continuation lines)
+    """
+    signature = lines[idx]
+    offset = 0
+    while _scan(signature)[1] > 0 and idx + offset + 1 < len(lines):
+        offset += 1
+        signature = "{} {}".format(signature.rstrip(), lines[idx + offset].strip())
+
+    return signature, offset
+
+
+def _convert(line, lines, idx):
+    """
+    Convert a single Cython statement to Python.
+
+    :param line: the statement line
+    :param lines: all source lines
+    :param idx: index of the statement line
+    :return: tuple of (Python line, number of the consumed continuation lines)
+    """
+    offset = 0
+    if CIMPORT.match(line) or INCLUDE.match(line):
+        line = ""
+    elif OPAQUE.match(line):
+        line = OPAQUE.match(line).group(1) + "pass"
+    elif CDEF_CLASS.match(line):
+        line = CDEF_CLASS.sub(r"\1class ", line)
+    elif CDEF_FUNC.match(line):
+        line, offset = _signature(lines, idx)
+        line = CDEF_FUNC.sub(r"\1def \2", line)
+    elif CDEF_VAR.match(line):
+        match = CDEF_VAR.match(line)
+        line = _declare(match.group(1), match.group(2))
+    else:
+        line = COMPILE_IF.sub(lambda match: match.group(1) + match.group(2).lower(), COMPILE_DEF.sub(r"\1", line))
+        if DEF.match(line) is None and line.lstrip().startswith("def "):
+            line, offset = _signature(lines, idx)
+
+    match = DEF.match(line)
+    if match is not None:
+        head, colon, body = match.group(3).partition(":")
+        line = match.group(1) + _strip_arg_types(match.group(2)) + CLAUSES.sub("", head) + colon + body
+    else:
+        line = ADDRESS.sub(r"\1", CAST.sub("", line))
+
+    return line, offset
+
+
+def _get_indent(line):
+    """
+    Get indentation width of the line.
+
+    :param line: source line
+    :return: width or None, if the line has no statement
+    """
+    stripped = line.lstrip()
+    return None if not stripped or stripped.startswith("#") else len(line) - len(stripped)
+
+
+def pyx_to_py(source):
+    """
+    Convert Cython declarations to Python.
+
+    Blocks of "cdef:" declarations become assignments, external
+    declarations and C structures are replaced with "pass",
+    signatures spanning multiple lines are joined into one line,
+    which is padded by the empty lines.
+
+    :param source: Cython source
+    :return: Python source
+    """
+    lines = source.splitlines()
+    out = []
+    block = None
+    idx = 0
+    while idx < len(lines):
+        line = lines[idx]
+        indent = _get_indent(line)
+        offset = 0
+        if block is not None and indent is not None and indent <= block[0]:
+            block = None
+        if block is not None:
+            if indent is not None and block[1]:
+                line = _declare(line[:indent], line[indent:])
+            elif indent is not None and not block[2]:
+                line = line[:indent] + "pass"
+                block[2] = True
+            else:
+                line = ""
+        elif CDEF_BLOCK.match(line) or OPAQUE_BLOCK.match(line):
+            block = [indent, CDEF_BLOCK.match(line) is not None, False]
+            line = line[:indent] + "if True:"
+        else:
+            line, offset = _convert(line, lines, idx)
+        out.append(line)
+        out.extend([""] * offset)
+        idx += offset + 1
+
+    return "\n".join(out) + "\n"
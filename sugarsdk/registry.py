@@ -0,0 +1,219 @@
+# coding: utf-8
+"""
+Persistent module registry.
+
+Keeps URIs, types, paths, implementations and content hashes
+of all runner and state modules in an SQLite database. The
+registry is refreshed incrementally: directories are only
+stat'ed and a module is hashed again only if any of its files
+has changed, so module discovery costs O(changed). Entries
+are kept per module tree root, so separate checkouts do not
+overwrite each other's hashes.
+"""
+import os
+import json
+import sqlite3
+
+import sugarsdk.utils
+
+IMPL_EXTENSIONS = (".py", ".pyx")
+
+
+class ModuleRegistry:
+    """
+    SQLite-backed registry of the modules.
+    """
+    SCHEMA_VERSION = 2
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS modules (
+        root TEXT NOT NULL,
+        type TEXT NOT NULL,
+        uri TEXT NOT NULL,
+        path TEXT NOT NULL,
+        impls TEXT NOT NULL,
+        mtime REAL NOT NULL,
+        hash TEXT NOT NULL,
+        PRIMARY KEY (root, type, uri)
+    );
+    CREATE INDEX IF NOT EXISTS modules_uri ON modules (root, type, lower(uri));
+    """
+    MARKERS = {"runner": "interface.py", "state": "impl.py"}
+    SKIP_DIRS = ["__pycache__", "_impl"]
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("SUGAR_SDK_REGISTRY") or os.path.join(sugarsdk.utils.get_cache_dir(),
+                                                                                 "registry.sqlite")
+        self._conn = sqlite3.connect(self.path, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+            with self._conn:  # Registry is a cache: older layouts are rebuilt
+                self._conn.execute("DROP TABLE IF EXISTS modules")
+                self._conn.execute("PRAGMA user_version = {}".format(self.SCHEMA_VERSION))
+        self._conn.executescript(self.SCHEMA)
+        self._refreshed = set()
+
+    @staticmethod
+    def _get_mtime(path):
+        """
+        Get latest modification time of the module files.
+
+        :param path: module directory
+        :return: mtime
+        """
+        mtime = os.stat(path).st_mtime
+        for root, dirs, fnames in os.walk(path):
+            dirs[:] = [dname for dname in dirs if dname != "__pycache__"]
+            for name in dirs + fnames:
+                mtime = max(mtime, os.stat(os.path.join(root, name)).st_mtime)
+        return mtime
+
+    @staticmethod
+    def _get_impls(mod_type, path):
+        """
+        Get implementation names of the module.
+
+        :param mod_type: runner or state
+        :param path: module directory
+        :return: sorted list of implementation names
+        """
+        impls = []
+        if mod_type == "runner":
+            imp_path = os.path.join(path, "_impl")
+            for fname in os.listdir(imp_path) if os.path.isdir(imp_path) else []:
+                if fname.endswith(IMPL_EXTENSIONS) and not fname.startswith("_"):
+                    impls.append(os.path.splitext(fname)[0])
+        elif os.path.exists(os.path.join(path, "impl.py")):
+            impls.append("impl")
+        return sorted(set(impls))
+
+    def _scan(self, mod_type, root_path):
+        """
+        Find module directories.
+
+        :param mod_type: runner or state
+        :param root_path: root of the modules of that type
+        :return: dict of URI to path
+        """
+        found = {}
+        for root, dirs, fnames in os.walk(root_path):
+            dirs[:] = [dname for dname in dirs if dname not in self.SKIP_DIRS and not dname.startswith(".")]
+            if root != root_path and self.MARKERS[mod_type] in fnames:
+                found[".".join(os.path.relpath(root, root_path).split(os.path.sep))] = root
+        return found
+
+    def _store(self, root, mod_type, uri, path, mtime):
+        """
+        Hash the module and store its entry.
+
+        :param root: real path of the root of the modules of that type
+        :param mod_type: runner or state
+        :param uri: URI of the module
+        :param path: module directory
+        :param mtime: latest modification time of the module files
+        :return: None
+        """
+        self._conn.execute("INSERT OR REPLACE INTO modules (root, type, uri, path, impls, mtime, hash) "
+                           "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                           (root, mod_type, uri, path, json.dumps(self._get_impls(mod_type, path)), mtime,
+                            sugarsdk.utils.get_tree_digest(path)))
+
+    def refresh(self, mod_type, root_path, force=False):
+        """
+        Update the registry from the module tree.
+        Each tree is refreshed once per session, unless forced.
+
+        :param mod_type: runner or state
+        :param root_path: root of the modules of that type
+        :param force: refresh even if already refreshed
+        :return: None
+        """
+        root = os.path.realpath(root_path)
+        if (mod_type, root) not in self._refreshed or force:
+            known = {row["uri"]: row for row in self._conn.execute(
+                "SELECT uri, path, mtime FROM modules WHERE root = ? AND type = ?", (root, mod_type))}
+            found = self._scan(mod_type, root_path)
+            with self._conn:
+                for uri in set(known) - set(found):
+                    self._conn.execute("DELETE FROM modules WHERE root = ? AND type = ? AND uri = ?",
+                                       (root, mod_type, uri))
+                for uri, path in found.items():
+                    mtime = self._get_mtime(path)
+                    row = known.get(uri)
+                    if row is None or row["path"] != path or row["mtime"] != mtime:
+                        self._store(root, mod_type, uri, path, mtime)
+            self._refreshed.add((mod_type, root))
+
+    def refresh_module(self, mod_type, uri, root_path):
+        """
+        Update the entry of one module, if any of its files has changed,
+        without scanning the whole tree.
+
+        :param mod_type: runner or state
+        :param uri: URI of the module
+        :param root_path: root of the modules of that type
+        :return: None
+        """
+        root = os.path.realpath(root_path)
+        path = os.path.join(root_path, *uri.split("."))
+        with self._conn:
+            if not os.path.isdir(path):
+                self._conn.execute("DELETE FROM modules WHERE root = ? AND type = ? AND uri = ?", (root, mod_type, uri))
+            else:
+                mtime = self._get_mtime(path)
+                row = self._conn.execute("SELECT path, mtime FROM modules WHERE root = ? AND type = ? AND uri = ?",
+                                         (root, mod_type, uri)).fetchone()
+                if row is None or row["path"] != path or row["mtime"] != mtime:
+                    self._store(root, mod_type, uri, path, mtime)
+
+    def get_uris(self, mod_type, root_path):
+        """
+        Get URIs of all modules of the type.
+
+        :param mod_type: runner or state
+        :param root_path: root of the modules of that type
+        :return: sorted list of URIs
+        """
+        root = os.path.realpath(root_path)
+        return [row["uri"] for row in self._conn.execute(
+            "SELECT uri FROM modules WHERE root = ? AND type = ? ORDER BY uri", (root, mod_type))]
+
+    def get(self, mod_type, uri, root_path):
+        """
+        Get module entry.
+
+        :param mod_type: runner or state
+        :param uri: URI of the module
+        :param root_path: root of the modules of that type
+        :return: dict of root, type, uri, path, impls, mtime and hash or None if not registered
+        """
+        row = self._conn.execute("SELECT * FROM modules WHERE root = ? AND type = ? AND uri = ?",
+                                 (os.path.realpath(root_path), mod_type, uri)).fetchone()
+        entry = None
+        if row is not None:
+            entry = dict(zip(row.keys(), row))
+            entry["impls"] = json.loads(entry["impls"])
+        return entry
+
+    def get_collisions(self, mod_type, uri, root_path):
+        """
+        Get registered modules, which would collide with a new module:
+        the same URI in different letter case, modules inside
+        the new one and a module which would contain the new one.
+
+        :param mod_type: runner or state
+        :param uri: URI of the new module
+        :param root_path: root of the modules of that type
+        :return: sorted list of colliding URIs
+        """
+        return [row["uri"] for row in self._conn.execute(
+            "SELECT uri FROM modules WHERE root = ? AND type = ? AND (lower(uri) = lower(?) OR substr(uri, 1, ?) = ? "
+            "OR substr(?, 1, length(uri) + 1) = uri || '.') ORDER BY uri",
+            (os.path.realpath(root_path), mod_type, uri, len(uri) + 1, uri + ".", uri))]
+
+    def close(self):
+        """
+        Close the registry database.
+
+        :return: None
+        """
+        self._conn.close()
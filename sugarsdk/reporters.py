@@ -0,0 +1,213 @@
+# coding: utf-8
+"""
+Reporters of the SDK tools.
+
+Validator, documentation and module generators write their
+progress and reports only through a reporter, so embedding
+tools can silence or capture them.
+"""
+import os
+import sys
+
+import colored
+
+from sugar.lib.outputters.console import ConsoleMessages, TitleOutput
+
+
+class Reporter:
+    """
+    Silent reporter. Base class of the reporters.
+    """
+    def info(self, msg, *args) -> None:
+        """
+        Report information.
+
+        :param msg: message format
+        :param args: message arguments
+        :return: None
+        """
+
+    def warning(self, msg, *args) -> None:
+        """
+        Report warning.
+
+        :param msg: message format
+        :param args: message arguments
+        :return: None
+        """
+
+    def error(self, msg, *args) -> None:
+        """
+        Report error.
+
+        :param msg: message format
+        :param args: message arguments
+        :return: None
+        """
+
+    def title(self, text, style="info") -> None:
+        """
+        Report section title.
+
+        :param text: title text
+        :param style: info, warning or alert
+        :return: None
+        """
+
+    def write(self, text) -> None:
+        """
+        Write raw text.
+
+        :param text: text
+        :return: None
+        """
+
+    def paint(self, text, severity) -> str:
+        """
+        Paint the message text for the buffered output.
+
+        :param text: message text
+        :param severity: info, warning or error
+        :return: painted text
+        """
+        return text
+
+    def paint_title(self, text, style="info") -> str:
+        """
+        Paint the section title for the buffered output.
+
+        :param text: title text
+        :param style: info, warning or alert
+        :return: painted title
+        """
+        return text
+
+
+class ConsoleReporter(Reporter):
+    """
+    Reporter to the console.
+    """
+    COLORS = {"info": "light_green", "warning": "light_yellow", "error": "light_red"}
+
+    def __init__(self):
+        self._console = ConsoleMessages()
+        self._title = TitleOutput()
+
+    def info(self, msg, *args) -> None:
+        """
+        Print information.
+
+        :param msg: message format
+        :param args: message arguments
+        :return: None
+        """
+        self._console.info(msg, *args)
+
+    def warning(self, msg, *args) -> None:
+        """
+        Print warning.
+
+        :param msg: message format
+        :param args: message arguments
+        :return: None
+        """
+        self._console.warning(msg, *args)
+
+    def error(self, msg, *args) -> None:
+        """
+        Print error.
+
+        :param msg: message format
+        :param args: message arguments
+        :return: None
+        """
+        self._console.error(msg, *args)
+
+    def title(self, text, style="info") -> None:
+        """
+        Print painted section title.
+
+        :param text: title text
+        :param style: info, warning or alert
+        :return: None
+        """
+        self.write(self.paint_title(text, style) + os.linesep)
+
+    def write(self, text) -> None:
+        """
+        Write raw text to stdout.
+
+        :param text: text
+        :return: None
+        """
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    def paint(self, text, severity) -> str:
+        """
+        Paint the message text in the color of its severity.
+
+        :param text: message text
+        :param severity: info, warning or error
+        :return: painted text
+        """
+        return "{}{}{}".format(colored.fg(self.COLORS.get(severity, "white")), text, colored.attr("reset"))
+
+    def paint_title(self, text, style="info") -> str:
+        """
+        Paint the section title.
+
+        :param text: title text
+        :param style: info, warning or alert
+        :return: painted title
+        """
+        self._title.add(text, style)
+        return self._title.paint(text)
+
+
+class CollectingReporter(Reporter):
+    """
+    Reporter, which keeps all messages and written text in memory.
+    """
+    def __init__(self):
+        self.messages = []
+        self.text = []
+
+    def write(self, text) -> None:
+        """
+        Keep raw text.
+
+        :param text: text
+        :return: None
+        """
+        self.text.append(text)
+
+    def info(self, msg, *args) -> None:
+        """
+        Keep formatted information message.
+
+        :param msg: message format
+        :param args: message arguments
+        :return: None
+        """
+        self.messages.append(("info", msg.format(*args)))
+
+    def warning(self, msg, *args) -> None:
+        """
+        Keep formatted warning message.
+
+        :param msg: message format
+        :param args: message arguments
+        :return: None
+        """
+        self.messages.append(("warning", msg.format(*args)))
+
+    def error(self, msg, *args) -> None:
+        """
+        Keep formatted error message.
+
+        :param msg: message format
+        :param args: message arguments
+        :return: None
+        """
+        self.messages.append(("error", msg.format(*args)))
@@ -0,0 +1,148 @@
+# coding: utf-8
+"""
+Structured results of the SDK tools.
+"""
+import os
+import json
+
+from sugarsdk.diagnostics import DiagnosticStore, SEVERITIES
+
+
+class ValidationResults:
+    """
+    Results of the module validation.
+    """
+    def __init__(self, diagnostics=None, clean_models=None, measured=None, clean=None):
+        self.diagnostics = diagnostics if diagnostics is not None else DiagnosticStore()
+        self.clean_models = clean_models or []
+        self.measured = measured or {}
+        # "type:uri" names of the clean modules, including those loaded from the shards
+        self.clean = sorted(set(clean or []) | set(["{}:{}".format(model.mod_type, model.uri)
+                                                    for model in self.clean_models]))
+
+    @property
+    def infos(self) -> list:
+        """
+        Information messages.
+
+        :return: list of (message, args) tuples
+        """
+        return self.diagnostics.get_messages("info")
+
+    @property
+    def warnings(self) -> list:
+        """
+        Warning messages.
+
+        :return: list of (message, args) tuples
+        """
+        return self.diagnostics.get_messages("warning")
+
+    @property
+    def errors(self) -> list:
+        """
+        Error messages.
+
+        :return: list of (message, args) tuples
+        """
+        return self.diagnostics.get_messages("error")
+
+    @property
+    def modules(self) -> list:
+        """
+        Validated modules.
+
+        :return: list of "type:uri" names
+        """
+        return sorted(self.measured)
+
+    @property
+    def failed(self) -> bool:
+        """
+        Validation found issues.
+
+        :return: True if there are warnings or errors
+        """
+        return bool(self.diagnostics.get(severity="error") or self.diagnostics.get(severity="warning"))
+
+    def get_messages(self, section) -> list:
+        """
+        Get formatted messages.
+
+        :param section: infos, warnings or errors
+        :return: list of message strings
+        """
+        return [msg.format(*args) for msg, args in getattr(self, section)]
+
+    def dump(self, path) -> None:
+        """
+        Dump the results to the JSON file, so the shards can be merged later.
+
+        :param path: path to the JSON file
+        :return: None
+        """
+        data = {"clean": self.clean,
+                "costs": self.measured, "diagnostics": self.diagnostics.to_list()}
+        with open(path, "w") as r_h:
+            json.dump(data, r_h, indent=2)
+
+    def render(self, reporter) -> str:
+        """
+        Render grouped report. Same messages at many places are shown once, with the places listed.
+
+        :param reporter: Reporter object, used to paint the text
+        :return: report text
+        """
+        out = [""]
+        titles = {"info": ("information", "info"), "warning": ("warnings", "warning"), "error": ("errors", "alert")}
+        for severity in SEVERITIES:
+            groups = self.diagnostics.group(severity)
+            if not groups:
+                continue
+            if severity != "info":
+                out.append("")
+            out.append(reporter.paint_title(*titles[severity]))
+            for code, message, locations in groups:
+                line = "{} {}".format(code, message)
+                if len(locations) > 1:
+                    line = "{} [{} places: {}]".format(line, len(locations), ", ".join(locations))
+                out.append(reporter.paint(line, severity))
+
+        if not self.failed:
+            out.append(reporter.paint("  All seems to be OK!\n", "warning"))
+        else:
+            out.append(reporter.paint("\nPlease fix these issues.", "warning"))
+
+        return os.linesep.join(out) + os.linesep
+
+    def report(self, reporter) -> int:
+        """
+        Report the results in one write.
+
+        :param reporter: Reporter object
+        :return: exit code
+        """
+        reporter.write(self.render(reporter))
+
+        return int(self.failed)
+
+
+class DocumentationResults:
+    """
+    Results of the documentation generation.
+    """
+    def __init__(self, out, files=None, mod_toc=None):
+        self.out = out
+        self.files = files or []
+        self.mod_toc = mod_toc or {"mod_runner": [], "mod_state": []}
+
+
+class ScaffoldResults:
+    """
+    Results of the module generation.
+    """
+    def __init__(self, uri, mod_type, path, files=None):
+        self.uri = uri
+        self.mod_type = mod_type
+        self.path = path
+        self.files = files or []
@@ -0,0 +1,270 @@
+# coding: utf-8
+"""
+Compiled return data schemes of the runner modules.
+
+A scheme.yaml describes return data of every task of the
+runner interface:
+
+    TestRunnerInterface:
+      ping:
+        text: str
+        code: int|none
+        items:
+          - str
+
+Strings are type names ("str", "int", "float", "bool", "list",
+"dict", "any", "none", joined by "|" for a union). Other scalars
+are sample values, then their type is expected. A mapping requires
+all its keys, unless the key type allows "none". A list of one
+element describes every item of the list.
+
+Schemes are compiled once into validator callables. Runners
+can check their results at runtime (e.g. in debug mode) with
+check_result().
+"""
+import os
+
+import sugar.lib.exceptions
+import sugar.utils.files
+
+from sugar.lib.compat import yaml
+
+TYPES = {
+    "str": (str,),
+    "int": (int,),
+    "float": (float, int),
+    "bool": (bool,),
+    "list": (list, tuple),
+    "dict": (dict,),
+    "none": (type(None),),
+}
+
+
+class SchemeError(sugar.lib.exceptions.SugarException):
+    """
+    Scheme cannot be compiled or data does not match it.
+    """
+
+
+class _TypeValidator:
+    """
+    Validator of a type (or union of the types).
+    """
+    def __init__(self, spec, types):
+        self.spec = spec
+        self.types = types
+        self.exclude_bool = types is not None and bool not in types
+
+    def __call__(self, value, at):
+        """
+        Validate the value.
+
+        :param value: data
+        :param at: path in the data for the error messages
+        :return: list of errors
+        """
+        errors = []
+        if self.types is not None and (not isinstance(value, self.types)
+                                       or (self.exclude_bool and isinstance(value, bool))):
+            errors.append("'{}' should be {}, not {}".format(at or "/", self.spec, type(value).__name__))
+        return errors
+
+
+class _MappingValidator:
+    """
+    Validator of a mapping with the required keys.
+    """
+    def __init__(self, fields):
+        self.fields = fields
+
+    def __call__(self, value, at):
+        """
+        Validate the value.
+
+        :param value: data
+        :param at: path in the data for the error messages
+        :return: list of errors
+        """
+        errors = []
+        if not isinstance(value, dict):
+            errors.append("'{}' should be a mapping, not {}".format(at or "/", type(value).__name__))
+        else:
+            for key, f_validate, nullable in self.fields:
+                if key in value:
+                    errors.extend(f_validate(value[key], "{}/{}".format(at, key)))
+                elif not nullable:
+                    errors.append("'{}/{}' is missing".format(at, key))
+        return errors
+
+
+class _ListValidator:
+    """
+    Validator of a list and of its items.
+    """
+    def __init__(self, item_validator):
+        self.item_validator = item_validator
+
+    def __call__(self, value, at):
+        """
+        Validate the value.
+
+        :param value: data
+        :param at: path in the data for the error messages
+        :return: list of errors
+        """
+        errors = []
+        if not isinstance(value, (list, tuple)):
+            errors.append("'{}' should be a list, not {}".format(at or "/", type(value).__name__))
+        else:
+            for idx, item in enumerate(value if self.item_validator is not None else []):
+                errors.extend(self.item_validator(item, "{}/{}".format(at, idx)))
+        return errors
+
+
+def _compile_type(spec, path):
+    """
+    Compile a type name (or union of the type names).
+
+    :param spec: type names, separated by "|"
+    :param path: path in the scheme for the error messages
+    :raises SchemeError: if type is unknown
+    :return: tuple of (validator, nullable)
+    """
+    names = [name.strip() for name in spec.split("|")]
+    unknown = [name for name in names if name not in TYPES and name != "any"]
+    if unknown:
+        raise SchemeError("Unknown type '{}' at '{}'".format(", ".join(unknown), path or "/"))
+    types = None if "any" in names else tuple([p_type for name in names for p_type in TYPES[name]])
+
+    return _TypeValidator(spec, types), types is None or "none" in names
+
+
+def _compile(spec, path=""):
+    """
+    Compile the scheme node.
+
+    :param spec: scheme node
+    :param path: path in the scheme for the error messages
+    :raises SchemeError: if the scheme is invalid
+    :return: tuple of (validator, nullable)
+    """
+    if isinstance(spec, dict):
+        ret = _MappingValidator([(key, ) + _compile(sub_spec, "{}/{}".format(path, key))
+                                 for key, sub_spec in spec.items()]), False
+    elif isinstance(spec, list):
+        if len(spec) > 1:
+            raise SchemeError("List at '{}' should describe its items with only one element".format(path or "/"))
+        ret = _ListValidator(_compile(spec[0], path + "/*")[0] if spec else None), False
+    elif isinstance(spec, str):
+        ret = _compile_type(spec, path)
+    elif spec is None:
+        ret = _compile_type("none", path)
+    else:
+        ret = _compile_type({bool: "bool", int: "int", float: "float"}.get(type(spec), "any"), path)
+
+    return ret
+
+
+def compile_scheme(spec):
+    """
+    Compile the scheme of a task return data into a validator.
+    SchemeError of the invalid scheme is passed through.
+
+    :param spec: scheme of the task
+    :return: callable, which takes data and returns a list of errors
+    """
+    validate = _compile(spec)[0]
+
+    return lambda data: validate(data, "")
+
+
+class ModuleScheme:
+    """
+    Compiled scheme of the runner module.
+    """
+    def __init__(self, scheme):
+        self.interface = None
+        self.validators = {}
+        self.errors = {}
+        self.error = None
+        try:
+            self.interface, tasks = self._get_tasks(scheme)
+        except SchemeError as exc:
+            self.error = str(exc)
+            tasks = {}
+        for task, spec in tasks.items():
+            try:
+                self.validators[task] = compile_scheme(spec)
+            except SchemeError as exc:
+                self.errors[task] = str(exc)
+
+    @staticmethod
+    def _get_tasks(scheme):
+        """
+        Get the interface name and the task schemes.
+
+        :param scheme: loaded scheme.yaml
+        :raises SchemeError: if the scheme or its interface is not a mapping
+        :return: tuple of (interface name, dict of task schemes)
+        """
+        scheme = scheme or {}
+        if not isinstance(scheme, dict):
+            raise SchemeError("Scheme should map the interface name to its tasks, not {}".format(
+                type(scheme).__name__))
+        interface = next(iter(scheme), None)
+        tasks = scheme.get(interface) or {}
+        if not isinstance(tasks, dict):
+            raise SchemeError("Interface '{}' should map task names to their schemes, not {}".format(
+                interface, type(tasks).__name__))
+        return interface, tasks
+
+    def check(self, task, data):
+        """
+        Check return data of the task.
+
+        :param task: task name
+        :param data: return data
+        :return: list of errors (empty if the task has no scheme)
+        """
+        validate = self.validators.get(task)
+        return validate(data) if validate is not None else []
+
+
+_SCHEMES = {}
+
+
+def get_module_scheme(module_path):
+    """
+    Get compiled scheme of the runner module.
+    Compiled schemes are cached until scheme.yaml changes.
+
+    :param module_path: path to the runner module directory
+    :return: ModuleScheme object
+    """
+    scheme_path = os.path.join(module_path, "scheme.yaml")
+    mtime = os.path.getmtime(scheme_path) if os.path.exists(scheme_path) else None
+    cached = _SCHEMES.get(scheme_path)
+    if cached is None or cached[0] != mtime:
+        scheme = None
+        if mtime is not None:
+            with sugar.utils.files.fopen(scheme_path) as s_h:
+                scheme = yaml.load(s_h.read())
+        cached = _SCHEMES[scheme_path] = (mtime, ModuleScheme(scheme))
+    return cached[1]
+
+
+def check_result(module_path, task, data):
+    """
+    Check return data of the runner task against its scheme.
+    Meant for the debug mode of the runners.
+
+    :param module_path: path to the runner module directory
+    :param task: task name
+    :param data: return data
+    :raises SchemeError: if the data does not match the scheme
+    :return: data
+    """
+    errors = get_module_scheme(module_path).check(task, data)
+    if errors:
+        raise SchemeError("Return data of the task '{}' does not match the scheme: {}".format(task, "; ".join(errors)))
+    return data
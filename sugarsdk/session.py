@@ -0,0 +1,88 @@
+# coding: utf-8
+"""
+Shared state of the SDK tools.
+
+Tools, which run in one process (e.g. stages of the
+"sugar-sdk pipeline"), discover modules once through
+one registry and share parsed module models. A model
+is parsed again only when its module has changed.
+"""
+from sugarsdk.model import ModuleModel
+from sugarsdk.registry import ModuleRegistry
+
+
+class Session:
+    """
+    Module registry and parsed models, shared in the process.
+    """
+    def __init__(self):
+        self._registry = None
+        self._models = {}
+
+    @property
+    def registry(self):
+        """
+        Module registry.
+
+        :return: ModuleRegistry object
+        """
+        if self._registry is None:
+            self._registry = ModuleRegistry()
+        return self._registry
+
+    def close(self):
+        """
+        Close the registry and drop parsed models.
+
+        :return: None
+        """
+        if self._registry is not None:
+            self._registry.close()
+            self._registry = None
+        self._models = {}
+
+    def get_model(self, uri, mod_type, root_path):
+        """
+        Get parsed model of the module.
+        Models are kept while the registry has the same hash of the module.
+
+        :param uri: URI of the module
+        :param mod_type: runner or state
+        :param root_path: root of the modules of that type
+        :return: ModuleModel object
+        """
+        entry = self.registry.get(mod_type, uri, root_path)
+        digest = entry["hash"] if entry else None
+        key = (mod_type, uri, root_path)
+        cached = self._models.get(key)
+        if cached is None or digest is None or cached[0] != digest:
+            cached = self._models[key] = (digest, ModuleModel(uri, mod_type, root_path))
+        return cached[1]
+
+
+_SESSION = None
+
+
+def get_session():
+    """
+    Get the session of the process.
+
+    :return: Session object
+    """
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = Session()
+    return _SESSION
+
+
+def reset_session():
+    """
+    Close the session of the process. The next tool opens
+    the registry and parses the module models again.
+
+    :return: None
+    """
+    global _SESSION
+    if _SESSION is not None:
+        _SESSION.close()
+    _SESSION = None
@@ -0,0 +1,135 @@
+# coding: utf-8
+"""
+Deterministic cost-balanced sharding.
+
+Splits modules (or files) across N CI nodes. Each item has a
+recorded cost estimate (seconds, measured by previous runs), and
+items are assigned to the least loaded shard, heaviest first.
+The same items with the same cost book always produce the same
+shards on every node, so the shard runs only read the book (it
+should be shared or committed) and only "sugar-sdk merge" records
+the costs, measured by the shards.
+"""
+import os
+import json
+import argparse
+import statistics
+
+import sugarsdk.utils
+
+
+def parse_shard(value):
+    """
+    Parse shard specification "I/N", where I is 1-based shard index.
+    Used as argparse type of the "--shard" option.
+
+    :param value: shard specification or None
+    :raises ArgumentTypeError: if shard specification is invalid
+    :return: tuple of (index, total) or None
+    """
+    shard = None
+    if value:
+        try:
+            index, total = [int(part) for part in value.split("/", 1)]
+        except ValueError:
+            raise argparse.ArgumentTypeError("shard should be specified as I/N, e.g. 1/4")
+        if not 1 <= index <= total:
+            raise argparse.ArgumentTypeError("shard index should be from 1 to {}".format(total))
+        shard = (index, total)
+    return shard
+
+
+class CostBook:
+    """
+    Recorded per-item cost estimates of the SDK tools.
+    """
+    SMOOTHING = 0.5
+
+    def __init__(self, kind, path=None):
+        self.kind = kind
+        self.path = (path or os.environ.get("SUGAR_SDK_COSTS")
+                     or os.path.join(sugarsdk.utils.get_cache_dir(), "costs.json"))
+        self._data = {}
+        if os.path.exists(self.path):
+            with open(self.path) as c_h:
+                try:
+                    self._data = json.load(c_h)
+                except ValueError:
+                    self._data = {}
+        self._costs = self._data.setdefault(kind, {})
+
+    def get(self, item, default=None):
+        """
+        Get recorded cost of the item.
+
+        :param item: item name
+        :param default: cost, if nothing is recorded
+        :return: cost in seconds
+        """
+        return self._costs.get(item, default)
+
+    def get_default(self):
+        """
+        Get cost estimate for the items that were never measured.
+
+        :return: median of the recorded costs or 1.0
+        """
+        return statistics.median(self._costs.values()) if self._costs else 1.0
+
+    def record(self, item, cost):
+        """
+        Record measured cost of the item, smoothed with the previous estimate.
+
+        :param item: item name
+        :param cost: measured cost in seconds
+        :return: None
+        """
+        previous = self._costs.get(item)
+        self._costs[item] = cost if previous is None else previous * self.SMOOTHING + cost * (1 - self.SMOOTHING)
+
+    def update(self, costs):
+        """
+        Record many measured costs at once.
+
+        :param costs: map of items to the costs
+        :return: None
+        """
+        for item, cost in costs.items():
+            self.record(item, cost)
+
+    def save(self):
+        """
+        Save the cost book.
+
+        :return: None
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w") as c_h:
+            json.dump(self._data, c_h, indent=2, sort_keys=True)
+
+
+def select_shard(items, shard, costs=None, key=None):
+    """
+    Select items of the shard.
+
+    :param items: list of items
+    :param shard: tuple of (index, total), as returned by parse_shard or None for all items
+    :param costs: CostBook object or None to balance by count
+    :param key: function to get item name for the cost book. Default: str()
+    :return: list of the items of the shard, in the original order
+    """
+    if shard is None:
+        selected = list(items)
+    else:
+        index, total = shard
+        key = key or str
+        default = costs.get_default() if costs is not None else 1.0
+        weights = {key(item): costs.get(key(item), default) if costs is not None else 1.0 for item in items}
+        loads = [0.0 for _ in range(total)]
+        assigned = {}
+        for name in sorted(weights, key=lambda name: (-weights[name], name)):
+            idx = loads.index(min(loads))
+            loads[idx] += weights[name]
+            assigned[name] = idx
+        selected = [item for item in items if assigned[key(item)] == index - 1]
+    return selected
@@ -0,0 +1,132 @@
+# coding: utf-8
+"""
+Runner module tasks.
+
+Loads a runner module through the virtual loader and
+prepares its tasks with the arguments, taken from the
+module examples (or from a local fixture file) to be
+called directly, e.g. for profiling or benchmarking.
+"""
+import os
+import ast
+import shlex
+
+import sugar.modules.runners
+import sugar.utils.files
+import sugar.lib.exceptions
+
+from sugar.lib.compat import yaml
+from sugar.lib.loader.virtual import VirtualModuleLoader
+
+
+def get_interface_tasks(source):
+    """
+    Get task names of the runner interface: public methods of its class.
+
+    :param source: source of the interface module
+    :return: list of task names
+    """
+    names = []
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.ClassDef):
+            names = [func.name for func in node.body
+                     if isinstance(func, ast.FunctionDef) and not func.name.startswith("_")]
+            break
+    return names
+
+
+def parse_commandline(commandline, task):
+    """
+    Parse example command line into the task arguments.
+
+    Example:
+
+        sugar \\* mymodule.hello "something"
+        sugar \\* mymodule.hello name="something"
+
+    :param commandline: "commandline" section of the examples (one call per line)
+    :param task: name of the task
+    :return: list of (args, kwargs) tuples
+    """
+    calls = []
+    for line in (commandline or "").splitlines():
+        try:
+            tokens = shlex.split(line)
+        except ValueError:
+            tokens = []
+        for idx, token in enumerate(tokens):
+            if token == task or token.endswith(".{}".format(task)):
+                args, kwargs = [], {}
+                for arg in tokens[idx + 1:]:
+                    key, sep, value = arg.partition("=")
+                    if sep and key.isidentifier():
+                        kwargs[key] = yaml.load(value) if value else value
+                    else:
+                        args.append(yaml.load(arg) if arg else arg)
+                calls.append((args, kwargs))
+                break
+    return calls
+
+
+class RunnerTasks:
+    """
+    Tasks of a runner module.
+    """
+    def __init__(self, uri, fixture=None):
+        self.uri = uri
+        self._loader = VirtualModuleLoader(sugar.modules.runners)
+        self._path = os.path.join(self._loader.root_path, *uri.split("."))
+        if not os.path.exists(os.path.join(self._path, "interface.py")):
+            raise sugar.lib.exceptions.SugarException("Runner module '{}' was not found.".format(uri))
+        self._fixture = self._load_yaml(fixture) if fixture else None
+        self._examples = None
+
+    @staticmethod
+    def _load_yaml(path):
+        """
+        Load YAML file.
+
+        :param path: path to the file
+        :return: loaded data or empty dict
+        """
+        with sugar.utils.files.fopen(path) as y_h:
+            return yaml.load(y_h.read()) or {}
+
+    def get_task_names(self):
+        """
+        Get task names from the module interface.
+
+        :return: list of task names
+        """
+        with sugar.utils.files.fopen(os.path.join(self._path, "interface.py")) as src_h:
+            return get_interface_tasks(src_h.read())
+
+    def get_task_args(self, task):
+        """
+        Get argument sets for the task.
+
+        Fixture file is a mapping of task names to the list of calls:
+
+            hello:
+              - args: ["something"]
+              - kwargs: {name: "something"}
+
+        :param task: task name
+        :return: list of (args, kwargs) tuples
+        """
+        if self._fixture is not None:
+            calls = [(call.get("args", []), call.get("kwargs", {})) for call in self._fixture.get(task) or []]
+        else:
+            if self._examples is None:
+                self._examples = self._load_yaml(os.path.join(self._path, "examples.yaml"))
+            calls = parse_commandline((self._examples.get(task) or {}).get("commandline"), task)
+        return calls
+
+    def get_task(self, task):
+        """
+        Get task callable.
+
+        :param task: task name
+        :return: callable
+        """
+        return self._loader["{}.{}".format(self.uri, task)]
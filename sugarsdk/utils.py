@@ -3,6 +3,8 @@
 General utilities for the performing generic tasks.
 """
 import os
+import ast
+import hashlib
 
 
 def get_template(name):
@@ -14,3 +16,144 @@ def get_template(name):
     """
     with open(os.path.join(os.path.dirname(__file__), "stubs/{}.jinja2".format(name))) as thl:
         return thl.read()
+
+
+def get_cache_dir(*parts):
+    """
+    Get SDK cache directory (created on demand).
+    Can be overridden by SUGAR_SDK_CACHE_DIR environment variable.
+
+    :param parts: subdirectories inside the cache directory
+    :return: path to the cache directory
+    """
+    root = os.environ.get("SUGAR_SDK_CACHE_DIR") or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "sugar-sdk")
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def get_digest(*chunks):
+    """
+    Get SHA256 hex digest of the data chunks.
+
+    :param chunks: str or bytes
+    :return: hex digest
+    """
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        if not isinstance(chunk, bytes):
+            chunk = str(chunk).encode("utf-8")
+        digest.update(chunk)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+_FILES = {}
+
+
+def _get_file_entry(path):
+    """
+    Get memoised entry of the file. Entries are shared by all tools,
+    which run in one process (e.g. stages of "sugar-sdk pipeline"),
+    and are dropped when the file changes. OSError of the
+    unreadable file is not handled.
+
+    :param path: path to the file
+    :return: dict of stat key, data, digest and tree
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    entry = _FILES.get(path)
+    if entry is None or entry["key"] != key:
+        with open(path, "rb") as fh_d:
+            entry = _FILES[path] = {"key": key, "data": fh_d.read(), "digest": None, "tree": None}
+    return entry
+
+
+def clear_files():
+    """
+    Drop all memoised files, so they are read and parsed again
+    (e.g. by every timed run of the benchmarks).
+
+    :return: None
+    """
+    _FILES.clear()
+
+
+def read_file(path):
+    """
+    Get content of the file (memoised until the file changes).
+    OSError of the unreadable file is not handled.
+
+    :param path: path to the file
+    :return: bytes
+    """
+    return _get_file_entry(path)["data"]
+
+
+def parse_file(path):
+    """
+    Get parsed Python source of the file (memoised until the file changes).
+    The tree is shared: do not modify it. OSError of the unreadable
+    file and SyntaxError of the invalid source are not handled.
+
+    :param path: path to the file
+    :return: ast.Module
+    """
+    entry = _get_file_entry(path)
+    if entry["tree"] is None:
+        entry["tree"] = ast.parse(entry["data"], filename=path)
+    return entry["tree"]
+
+
+def get_file_digest(path):
+    """
+    Get SHA256 hex digest of the file content.
+
+    :param path: path to the file
+    :return: hex digest or None, if file cannot be read
+    """
+    try:
+        entry = _get_file_entry(path)
+        if entry["digest"] is None:
+            entry["digest"] = get_digest(entry["data"])
+        digest = entry["digest"]
+    except (IOError, OSError):
+        digest = None
+    return digest
+
+
+def get_tree_digest(path):
+    """
+    Get SHA256 hex digest of all files in the directory tree,
+    including their relative paths.
+
+    :param path: path to the directory
+    :return: hex digest
+    """
+    chunks = []
+    for root, dirs, fnames in os.walk(path):
+        dirs[:] = sorted([dname for dname in dirs if dname != "__pycache__"])
+        for fname in sorted(fnames):
+            if not fname.endswith((".pyc", ".pyo")):
+                f_path = os.path.join(root, fname)
+                chunks.extend([os.path.relpath(f_path, path), get_file_digest(f_path)])
+    return get_digest(*chunks)
+
+
+def get_module_name(path):
+    """
+    Get dotted module name of the file and the root it is importable from.
+
+    :param path: path to the Python file
+    :return: tuple of root directory and module name
+    """
+    path = os.path.abspath(path)
+    parts = [] if os.path.basename(path) == "__init__.py" else [os.path.splitext(os.path.basename(path))[0]]
+    root = os.path.dirname(path)
+    while os.path.exists(os.path.join(root, "__init__.py")):
+        parts.insert(0, os.path.basename(root))
+        root = os.path.dirname(root)
+    return root, ".".join(parts)
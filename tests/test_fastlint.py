@@ -0,0 +1,56 @@
+# coding: utf-8
+"""
+Tests of the fast checkers: they report the same messages as the pylint plugins.
+"""
+import os
+import sys
+import json
+import shutil
+import subprocess
+
+import pytest
+
+import sugarsdk.lint
+import sugarsdk.fastlint
+
+pytest.importorskip("pylint")
+
+# Sources with the issues, kept as text files, so the checks of the tests do not report them
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "fastlint")
+PLUGINS = ["backslashy", "docstring_single_line", "docstring_triplequotes", "multireturns", "pep287",
+           "pep8_emptylines"]
+
+
+def _get_pylint_messages(paths, msgids):
+    """
+    Run pylint with the Sugar plugins.
+
+    :param paths: file paths
+    :param msgids: message ids to enable
+    :return: set of (file name, line, message id) tuples
+    """
+    env = sugarsdk.lint.get_linter_env()
+    env["PYTHONPATH"] = os.pathsep.join([env["PYTHONPATH"]] + sys.path)
+    proc = subprocess.run([sys.executable, "-m", "pylint", "--disable=all", "--enable={}".format(",".join(msgids)),
+                           "--load-plugins={}".format(",".join(PLUGINS)), "--output-format=json"] + paths,
+                          env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    assert proc.stdout.strip(), proc.stderr
+    return {(os.path.basename(msg["path"]), msg["line"], msg["message-id"]) for msg in json.loads(proc.stdout)}
+
+
+def test_same_messages(tmp_path):
+    """
+    Both engines report the same messages at the same lines.
+
+    :param tmp_path: temporary directory
+    :return: None
+    """
+    paths = []
+    for fname in sorted(os.listdir(FIXTURES)):
+        paths.append(str(tmp_path / "{}.py".format(os.path.splitext(fname)[0])))
+        shutil.copy(os.path.join(FIXTURES, fname), paths[-1])
+    fast = {(os.path.basename(msg["path"]), msg["line"], msg["message-id"])
+            for msg in sugarsdk.fastlint.check_files(paths, jobs=1)}
+
+    assert len({msg[2] for msg in fast}) > 10
+    assert fast == _get_pylint_messages(paths, sorted(sugarsdk.fastlint.MESSAGES))
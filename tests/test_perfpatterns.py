@@ -0,0 +1,167 @@
+# coding: utf-8
+"""
+Tests of the performance anti-pattern checkers.
+"""
+import textwrap
+
+import pytest
+
+pytest.importorskip("pylint")
+
+import astroid  # noqa: E402 pylint: disable=C0413
+from pylint.testutils import CheckerTestCase  # noqa: E402 pylint: disable=C0413
+
+from sugarsdk.linting import perfpatterns  # noqa: E402 pylint: disable=C0413
+
+RUNNER_PATH = "/src/sugar/modules/runners/system/test/interface.py"
+IMPL_PATH = "/src/sugar/modules/runners/system/test/_impl/linux.py"
+
+CASES = [
+    ("W8101", perfpatterns.FileOpenInLoopChecker, RUNNER_PATH,
+     """
+     def task(paths):
+         return [[line for line in open(path)] for path in paths]
+     """,
+     """
+     def task(path):
+         return [line for line in open(path)]
+     """),
+    ("W8102", perfpatterns.StringConcatInLoopChecker, RUNNER_PATH,
+     """
+     def task(items):
+         out = ""
+         for item in items:
+             out += "{},".format(item)
+         return out
+     """,
+     """
+     def task(items):
+         total = 0
+         for item in items:
+             total += item
+         return total
+     """),
+    ("W8103", perfpatterns.ReflectionInLoopChecker, RUNNER_PATH,
+     """
+     def task(obj, names):
+         return [getattr(obj, name) for name in names]
+     """,
+     """
+     def task(obj, names):
+         return [getattr(obj, "value") for name in names]
+     """),
+    ("W8104", perfpatterns.RegexCompilePerCallChecker, RUNNER_PATH,
+     """
+     import re
+
+     def task(text):
+         return re.compile("[a-z]+").findall(text)
+     """,
+     """
+     import re
+
+     WORDS = re.compile("[a-z]+")
+
+     def task(text):
+         return WORDS.findall(text)
+     """),
+    ("W8105", perfpatterns.SubprocessInLoopChecker, RUNNER_PATH,
+     """
+     import subprocess
+
+     def task(hosts):
+         while subprocess.call(["ping", "-c1", hosts[0]]):
+             hosts.pop(0)
+     """,
+     """
+     import subprocess
+
+     def task(hosts):
+         return subprocess.call(["ping", "-c1"] + hosts)
+     """),
+    ("W8106", perfpatterns.ImplSlotsChecker, IMPL_PATH,
+     """
+     class LinuxImpl:
+
+         def __init__(self):
+             self.value = 1
+     """,
+     """
+     class LinuxImpl:
+         __slots__ = ("value",)
+
+         def __init__(self):
+             self.value = 1
+     """),
+]
+
+LOOPS = [
+    ("[x for x in open(p)]", False),
+    ("[[y for y in open(p)] for z in zz]", True),
+    ("[y for z in zz for y in open(p)]", True),
+    ("[z for z in zz if open(p)]", True),
+    ("while open(p):\n    pass", True),
+    ("for z in open(p):\n    pass", False),
+    ("for z in zz:\n    open(p)", True),
+]
+
+
+def _get_messages(checker_class, path, code):
+    """
+    Run the checker on the code.
+
+    :param checker_class: checker class
+    :param path: file path of the module
+    :param code: source code
+    :return: list of message IDs
+    """
+    class PerfTestCase(CheckerTestCase):
+        CHECKER_CLASS = checker_class
+
+    test_case = PerfTestCase()
+    test_case.setup_method()
+    test_case.walk(astroid.parse(textwrap.dedent(code), path=path))
+    msg_ids = {msg[1]: msg_id for msg_id, msg in checker_class.msgs.items()}
+    return [msg_ids.get(msg.msg_id, msg.msg_id) for msg in test_case.linter.release_messages()]
+
+
+@pytest.mark.parametrize("msg_id, checker_class, path, positive, negative", CASES, ids=[case[0] for case in CASES])
+def test_checker(msg_id, checker_class, path, positive, negative):
+    """
+    Anti-pattern is reported, the fixed code is not.
+
+    :param msg_id: expected message ID
+    :param checker_class: checker class
+    :param path: file path of the module
+    :param positive: code with the anti-pattern
+    :param negative: fixed code
+    :return: None
+    """
+    assert _get_messages(checker_class, path, positive) == [msg_id]
+    assert _get_messages(checker_class, path, negative) == []
+
+
+def test_outside_of_modules():
+    """
+    Files out of runner and state modules are not checked.
+
+    :return: None
+    """
+    code = """
+    def task(paths):
+        return [open(path) for path in paths]
+    """
+    assert _get_messages(perfpatterns.FileOpenInLoopChecker, "/src/sugar/lib/utils.py", code) == []
+
+
+@pytest.mark.parametrize("code, looped", LOOPS)
+def test_in_loop(code, looped):
+    """
+    Only repeatedly evaluated nodes are in a loop.
+
+    :param code: code with the call
+    :param looped: the call is in a loop
+    :return: None
+    """
+    call = next(astroid.parse(code).nodes_of_class(astroid.Call))
+    assert perfpatterns.in_loop(call) is looped
@@ -0,0 +1,100 @@
+# coding: utf-8
+"""
+Tests of the Cython source conversion.
+"""
+import ast
+import textwrap
+
+import pytest
+
+from sugarsdk.pyx import pyx_to_py
+
+SOURCE = textwrap.dedent("""
+    cimport cython
+    from libc.stdlib cimport malloc
+
+    cdef extern from "math.h" nogil:
+        double sqrt(double x)
+        ctypedef struct point:
+            int x
+
+    ctypedef unsigned long ulong
+    cdef int i, j
+    cdef int k = 0, *p, arr[10]
+    cdef:
+        int a, b
+        double c = 1.0
+
+    cdef class Impl(Interface):
+        cdef public int count
+
+        cpdef list run(self, int a, double[:, ::1] b,
+                       list d not None, const char *s="x, y",
+                       unsigned int u=0):
+            cdef double *ptr = &c
+            return [<int>a]
+
+        cdef inline int _helper(self, int a) except -1 nogil:
+            return a
+
+        def ping(self, a: int, *args, **kwargs):
+            pass
+""")
+
+DECLARATIONS = [
+    ("cdef int i, j", {"i": None, "j": None}),
+    ("cdef unsigned long long big = 1  # comment", {"big": 1}),
+    ("cdef:\n    int a, b\n    double c = 1.0\n\n    object o", {"a": None, "b": None, "c": 1.0, "o": None}),
+]
+
+
+def _get_functions(source):
+    """
+    Get signatures of the methods from the converted source.
+
+    :param source: Cython source
+    :return: dict of method name to (line number, argument names, defaults)
+    """
+    functions = {}
+    for node in ast.walk(ast.parse(pyx_to_py(source))):
+        if isinstance(node, ast.FunctionDef):
+            functions[node.name] = (node.lineno, [arg.arg for arg in node.args.args],
+                                    [ast.literal_eval(value) for value in node.args.defaults])
+    return functions
+
+
+def test_keeps_line_numbers():
+    """
+    Converted source has the same lines as the Cython source.
+
+    :return: None
+    """
+    assert len(pyx_to_py(SOURCE).splitlines()) == len(SOURCE.splitlines())
+
+
+def test_signatures():
+    """
+    C types are removed from the signatures, which stay at their lines.
+
+    :return: None
+    """
+    functions = _get_functions(SOURCE)
+    assert functions["run"] == (20, ["self", "a", "b", "d", "s", "u"], ["x, y", 0])
+    assert functions["_helper"] == (26, ["self", "a"], [])
+    assert functions["ping"] == (29, ["self", "a"], [])
+
+
+@pytest.mark.parametrize("declaration,names", DECLARATIONS)
+def test_declarations(declaration, names):
+    """
+    C variable declarations become assignments of their defaults.
+
+    :param declaration: Cython declaration
+    :param names: expected names and their values
+    :return: None
+    """
+    found = {}
+    for node in ast.walk(ast.parse(pyx_to_py(declaration))):
+        if isinstance(node, ast.Assign):
+            found[node.targets[0].id] = ast.literal_eval(node.value)
+    assert found == names